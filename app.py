@@ -0,0 +1,89 @@
+import sys
+import tkinter as tk
+from tkinter import ttk
+
+from database import close_pool
+from login import LoginWindow
+
+
+class AppShell:
+    """Owns the application's single Tk root and swaps views inside it.
+
+    The login window and the dashboards are each built in a frame that is
+    destroyed when the next view is shown. The root, imported modules,
+    pooled connections and rank engines therefore carry over from one
+    session to the next, and logging in or out never starts another
+    mainloop.
+    """
+
+    def __init__(self, root, prewarm_modules=True):
+        self.root = root
+        self.prewarm_modules = prewarm_modules
+        self.view = None
+        self.frame = None
+        self.sessions = 0
+        # Views may change theme; each starts from the one Tk picked
+        self.style = ttk.Style(root)
+        self.default_theme = self.style.theme_use()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+
+    def _mount(self):
+        """Close the current view and return an empty frame for the next one."""
+        if self.view is not None and hasattr(self.view, 'close'):
+            self.view.close()
+        self.view = None
+        if self.frame is not None:
+            self.frame.destroy()
+        # Dialogs the last view left open belong to the root, not its frame
+        for child in self.root.winfo_children():
+            if isinstance(child, tk.Toplevel):
+                child.destroy()
+        if self.style.theme_use() != self.default_theme:
+            self.style.theme_use(self.default_theme)
+        self.frame = tk.Frame(self.root)
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        return self.frame
+
+    def show_login(self):
+        self.view = LoginWindow(self._mount(), self, prewarm_modules=self.prewarm_modules)
+
+    def open_dashboard(self, role, username):
+        """Replace the login window with role's dashboard.
+
+        If the dashboard cannot be built, the login window is shown again
+        and the error re-raised for the caller to report.
+        """
+        frame = self._mount()
+        self.root.resizable(True, True)
+        try:
+            if role == "teacher":
+                from teacher_dashboard import TeacherDashboard
+                self.view = TeacherDashboard(frame, username, self)
+            else:
+                from student_dashboard import StudentDashboard
+                self.view = StudentDashboard(frame, username, self)
+        except Exception:
+            # Never leave the root blank
+            self.show_login()
+            raise
+        self.sessions += 1
+
+    def quit(self):
+        """Close the current view, let its pending writes finish and exit."""
+        if self.view is not None and hasattr(self.view, 'close'):
+            self.view.close(wait=True)
+        self.view = None
+        close_pool()
+        self.root.destroy()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    root = tk.Tk()
+    shell = AppShell(root, prewarm_modules="--no-prewarm" not in argv)
+    shell.show_login()
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
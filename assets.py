@@ -0,0 +1,55 @@
+import glob
+import os
+import tkinter as tk
+
+# Scaled copies live in this directory beside their source image
+CACHE_DIR = ".asset-cache"
+
+
+def _cache_prefix(source, size):
+    directory, name = os.path.split(source)
+    stem = os.path.splitext(name)[0]
+    width, height = size
+    return os.path.join(directory, CACHE_DIR, f"{stem}-{width}x{height}-")
+
+
+def scaled_image_path(source, size):
+    """Return a PNG of source resized to size, creating it if needed.
+
+    The file name records the source's mtime and size, so an edited source
+    gets a fresh copy and stale copies for the same size are removed. PIL
+    is only imported when a copy has to be made. Returns None if the cache
+    directory cannot be written.
+    """
+    stat = os.stat(source)
+    prefix = _cache_prefix(source, size)
+    path = f"{prefix}{stat.st_mtime_ns}-{stat.st_size}.png"
+    if os.path.exists(path):
+        return path
+
+    from PIL import Image
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        for stale in glob.glob(glob.escape(prefix) + "*.png"):
+            os.remove(stale)
+        with Image.open(source) as image:
+            scaled = image.convert("RGB").resize(size, Image.Resampling.LANCZOS)
+        # Written under a temporary name so a crash never leaves a half-written copy
+        partial = f"{path}.{os.getpid()}.tmp"
+        scaled.save(partial, format="PNG", compress_level=1)
+        os.replace(partial, path)
+    except OSError:
+        return None
+    return path
+
+
+def scaled_photo(source, size, master=None):
+    """tk.PhotoImage of source at size, loaded from the asset cache when possible."""
+    path = scaled_image_path(source, size)
+    if path is not None:
+        # Tk reads PNG itself: no JPEG decode, no resampling, no PIL
+        return tk.PhotoImage(file=path, master=master)
+
+    from PIL import Image, ImageTk
+    with Image.open(source) as image:
+        return ImageTk.PhotoImage(image.resize(size, Image.Resampling.LANCZOS), master=master)
@@ -0,0 +1,141 @@
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def process_pool(workers):
+    """ProcessPoolExecutor for CPU-bound work started from a worker thread.
+
+    Spawns rather than forks its processes: a child forked while the Tk
+    interpreter and other threads are running can deadlock.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class BackgroundExecutor:
+    """Runs database work off the Tk thread and delivers results back to it.
+
+    Work is submitted on a named channel (e.g. "results" or "rank").
+    Submitting again on the same channel supersedes the previous request:
+    it is cancelled if it has not started yet, and its result is dropped if
+    it has. Writes should pass channel=None so they are never superseded.
+    Completed work is queued by the worker threads and drained on
+    the Tk thread by a short root.after() poll, so callbacks may touch
+    widgets freely. on_busy(True/False) is called when the executor starts
+    or stops having work in flight; quiet=True work (e.g. a periodic poll)
+    does not count.
+    """
+
+    def __init__(self, root, max_workers=2, poll_interval=15, on_busy=None):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.on_busy = on_busy
+        self._workers = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="srms-worker")
+        self._done = queue.Queue()
+        self._posted = queue.Queue()
+        self._generations = {}
+        self._futures = {}
+        self._in_flight = 0
+        self._busy = 0
+        self._polling = False
+        self._closed = False
+        self._one_off = 0
+        self.stats = {'submitted': 0, 'completed': 0, 'cancelled': 0, 'stale': 0, 'failed': 0}
+
+    def submit(self, channel, func, *args, on_done=None, on_error=None, quiet=False, **kwargs):
+        """Run func(*args, **kwargs) on a worker; must be called from the Tk thread."""
+        if self._closed:
+            return
+        if channel is None:
+            self._one_off += 1
+            channel = ('once', self._one_off)
+        generation = self._generations.get(channel, 0) + 1
+        self._generations[channel] = generation
+        self._cancel_pending(channel)
+
+        self.stats['submitted'] += 1
+        future = self._workers.submit(
+            self._run, channel, generation, quiet, func, args, kwargs, on_done, on_error)
+        self._futures[channel] = (future, quiet)
+        self._in_flight += 1
+        if not quiet:
+            self._busy += 1
+            if self._busy == 1 and self.on_busy:
+                self.on_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def cancel(self, channel):
+        """Forget any outstanding request on channel."""
+        self._generations[channel] = self._generations.get(channel, 0) + 1
+        self._cancel_pending(channel)
+
+    def _cancel_pending(self, channel):
+        future, quiet = self._futures.pop(channel, (None, False))
+        if future is not None and future.cancel():
+            self.stats['cancelled'] += 1
+            self._finished(quiet)
+
+    def post(self, callback, *args):
+        """Run callback(*args) on the Tk thread; for progress reports from running work."""
+        self._posted.put((callback, args))
+
+    def _run(self, channel, generation, quiet, func, args, kwargs, on_done, on_error):
+        # Worker thread: never touch Tk here
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._done.put((channel, generation, quiet, False, e, on_done, on_error))
+        else:
+            self._done.put((channel, generation, quiet, True, result, on_done, on_error))
+
+    def _finished(self, quiet):
+        self._in_flight -= 1
+        if quiet:
+            return
+        self._busy -= 1
+        if self._busy == 0 and self.on_busy and not self._closed:
+            self.on_busy(False)
+
+    def _poll(self):
+        if self._closed:
+            return
+        while True:
+            try:
+                callback, args = self._posted.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        while True:
+            try:
+                channel, generation, quiet, ok, value, on_done, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            if self._generations.get(channel) != generation:
+                # Superseded by a newer request on the same channel
+                self.stats['stale'] += 1
+            else:
+                self._futures.pop(channel, None)
+                if ok:
+                    self.stats['completed'] += 1
+                    if on_done:
+                        on_done(value)
+                else:
+                    self.stats['failed'] += 1
+                    if on_error:
+                        on_error(value)
+                if isinstance(channel, tuple):
+                    del self._generations[channel]
+            self._finished(quiet)
+        if self._in_flight > 0 and not self._closed:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self, wait=False):
+        """Stop accepting work and drop queued requests; wait=True lets running ones finish."""
+        self._closed = True
+        self._futures.clear()
+        self._workers.shutdown(wait=wait, cancel_futures=True)
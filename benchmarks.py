@@ -0,0 +1,463 @@
+"""Performance benchmarks for the result system.
+
+Run ``python benchmarks.py <name>`` for one benchmark or with no
+arguments for all of them.
+"""
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from database import EXAM_TYPES, SUBJECTS_BY_SEM, ConnectionPool, migrate
+
+
+def synthetic_results(row_count, seed=42):
+    """Yield (std_id, student_name, roll_no, subject, marks, semester, exam_type) rows."""
+    rng = random.Random(seed)
+    cells = [(sem, subject, exam_type)
+             for sem, subjects in SUBJECTS_BY_SEM.items()
+             for exam_type in EXAM_TYPES
+             for subject in subjects]
+    student = 0
+    produced = 0
+    while produced < row_count:
+        std_id = f"STD{student:07d}"
+        for sem, subject, exam_type in cells:
+            if produced == row_count:
+                return
+            yield (std_id, f"Student {student}", str(student), subject,
+                   rng.randint(0, 100), sem, exam_type)
+            produced += 1
+        student += 1
+
+
+def build_synthetic_database(row_count, directory):
+    """Create a migrated database in directory holding row_count synthetic results.
+    
+    Returns a ConnectionPool for it; close it before removing directory.
+    """
+    pool = ConnectionPool(os.path.join(directory, "bench.db"))
+    with pool.connection() as conn:
+        migrate(conn)
+        rows = list(synthetic_results(row_count))
+        students = {(std_id, name) for std_id, name, *_ in rows}
+        conn.executemany(
+            "INSERT INTO users (username, password, role, full_name) VALUES (?, 'student123', 'student', ?)",
+            sorted(students))
+        conn.executemany('''
+        INSERT INTO results (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 'admin')
+        ''', rows)
+        conn.execute("ANALYZE")
+    return pool
+
+
+def _per_op_us(func, count):
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def bench_rank_engine(sizes=(10_000, 100_000, 1_000_000), operations=2_000):
+    """Update and query latency of the incremental rank engine."""
+    from rank_engine import RankEngine
+
+    print(f"{'rows':>10} {'ranked':>8} {'load s':>8} {'update us':>10} "
+          f"{'rank_of us':>11} {'top10 us':>9} {'page50 us':>10}")
+    for size in sizes:
+        rows = list(synthetic_results(size))
+        start = time.perf_counter()
+        engine = RankEngine().load(rows)
+        load_seconds = time.perf_counter() - start
+
+        rng = random.Random(size)
+        picks = [rows[rng.randrange(len(rows))] for _ in range(operations)]
+        pages = max(1, len(engine) // 50)
+
+        def update(i):
+            std_id, name, roll_no, subject, _, sem, exam_type = picks[i]
+            engine.record(std_id, name, roll_no, subject, rng.randint(0, 100), sem, exam_type)
+
+        update_us = _per_op_us(update, operations)
+        rank_us = _per_op_us(lambda i: engine.rank_of(picks[i][0], picks[i][5]), operations)
+        top_us = _per_op_us(lambda i: engine.top(10), operations)
+        page_us = _per_op_us(lambda i: engine.page(rng.randrange(pages), 50), operations)
+        print(f"{size:>10} {len(engine):>8} {load_seconds:>8.2f} {update_us:>10.1f} "
+              f"{rank_us:>11.1f} {top_us:>9.1f} {page_us:>10.1f}")
+
+
+def bench_search(size=100_000, repeats=50):
+    """Latency of View Results search-box queries as the user types."""
+    from database import search_results
+
+    with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+        pool = build_synthetic_database(size, directory)
+        print(f"{size} result rows")
+        with pool.connection() as conn:
+            # Simulate typing a name, a student id and a roll number key by key
+            for word in ("Student 123", "STD0001234", "4321"):
+                for length in range(1, len(word) + 1):
+                    text = word[:length]
+                    start = time.perf_counter()
+                    for _ in range(repeats):
+                        rows = search_results(conn, text, semester=4)
+                    elapsed_ms = (time.perf_counter() - start) / repeats * 1000
+                    print(f"  {text!r:>14} {len(rows):>5} rows {elapsed_ms:8.2f} ms")
+        pool.close_all()
+
+
+def write_synthetic_csv(path, row_count, seed=42):
+    """Write row_count synthetic results as an import CSV."""
+    import csv
+    from importer import REQUIRED_COLUMNS
+
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(REQUIRED_COLUMNS)
+        writer.writerows(synthetic_results(row_count, seed))
+
+
+def bench_import(sizes=(10_000, 100_000)):
+    """Throughput of the bulk CSV importer into an empty and a populated
+    database, and of importing the same file a second time."""
+    from importer import CsvImporter
+
+    print(f"{'rows':>10} {'existing':>9} {'pass':>7} {'seconds':>8} {'rows/s':>10} "
+          f"{'new':>8} {'updated':>8} {'accounts':>9}")
+    for size in sizes:
+        for existing in (0, size):
+            with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+                pool = build_synthetic_database(existing, directory)
+                path = os.path.join(directory, "import.csv")
+                # A different seed changes the marks so existing rows are replaced
+                write_synthetic_csv(path, size, seed=7)
+                for label in ("first", "again"):
+                    result = CsvImporter("admin", pool=pool).import_file(path)
+                    print(f"{size:>10} {existing:>9} {label:>7} {result.seconds:>8.2f} "
+                          f"{result.rows_per_second:>10,.0f} {result.inserted:>8} "
+                          f"{result.updated:>8} {result.accounts_created:>9}")
+                pool.close_all()
+
+
+def bench_validate(size=200_000):
+    """Import validation time with one process and with one per core."""
+    from importer import validate_file
+
+    with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+        path = os.path.join(directory, "import.csv")
+        write_synthetic_csv(path, size)
+        print(f"{size} rows, {os.cpu_count()} cores")
+        for workers in sorted({1, 2, os.cpu_count() or 1}):
+            report = validate_file(path, workers=workers)
+            print(f"  {workers:>3} workers {report.seconds:8.2f} s  {report.rows / report.seconds:>12,.0f} rows/s")
+
+
+def bench_history(size=100_000, corrections=20_000):
+    """Point-in-time View Results and rank list reads against the live tables."""
+    from database import ResultQuery, history_seq, history_since, save_results
+    from rank_engine import load_rank_engine
+
+    with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+        pool = build_synthetic_database(size, directory)
+        with pool.connection() as conn:
+            before = history_seq(conn, int(time.time()) + 1)
+            rng = random.Random(size)
+            rows = conn.execute('''
+            SELECT std_id, student_name, roll_no, subject, marks, semester, exam_type, 'admin'
+            FROM results
+            ''').fetchall()
+            save_results(conn, [row[:4] + (rng.randint(0, 100),) + row[5:]
+                                for row in rng.sample(rows, corrections)])
+        print(f"{size} results, {corrections} corrections")
+        filters = dict(semester=4, exam_type="SEM")
+        for label, as_of_seq in (("current", None), ("snapshot", before)):
+            start = time.perf_counter()
+            query = ResultQuery(pool=pool, as_of_seq=as_of_seq, **filters)
+            query.count()
+            query.fetch(0, 50)
+            page_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            with pool.connection() as conn:
+                engine = load_rank_engine(conn, as_of_seq=as_of_seq, **filters)
+            rank_ms = (time.perf_counter() - start) * 1000
+            print(f"  {label:>8}: first page {page_ms:8.1f} ms  rank list {rank_ms:8.1f} ms  "
+                  f"{len(engine)} ranked")
+        with pool.connection() as conn:
+            start = time.perf_counter()
+            changes = len(history_since(conn, 0).fetchall())
+            print(f"  all {changes} history entries read in "
+                  f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        pool.close_all()
+
+
+def bench_change_feed(sizes=(10_000, 100_000, 1_000_000), changes=(10, 100, 1000), repeats=200):
+    """Cost of a change feed poll: idle, and with a number of new changes."""
+    from database import history_after, latest_seq, save_results
+
+    print(f"{'rows':>10} {'changes':>8} {'poll us':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+            pool = build_synthetic_database(size, directory)
+            with pool.connection() as conn:
+                rows = conn.execute('''
+                SELECT std_id, student_name, roll_no, subject, marks, semester, exam_type, 'admin'
+                FROM results LIMIT ?
+                ''', (max(changes),)).fetchall()
+                seq = latest_seq(conn)
+                idle_us = _per_op_us(lambda i: history_after(conn, seq, 2000), repeats)
+                print(f"{size:>10} {0:>8} {idle_us:>10.1f}")
+                for count in changes:
+                    seq = latest_seq(conn)
+                    save_results(conn, [row[:4] + ((row[4] + 1) % 101,) + row[5:] for row in rows[:count]])
+                    conn.commit()
+                    poll_us = _per_op_us(lambda i: history_after(conn, seq, 2000), max(1, repeats // 10))
+                    print(f"{size:>10} {count:>8} {poll_us:>10.1f}")
+            pool.close_all()
+
+
+def bench_report_cards(students=200):
+    """Report card generation time with one process and with one per core."""
+    from report_cards import load_report_cards, generate_report_cards
+
+    with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+        # 30 results per student: both semesters, every exam
+        pool = build_synthetic_database(students * 30, directory)
+        with pool.connection() as conn:
+            cards = load_report_cards(conn)
+        pool.close_all()
+        print(f"{len(cards)} students, {os.cpu_count()} cores")
+        for workers in sorted({1, 2, os.cpu_count() or 1}):
+            output = os.path.join(directory, f"cards-{workers}")
+            result = generate_report_cards(cards, output, workers=workers)
+            print(f"  {workers:>3} workers {result.seconds:8.2f} s  {result.cards_per_second:>8,.1f} cards/s")
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STARTUP_MODULES = ("login", "teacher_dashboard", "student_dashboard", "charts", "reports")
+
+# Run in a child process: paints the login window, then reports and exits
+_FIRST_PAINT = """
+import tkinter as tk
+root = tk.Tk()
+from app import AppShell
+AppShell(root, prewarm_modules=False).show_login()
+root.wait_visibility()
+root.update()
+print("painted", flush=True)
+root.destroy()
+"""
+
+
+def _import_times(module):
+    """Return (total_us, {package: us}) for importing module in a fresh interpreter.
+
+    The breakdown is by the packages module imports directly, grouped by
+    their top-level name.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=HERE, check=True)
+    total = 0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        # Each level of nesting indents the name by two more spaces
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            total = int(cumulative)
+        elif depth == 1:
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative)
+    return total, packages
+
+
+def _spawn_seconds(code, env=None, cwd=HERE):
+    """Wall time from starting python -c code until it prints its first line, or None."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, env=env, cwd=cwd)
+    line = proc.stdout.readline()
+    elapsed = time.perf_counter() - start
+    proc.wait()
+    return elapsed if line.strip() else None
+
+
+def bench_startup(top=6, repeats=3):
+    """Import cost of each entry module and time to first paint of the login window."""
+    for module in STARTUP_MODULES:
+        total, packages = _import_times(module)
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+        print(f"  import {module:<18} {total / 1000:8.1f} ms   "
+              + ", ".join(f"{name} {us / 1000:.0f}" for name, us in heaviest))
+
+    interpreter = min(_spawn_seconds("print(1)") for _ in range(repeats))
+    print(f"  bare interpreter        {interpreter * 1000:8.1f} ms")
+
+    # Painted from a scratch directory so the real database is not touched
+    with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+        shutil.copy(os.path.join(HERE, "login_bg.jpg"), directory)
+        env = dict(os.environ, PYTHONPATH=HERE)
+        paints = [_spawn_seconds(_FIRST_PAINT, env=env, cwd=directory) for _ in range(repeats)]
+    if None in paints:
+        print("  first paint             skipped (no display)")
+    else:
+        print(f"  first paint             {min(paints) * 1000:8.1f} ms")
+
+
+def bench_login_cycles(cycles=300, block=50, size=20_000):
+    """Time of a login -> dashboard -> logout cycle, early sessions against late ones."""
+    import threading
+    import tkinter as tk
+    from statistics import median
+    import database
+    from app import AppShell
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print("  skipped (no display)")
+        return
+
+    # Dashboards open the database in the working directory: use a scratch copy
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="srms-bench-") as directory:
+        pool = build_synthetic_database(size, directory)
+        with pool.connection() as conn:
+            student = conn.execute("SELECT username FROM users WHERE role = 'student' LIMIT 1").fetchone()[0]
+        pool.close_all()
+        os.replace(os.path.join(directory, "bench.db"), os.path.join(directory, database.DB_PATH))
+        os.chdir(directory)
+        try:
+            shell = AppShell(root, prewarm_modules=False)
+            shell.show_login()
+            root.update()
+            times = []
+            for i in range(cycles):
+                start = time.perf_counter()
+                shell.open_dashboard(*(("teacher", "admin") if i % 2 else ("student", student)))
+                root.update()
+                shell.show_login()
+                root.update()
+                times.append(time.perf_counter() - start)
+            for first in range(0, cycles, block):
+                chunk = times[first:first + block]
+                print(f"  cycles {first + 1:>4}-{first + len(chunk):<4} median {median(chunk) * 1000:8.1f} ms")
+            print(f"  {threading.active_count()} threads, {len(root.winfo_children())} root children "
+                  f"after {shell.sessions} sessions")
+            shell.quit()
+        finally:
+            # Closed and left before the directory is removed
+            database.close_pool()
+            os.chdir(cwd)
+
+
+def tree_binder_changes(rows, kind, count, rng):
+    """(patch, undo) row lists making count changes of one kind to keyed rows.
+
+    Rows are (key, (name, subject, marks)) kept sorted by name, so renaming
+    a row moves it.
+    """
+    picked = rng.sample(rows, count)
+    if kind == 'update':
+        patch = [(key, (name, subject, (marks + 1) % 101)) for key, (name, subject, marks) in picked]
+    elif kind == 'move':
+        patch = [(key, (f"S{rng.randrange(len(rows) * 10):07d}", subject, marks))
+                 for key, (name, subject, marks) in picked]
+    elif kind == 'insert':
+        patch = [(len(rows) + i, (f"S{rng.randrange(len(rows) * 10):07d}", "Extra", 50)) for i in range(count)]
+        return patch, [(key, None) for key, _ in patch]
+    else:
+        patch = [(key, None) for key, _ in picked]
+    return patch, picked
+
+
+def bench_tree_binder(sizes=(10_000, 100_000), counts=(1, 10, 100, 1000),
+                      kinds=('update', 'move', 'insert', 'delete'), repeats=3):
+    """TreeBinder refreshes by kind and number of changed rows.
+
+    patch() is given only the changed rows, as from the change feed; apply()
+    the whole changed result set; refill deletes and re-inserts every row.
+    """
+    import tkinter as tk
+    from tkinter import ttk
+    from widgets import TreeBinder
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        print("  skipped (no display)")
+        return
+
+    rng = random.Random(42)
+    columns = ("Student", "Subject", "Marks")
+    try:
+        for size in sizes:
+            rows = [(i, (f"S{i * 10:07d}", f"Subject {i % 8}", rng.randint(0, 100))) for i in range(size)]
+
+            tree = ttk.Treeview(root, columns=columns, show="headings")
+            start = time.perf_counter()
+            for _, values in rows:
+                tree.insert("", tk.END, values=values)
+            tree.delete(*tree.get_children())
+            print(f"  {size:>7,} rows  refill {(time.perf_counter() - start) * 1000:9.2f} ms")
+            tree.destroy()
+
+            tree = ttk.Treeview(root, columns=columns, show="headings")
+            binder = TreeBinder(tree, sort_key=lambda key, values: values[0])
+            binder.apply(rows)
+            start = time.perf_counter()
+            binder.apply(rows)
+            print(f"  {size:>7,} rows  apply, nothing changed {(time.perf_counter() - start) * 1000:9.2f} ms")
+            for kind in kinds:
+                for count in counts:
+                    patched = applied = 0.0
+                    for _ in range(repeats):
+                        patch, undo = tree_binder_changes(rows, kind, count, rng)
+                        start = time.perf_counter()
+                        binder.patch(patch)
+                        patched += time.perf_counter() - start
+                        binder.patch(undo)
+
+                        changed = dict(rows)
+                        for key, values in patch:
+                            if values is None:
+                                del changed[key]
+                            else:
+                                changed[key] = values
+                        start = time.perf_counter()
+                        binder.apply(changed.items())
+                        applied += time.perf_counter() - start
+                        binder.apply(rows)
+                    print(f"  {size:>7,} rows  {count:>5} {kind:<6}  patch {patched / repeats * 1000:9.2f} ms"
+                          f"  apply {applied / repeats * 1000:9.2f} ms")
+            tree.destroy()
+    finally:
+        root.destroy()
+
+
+BENCHMARKS = {
+    'rank': bench_rank_engine,
+    'search': bench_search,
+    'import': bench_import,
+    'validate': bench_validate,
+    'history': bench_history,
+    'change_feed': bench_change_feed,
+    'report_cards': bench_report_cards,
+    'startup': bench_startup,
+    'login_cycles': bench_login_cycles,
+    'tree_binder': bench_tree_binder,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
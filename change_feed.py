@@ -0,0 +1,97 @@
+from database import connection, history_after, latest_seq
+
+
+class ChangeFeed:
+    """Delivers results changes made by any session, as they are committed.
+
+    results_history numbers every change (see database.history_after), so
+    the feed only remembers the last seq it has seen. Each poll is a range
+    read of the history's primary key on a worker thread: idle polls cost
+    the same whatever the size of the results table, and a refresh costs
+    one row per change. on_changes(changes) is called on the Tk thread with
+    history_after() rows, or with None when more than max_changes arrived
+    at once (e.g. a bulk import) and reloading is cheaper.
+
+    The starting point (last_seq) defaults to the newest change when the
+    feed is created, so a view that creates its feed before loading its
+    data, or passes the seq read before it did, misses nothing. Changes it
+    already loaded may be delivered again and must be applied idempotently.
+    """
+
+    def __init__(self, root, executor, on_changes, interval_ms=2000, max_changes=2000, last_seq=None):
+        self.root = root
+        self.executor = executor
+        self.on_changes = on_changes
+        self.interval_ms = interval_ms
+        self.max_changes = max_changes
+        if last_seq is None:
+            with connection() as conn:
+                last_seq = latest_seq(conn)
+        self.last_seq = last_seq
+        self._after = None
+        self._polling = False
+        self._again = False
+        self._stopped = False
+        self.stats = {'polls': 0, 'changes': 0, 'reloads': 0}
+
+    def start(self):
+        self._schedule(self.interval_ms)
+
+    def stop(self):
+        self._stopped = True
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+
+    def poll(self):
+        """Check for changes now, e.g. right after this session wrote some."""
+        if self._stopped:
+            return
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+        if self._polling:
+            # The running poll is followed by another one straight away
+            self._again = True
+            return
+        self._polling = True
+        self._again = False
+        self.stats['polls'] += 1
+        self.executor.submit('changes', self._fetch, self.last_seq,
+                             on_done=self._deliver, on_error=self._failed, quiet=True)
+
+    def _schedule(self, delay):
+        if not self._stopped:
+            self._after = self.root.after(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._after = None
+        self.poll()
+
+    def _fetch(self, seq):
+        with connection() as conn:
+            changes = history_after(conn, seq, self.max_changes + 1)
+            if len(changes) > self.max_changes:
+                return latest_seq(conn), None
+        return (changes[-1][0] if changes else seq), changes
+
+    def _deliver(self, fetched):
+        self._polling = False
+        if self._stopped:
+            return
+        self.last_seq, changes = fetched
+        if changes is None:
+            self.stats['reloads'] += 1
+            self.on_changes(None)
+        elif changes:
+            self.stats['changes'] += len(changes)
+            self.on_changes(changes)
+        if self._again:
+            self.poll()
+        else:
+            self._schedule(self.interval_ms)
+
+    def _failed(self, error):
+        # A locked or busy database: try again at the next interval
+        self._polling = False
+        self._schedule(self.interval_ms)
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+import matplotlib
+import seaborn as sns
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+
+@lru_cache(maxsize=None)
+def chart_rc():
+    """rcParams of the seaborn whitegrid/notebook look, computed once.
+
+    Applied with matplotlib.rc_context() around drawing instead of
+    sns.set_style()/set_context(), so the global settings are never touched.
+    """
+    rc = dict(sns.axes_style("whitegrid"))
+    rc.update(sns.plotting_context("notebook", font_scale=1.2))
+    return rc
+
+
+def results_key(results):
+    """Cache key for a list of result rows."""
+    return hash(tuple(tuple(row) for row in results))
+
+
+class _BarChart:
+    """Figure, canvas and bar artists of one chart, and its cached renders."""
+
+    def __init__(self, master, figsize):
+        # Figure rather than pyplot: nothing is registered with pyplot's figure manager
+        with matplotlib.rc_context(chart_rc()):
+            self.figure = Figure(figsize=figsize)
+            self.figure.patch.set_facecolor('#f8f9fa')
+            self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.subjects = None
+        self.bars = []
+        self.labels = []
+        self.key = None
+        self.renders = OrderedDict()  # (key, canvas size) -> saved pixels
+
+    def layout(self, subjects, colors):
+        """Create the bars for a new list of subjects."""
+        ax = self.ax
+        ax.clear()
+        self.bars = list(ax.bar(subjects, [0] * len(subjects), color=colors, width=0.8))
+        self.labels = [ax.text(bar.get_x() + bar.get_width()/2., 1, '',
+                               ha='center', va='bottom', fontsize=11, fontweight='bold')
+                       for bar in self.bars]
+        ax.set_title('Subject-wise Performance', fontsize=16, fontweight='bold', pad=20)
+        ax.set_xlabel('Subjects', fontsize=14, fontweight='bold', labelpad=10)
+        ax.set_ylabel('Marks (%)', fontsize=14, fontweight='bold', labelpad=10)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_ha('right')
+        self.figure.tight_layout()
+        self.subjects = list(subjects)
+
+    def set_marks(self, marks):
+        """Move the existing bars and their labels to new heights."""
+        for bar, label, mark in zip(self.bars, self.labels, marks):
+            bar.set_height(mark)
+            label.set_y(mark + 1)
+            label.set_text(f'{int(mark)}%')
+        self.ax.set_ylim(0, min(105, max(marks) + 10))
+
+
+class ChartManager:
+    """Owns the matplotlib figures of one window.
+
+    Every master frame gets a single Figure and canvas, created on first
+    use. Showing data whose key is already on screen does nothing; new data
+    for the same subjects only moves the bars and labels. The pixels of
+    each render are kept per chart and (key, canvas size), so data drawn
+    before in the same chart is blitted back instead of drawn again.
+    close() releases everything.
+    """
+
+    def __init__(self, max_renders=16):
+        self.max_renders = max_renders  # per chart
+        self._charts = {}
+        self.stats = {'draws': 0, 'blits': 0, 'skipped': 0}
+
+    def bar_chart(self, master, key, subjects, marks, colors, figsize=(12, 8)):
+        """Show a bar chart in master and return its canvas."""
+        chart = self._charts.get(master)
+        if chart is None:
+            chart = self._charts[master] = _BarChart(master, figsize)
+        if chart.key == key:
+            self.stats['skipped'] += 1
+            return chart.canvas
+
+        with matplotlib.rc_context(chart_rc()):
+            if chart.subjects != list(subjects):
+                chart.layout(subjects, colors)
+            chart.set_marks(marks)
+        chart.key = key
+
+        canvas = chart.canvas
+        render_key = (key, canvas.get_width_height())
+        renders = chart.renders
+        region = renders.get(render_key)
+        if region is not None:
+            renders.move_to_end(render_key)
+            canvas.restore_region(region)
+            canvas.blit()
+            self.stats['blits'] += 1
+        else:
+            canvas.draw()
+            renders[render_key] = canvas.copy_from_bbox(chart.figure.bbox)
+            if len(renders) > self.max_renders:
+                renders.popitem(last=False)
+            self.stats['draws'] += 1
+        return canvas
+
+    def forget(self, master):
+        """Drop the chart drawn in master, e.g. before master is destroyed."""
+        chart = self._charts.pop(master, None)
+        if chart is not None:
+            widget = chart.canvas.get_tk_widget()
+            if widget.winfo_exists():
+                widget.destroy()
+            chart.figure.clear()
+            chart.renders.clear()
+
+    def close(self):
+        """Release every figure and cached render."""
+        for master in list(self._charts):
+            self.forget(master)
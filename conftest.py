@@ -0,0 +1,18 @@
+import pytest
+
+from database import ConnectionPool, migrate, save_results
+
+
+@pytest.fixture
+def pool(tmp_path, request):
+    """A migrated database in tmp_path holding the test module's SEED_ROWS.
+
+    SEED_ROWS are save_results() rows: (std_id, student_name, roll_no,
+    subject, marks, semester, exam_type, added_by).
+    """
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    with pool.connection() as conn:
+        migrate(conn)
+        save_results(conn, getattr(request.module, "SEED_ROWS", []))
+    yield pool
+    pool.close_all()
@@ -1,9 +1,186 @@
+import copy
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 
-def initialize_database():
-    conn = sqlite3.connect('student_results.db')
-    cursor = conn.cursor()
-    
+DB_PATH = 'student_results.db'
+
+# Valid subjects organized by semester, shared by the dashboards and the schema
+SUBJECTS_BY_SEM = {
+    3: ["MATHS3", "DSA", "DBMS", "PCPF", "PCOM"],
+    4: ["MATHS4", "OS", "CNND", "COA", "AT"]
+}
+SUBJECTS = SUBJECTS_BY_SEM[3] + SUBJECTS_BY_SEM[4]
+EXAM_TYPES = ["IA1", "IA2", "SEM"]
+
+# Lowest mark for each grade, highest first; anything lower is an F
+GRADE_BOUNDARIES = [(90, "A+"), (80, "A"), (70, "B"), (60, "C"), (50, "D")]
+
+
+def grade_for(marks):
+    """Letter grade for a mark out of 100."""
+    for lowest, grade in GRADE_BOUNDARIES:
+        if marks >= lowest:
+            return grade
+    return "F"
+
+
+# Pragmas applied once to every pooled connection when it is opened
+CONNECTION_PRAGMAS = (
+    # Only takes effect on a new, empty database (so it must precede the
+    # journal mode); lets purge_deleted() return pages with incremental_vacuum
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    # REPLACE only fires DELETE triggers when recursive triggers are enabled;
+    # the materialized totals depend on them
+    "PRAGMA recursive_triggers=ON",
+)
+
+
+class ConnectionPool:
+    """Small pool of warm SQLite connections shared by both dashboards.
+
+    Connections are opened lazily, configured once with CONNECTION_PRAGMAS
+    and handed back to the pool after use, so repeated queries reuse the
+    same page cache instead of paying for a fresh connect each time.
+    """
+
+    def __init__(self, path=DB_PATH, size=4):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'opened': 0,
+            'closed': 0,
+            'borrowed': 0,
+            'reused': 0,
+            'connect_seconds': 0.0,
+            'held_seconds': 0.0,
+        }
+
+    def _open(self):
+        start = time.perf_counter()
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._stats['opened'] += 1
+            self._stats['connect_seconds'] += time.perf_counter() - start
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            self._stats['borrowed'] += 1
+            if self._idle:
+                self._stats['reused'] += 1
+                return self._idle.pop()
+        return self._open()
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self._stats['closed'] += 1
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = self.acquire()
+        start = time.perf_counter()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            with self._lock:
+                self._stats['held_seconds'] += time.perf_counter() - start
+            self.release(conn)
+
+    def stats(self):
+        """Return a snapshot of the pool's reuse and timing counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['idle'] = len(self._idle)
+        borrowed = snapshot['borrowed']
+        snapshot['reuse_ratio'] = snapshot['reused'] / borrowed if borrowed else 0.0
+        return snapshot
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._stats['closed'] += len(idle)
+        for conn in idle:
+            # Let SQLite refresh planner statistics that have gone stale
+            conn.execute("PRAGMA optimize")
+            conn.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+
+def connection():
+    """Shortcut for ``get_pool().connection()``."""
+    return get_pool().connection()
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close_all()
+
+
+def _sql_list(values):
+    return ", ".join(f"'{value}'" for value in values)
+
+
+def _create_results_table(cursor, name='results'):
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {name} (
+        std_id TEXT,
+        student_name TEXT NOT NULL,
+        roll_no TEXT NOT NULL,
+        subject TEXT NOT NULL CHECK (subject IN ({_sql_list(SUBJECTS)})),
+        marks INTEGER NOT NULL CHECK (marks >= 0 AND marks <= 100),
+        semester INTEGER CHECK (semester IN (3, 4)),
+        exam_type TEXT CHECK (exam_type IN ({_sql_list(EXAM_TYPES)})),
+        added_by TEXT NOT NULL,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (std_id, subject, semester, exam_type),
+        FOREIGN KEY (added_by) REFERENCES users(username),
+        FOREIGN KEY (std_id) REFERENCES users(username)
+    )
+    ''')
+
+
+def _migration_1_base_schema(cursor):
     # Create users table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS users (
@@ -15,65 +192,956 @@ def initialize_database():
     )
     ''')
     
-    # Create results table with composite primary key
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(results)")]
+    if not columns:
+        _create_results_table(cursor)
+        return
+    if 'semester' in columns and 'exam_type' in columns:
+        return
+    
+    # Older databases keyed results on (std_id, subject) only; rebuild them
+    # with semester/exam_type, inferring the semester from the subject
+    cursor.execute("ALTER TABLE results RENAME TO results_legacy")
+    _create_results_table(cursor)
+    cursor.execute(f'''
+    INSERT INTO results
+    (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by, added_at)
+    SELECT std_id, student_name, roll_no, subject, marks,
+           CASE WHEN subject IN ({_sql_list(SUBJECTS_BY_SEM[3])}) THEN 3 ELSE 4 END,
+           'SEM', added_by, added_at
+    FROM results_legacy
+    ''')
+    cursor.execute("DROP TABLE results_legacy")
+
+
+def _migration_2_results_indexes(cursor):
+    # View Results / Rank List filters: equality on semester and exam_type,
+    # optionally subject, reading std_id, roll_no and marks from the index
     cursor.execute('''
-    CREATE TABLE IF NOT EXISTS results (
-        std_id TEXT,
-        student_name TEXT NOT NULL,
-        roll_no TEXT NOT NULL,
-        subject TEXT NOT NULL CHECK (subject IN ('MATHS4', 'OS', 'CNND', 'COA', 'AT')),
-        marks INTEGER NOT NULL CHECK (marks >= 0 AND marks <= 100),
-        added_by TEXT NOT NULL,
-        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        PRIMARY KEY (std_id, subject),
-        FOREIGN KEY (added_by) REFERENCES users(username),
-        FOREIGN KEY (std_id) REFERENCES users(username)
+    CREATE INDEX IF NOT EXISTS idx_results_sem_exam_subject
+    ON results (semester, exam_type, subject, std_id, roll_no, marks)
+    ''')
+    # Subject-only filter
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_results_subject
+    ON results (subject, semester, exam_type)
+    ''')
+    # Latest roll number per student (fetch_student_details)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_results_std_added
+    ON results (std_id, added_at DESC, roll_no)
+    ''')
+    cursor.execute("ANALYZE")
+
+
+def _migration_3_semester_totals(cursor):
+    # Per (student, semester, exam type) totals kept current by triggers so
+    # ranking reads an index instead of aggregating every result row
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS student_semester_totals (
+        std_id TEXT NOT NULL,
+        semester INTEGER,
+        exam_type TEXT,
+        roll_no TEXT,
+        total NUMERIC NOT NULL DEFAULT 0,
+        subject_count INTEGER NOT NULL DEFAULT 0,
+        average REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (std_id, semester, exam_type)
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_totals_rank
+    ON student_semester_totals (semester, exam_type, subject_count, total DESC, std_id)
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_results_totals_insert
+    AFTER INSERT ON results
+    BEGIN
+        INSERT INTO student_semester_totals
+        (std_id, semester, exam_type, roll_no, total, subject_count, average)
+        VALUES (NEW.std_id, NEW.semester, NEW.exam_type, NEW.roll_no, NEW.marks, 1, NEW.marks)
+        ON CONFLICT (std_id, semester, exam_type) DO UPDATE SET
+            roll_no = excluded.roll_no,
+            total = total + excluded.total,
+            subject_count = subject_count + 1,
+            average = (total + excluded.total) * 1.0 / (subject_count + 1);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_results_totals_delete
+    AFTER DELETE ON results
+    BEGIN
+        UPDATE student_semester_totals SET
+            total = total - OLD.marks,
+            subject_count = subject_count - 1,
+            average = CASE WHEN subject_count > 1
+                           THEN (total - OLD.marks) * 1.0 / (subject_count - 1)
+                           ELSE 0 END
+        WHERE std_id = OLD.std_id AND semester IS OLD.semester AND exam_type IS OLD.exam_type;
+        DELETE FROM student_semester_totals
+        WHERE std_id = OLD.std_id AND semester IS OLD.semester AND exam_type IS OLD.exam_type
+          AND subject_count <= 0;
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_results_totals_update
+    AFTER UPDATE OF std_id, semester, exam_type, marks, roll_no ON results
+    BEGIN
+        UPDATE student_semester_totals SET
+            total = total - OLD.marks,
+            subject_count = subject_count - 1,
+            average = CASE WHEN subject_count > 1
+                           THEN (total - OLD.marks) * 1.0 / (subject_count - 1)
+                           ELSE 0 END
+        WHERE std_id = OLD.std_id AND semester IS OLD.semester AND exam_type IS OLD.exam_type;
+        DELETE FROM student_semester_totals
+        WHERE std_id = OLD.std_id AND semester IS OLD.semester AND exam_type IS OLD.exam_type
+          AND subject_count <= 0;
+        INSERT INTO student_semester_totals
+        (std_id, semester, exam_type, roll_no, total, subject_count, average)
+        VALUES (NEW.std_id, NEW.semester, NEW.exam_type, NEW.roll_no, NEW.marks, 1, NEW.marks)
+        ON CONFLICT (std_id, semester, exam_type) DO UPDATE SET
+            roll_no = excluded.roll_no,
+            total = total + excluded.total,
+            subject_count = subject_count + 1,
+            average = (total + excluded.total) * 1.0 / (subject_count + 1);
+    END
+    ''')
+    
+    # Backfill from the existing results
+    cursor.execute("DELETE FROM student_semester_totals")
+    cursor.execute('''
+    INSERT INTO student_semester_totals
+    (std_id, semester, exam_type, roll_no, total, subject_count, average)
+    SELECT std_id, semester, exam_type, MAX(roll_no), SUM(marks), COUNT(*), AVG(marks)
+    FROM results
+    GROUP BY std_id, semester, exam_type
+    ''')
+    cursor.execute("ANALYZE student_semester_totals")
+
+
+def _migration_4_student_search(cursor):
+    # Trigram full-text index over each student's name, id and latest roll
+    # number, so the View Results search box filters in SQL
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS student_search
+    USING fts5(std_id, full_name, roll_no, tokenize='trigram')
+    ''')
+    latest_roll = '''(SELECT roll_no FROM results WHERE std_id = NEW.username
+                      ORDER BY added_at DESC LIMIT 1)'''
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_users_search_insert
+    AFTER INSERT ON users WHEN NEW.role = 'student'
+    BEGIN
+        INSERT INTO student_search (rowid, std_id, full_name, roll_no)
+        VALUES (NEW.id, NEW.username, NEW.full_name, {latest_roll});
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_users_search_update
+    AFTER UPDATE OF username, full_name, role ON users
+    BEGIN
+        DELETE FROM student_search WHERE rowid = OLD.id;
+        INSERT INTO student_search (rowid, std_id, full_name, roll_no)
+        SELECT NEW.id, NEW.username, NEW.full_name, {latest_roll}
+        WHERE NEW.role = 'student';
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_users_search_delete
+    AFTER DELETE ON users
+    BEGIN
+        DELETE FROM student_search WHERE rowid = OLD.id;
+    END
+    ''')
+    for event in ("INSERT", "UPDATE OF roll_no"):
+        name = event.split()[0].lower()
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_results_search_{name}
+        AFTER {event} ON results
+        BEGIN
+            UPDATE student_search SET roll_no = NEW.roll_no
+            WHERE rowid = (SELECT id FROM users WHERE username = NEW.std_id)
+              AND roll_no IS NOT NEW.roll_no;
+        END
+        ''')
+    
+    # Backfill from the existing students
+    cursor.execute("DELETE FROM student_search")
+    cursor.execute('''
+    INSERT INTO student_search (rowid, std_id, full_name, roll_no)
+    SELECT u.id, u.username, u.full_name,
+           (SELECT roll_no FROM results WHERE std_id = u.username
+            ORDER BY added_at DESC LIMIT 1)
+    FROM users u
+    WHERE u.role = 'student'
+    ''')
+
+
+def _migration_5_keyset_indexes(cursor):
+    # Ordered scans for the paginated View Results grid; the trailing
+    # primary key columns make every keyset position unique
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_results_roll_keyset
+    ON results (roll_no, std_id, subject, semester, exam_type)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_results_marks_keyset
+    ON results (marks, std_id, subject, semester, exam_type)
+    ''')
+
+
+# Remove a row that is going away from its semester totals
+_TOTALS_SUBTRACT_OLD = '''
+        UPDATE student_semester_totals SET
+            total = total - OLD.marks,
+            subject_count = subject_count - 1,
+            average = CASE WHEN subject_count > 1
+                           THEN (total - OLD.marks) * 1.0 / (subject_count - 1)
+                           ELSE 0 END
+        WHERE std_id = OLD.std_id AND semester IS OLD.semester AND exam_type IS OLD.exam_type;
+        DELETE FROM student_semester_totals
+        WHERE std_id = OLD.std_id AND semester IS OLD.semester AND exam_type IS OLD.exam_type
+          AND subject_count <= 0;
+'''
+
+
+def _migration_6_soft_delete(cursor):
+    # Soft-deleted results carry a deleted_at time: they are hidden at once
+    # and physically removed later by purge_deleted()
+    cursor.execute("ALTER TABLE results ADD COLUMN deleted_at TIMESTAMP")
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_results_deleted
+    ON results (deleted_at) WHERE deleted_at IS NOT NULL
+    ''')
+    
+    # A soft delete takes the row out of the totals; the later purge (or a
+    # REPLACE of the hidden row) must not subtract it a second time
+    cursor.execute("DROP TRIGGER IF EXISTS trg_results_totals_delete")
+    cursor.execute(f'''
+    CREATE TRIGGER trg_results_totals_delete
+    AFTER DELETE ON results WHEN OLD.deleted_at IS NULL
+    BEGIN
+        {_TOTALS_SUBTRACT_OLD}
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_results_totals_soft_delete
+    AFTER UPDATE OF deleted_at ON results
+    WHEN OLD.deleted_at IS NULL AND NEW.deleted_at IS NOT NULL
+    BEGIN
+        {_TOTALS_SUBTRACT_OLD}
+    END
+    ''')
+    cursor.execute("DROP TRIGGER IF EXISTS trg_results_totals_update")
+    cursor.execute(f'''
+    CREATE TRIGGER trg_results_totals_update
+    AFTER UPDATE OF std_id, semester, exam_type, marks, roll_no ON results
+    WHEN OLD.deleted_at IS NULL
+    BEGIN
+        {_TOTALS_SUBTRACT_OLD}
+        INSERT INTO student_semester_totals
+        (std_id, semester, exam_type, roll_no, total, subject_count, average)
+        VALUES (NEW.std_id, NEW.semester, NEW.exam_type, NEW.roll_no, NEW.marks, 1, NEW.marks)
+        ON CONFLICT (std_id, semester, exam_type) DO UPDATE SET
+            roll_no = excluded.roll_no,
+            total = total + excluded.total,
+            subject_count = subject_count + 1,
+            average = (total + excluded.total) * 1.0 / (subject_count + 1);
+    END
+    ''')
+
+
+def _code_sql(column, values):
+    # Integer code of a text column: its position in values
+    cases = " ".join(f"WHEN '{value}' THEN {code}" for code, value in enumerate(values))
+    return f"CASE {column} {cases} END"
+
+
+def _decode_sql(column, values):
+    cases = " ".join(f"WHEN {code} THEN '{value}'" for code, value in enumerate(values))
+    return f"CASE {column} {cases} END"
+
+
+def _history_row_sql(row):
+    # Time and key columns of a results_history entry for `row` (OLD or NEW)
+    return f'''CAST(strftime('%s', 'now') AS INTEGER), {row}.std_id,
+                {_code_sql(f"{row}.subject", SUBJECTS)}, {row}.semester,
+                {_code_sql(f"{row}.exam_type", EXAM_TYPES)}'''
+
+
+def _migration_7_results_history(cursor):
+    # Append-only log of every visible change to results, written by
+    # triggers. Subjects and exam types are stored as their position in
+    # SUBJECTS / EXAM_TYPES and times as Unix seconds; marks is NULL when
+    # the result was deleted. seq orders the entries.
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS results_history (
+        seq INTEGER PRIMARY KEY,
+        changed_at INTEGER NOT NULL,
+        std_id TEXT NOT NULL,
+        subject INTEGER NOT NULL,
+        semester INTEGER NOT NULL,
+        exam INTEGER NOT NULL,
+        marks INTEGER,
+        roll_no TEXT
+    )
+    ''')
+    # "Changes since T": a range of changed_at
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_history_time
+    ON results_history (changed_at)
+    ''')
+    # "State as of T": the last entry per key, read in key order
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_history_key
+    ON results_history (semester, exam, subject, std_id, seq)
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_results_history_insert
+    AFTER INSERT ON results WHEN NEW.deleted_at IS NULL
+    BEGIN
+        INSERT INTO results_history (changed_at, std_id, subject, semester, exam, marks, roll_no)
+        VALUES ({_history_row_sql('NEW')}, NEW.marks, NEW.roll_no);
+    END
+    ''')
+    # Also covers soft deletes (deleted_at set) and key changes
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_results_history_update
+    AFTER UPDATE OF std_id, subject, semester, exam_type, marks, roll_no, deleted_at ON results
+    WHEN OLD.deleted_at IS NULL OR NEW.deleted_at IS NULL
+    BEGIN
+        INSERT INTO results_history (changed_at, std_id, subject, semester, exam, marks, roll_no)
+        SELECT {_history_row_sql('OLD')}, NULL, NULL
+        WHERE OLD.deleted_at IS NULL
+          AND (NEW.deleted_at IS NOT NULL OR OLD.std_id IS NOT NEW.std_id OR OLD.subject IS NOT NEW.subject
+               OR OLD.semester IS NOT NEW.semester OR OLD.exam_type IS NOT NEW.exam_type);
+        INSERT INTO results_history (changed_at, std_id, subject, semester, exam, marks, roll_no)
+        SELECT {_history_row_sql('NEW')}, NEW.marks, NEW.roll_no
+        WHERE NEW.deleted_at IS NULL
+          AND (OLD.deleted_at IS NOT NULL OR OLD.std_id IS NOT NEW.std_id OR OLD.subject IS NOT NEW.subject
+               OR OLD.semester IS NOT NEW.semester OR OLD.exam_type IS NOT NEW.exam_type
+               OR OLD.marks IS NOT NEW.marks OR OLD.roll_no IS NOT NEW.roll_no);
+    END
+    ''')
+    # Purging a soft-deleted row is not a change: its delete is logged already
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_results_history_delete
+    AFTER DELETE ON results WHEN OLD.deleted_at IS NULL
+    BEGIN
+        INSERT INTO results_history (changed_at, std_id, subject, semester, exam, marks, roll_no)
+        VALUES ({_history_row_sql('OLD')}, NULL, NULL);
+    END
+    ''')
+    
+    # History starts with the current results, as of when they were added
+    cursor.execute(f'''
+    INSERT INTO results_history (changed_at, std_id, subject, semester, exam, marks, roll_no)
+    SELECT CAST(strftime('%s', COALESCE(added_at, 'now')) AS INTEGER), std_id,
+           {_code_sql('subject', SUBJECTS)}, semester, {_code_sql('exam_type', EXAM_TYPES)},
+           marks, roll_no
+    FROM results
+    WHERE deleted_at IS NULL
+    ORDER BY added_at
+    ''')
+
+
+# Ordered schema migrations; entry N brings the database to user_version N
+MIGRATIONS = [
+    _migration_1_base_schema,
+    _migration_2_results_indexes,
+    _migration_3_semester_totals,
+    _migration_4_student_search,
+    _migration_5_keyset_indexes,
+    _migration_6_soft_delete,
+    _migration_7_results_history,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Bring the database up to SCHEMA_VERSION; a no-op when already current."""
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return False
+    
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-check under the write lock in case another process migrated first
+        version = schema_version(conn)
+        for target, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {target}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return True
+
+
+def _full_subject_count_sql(column):
+    # Number of subjects a student needs in a semester to be ranked
+    cases = " ".join(f"WHEN {sem} THEN {len(subjects)}" for sem, subjects in SUBJECTS_BY_SEM.items())
+    return f"CASE {column} {cases} END"
+
+
+def student_rank(conn, std_id):
+    """Return (rank, total_students, semester, exam_type) for a student's latest exam.
+    
+    Uses the student's most recent semester and the most advanced exam type
+    (SEM, then IA2, then IA1) for which all subjects are recorded. Both the
+    rank and the cohort size are index range counts on the totals table.
+    Returns None when the student has no complete exam.
+    """
+    row = conn.execute(f'''
+    SELECT semester, exam_type, total, subject_count
+    FROM student_semester_totals
+    WHERE std_id = ? AND subject_count = {_full_subject_count_sql('semester')}
+    ORDER BY semester DESC,
+             CASE exam_type WHEN 'SEM' THEN 0 WHEN 'IA2' THEN 1 ELSE 2 END
+    LIMIT 1
+    ''', (std_id,)).fetchone()
+    if row is None:
+        return None
+    
+    semester, exam_type, total, subject_count = row
+    ahead, cohort = conn.execute('''
+    SELECT COALESCE(SUM(total > ?), 0), COUNT(*)
+    FROM student_semester_totals
+    WHERE semester = ? AND exam_type = ? AND subject_count = ?
+    ''', (total, semester, exam_type, subject_count)).fetchone()
+    return ahead + 1, cohort, semester, exam_type
+
+
+def student_ranks(conn):
+    """Return {std_id: (rank, total_students, semester, exam_type)} for every ranked student.
+    
+    The bulk form of student_rank(): one pass over the totals table with
+    window functions, picking the same exam for each student.
+    """
+    rows = conn.execute(f'''
+    SELECT std_id, rank, cohort, semester, exam_type FROM (
+        SELECT std_id, semester, exam_type,
+               RANK() OVER (PARTITION BY semester, exam_type ORDER BY total DESC) AS rank,
+               COUNT(*) OVER (PARTITION BY semester, exam_type) AS cohort,
+               ROW_NUMBER() OVER (
+                   PARTITION BY std_id
+                   ORDER BY semester DESC,
+                            CASE exam_type WHEN 'SEM' THEN 0 WHEN 'IA2' THEN 1 ELSE 2 END
+               ) AS pick
+        FROM student_semester_totals
+        WHERE subject_count = {_full_subject_count_sql('semester')}
     )
+    WHERE pick = 1
     ''')
+    return {std_id: (rank, cohort, semester, exam_type) for std_id, rank, cohort, semester, exam_type in rows}
+
+
+def history_seq(conn, as_of):
+    """Last results_history seq recorded at or before Unix time as_of (0 if none)."""
+    row = conn.execute('''
+    SELECT seq FROM results_history
+    WHERE changed_at <= ?
+    ORDER BY changed_at DESC, seq DESC
+    LIMIT 1
+    ''', (as_of,)).fetchone()
+    return row[0] if row else 0
+
+
+def history_since(conn, since):
+    """Cursor over the changes made after Unix time since, oldest first.
     
-    # Insert sample users if empty
-    cursor.execute("SELECT COUNT(*) FROM users")
-    if cursor.fetchone()[0] == 0:
-        # Teachers
-        teachers = [
-            ('admin', 'admin123', 'teacher', 'Administrator'),
-            ('john', 'john123', 'teacher', 'John Smith')
-        ]
+    Rows are (seq, changed_at, std_id, subject, semester, exam_type, marks,
+    roll_no); marks and roll_no are None where the result was deleted.
+    """
+    return conn.execute(f'''
+    SELECT seq, changed_at, std_id, {_decode_sql('subject', SUBJECTS)}, semester,
+           {_decode_sql('exam', EXAM_TYPES)}, marks, roll_no
+    FROM results_history
+    WHERE changed_at > ?
+    ORDER BY changed_at, seq
+    ''', (since,))
+
+
+def latest_seq(conn):
+    """seq of the newest results_history entry (0 when there is none)."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM results_history").fetchone()[0]
+
+
+def history_after(conn, seq, limit):
+    """Up to `limit` changes logged after history entry seq, oldest first.
+    
+    Rows are (seq, std_id, full_name, roll_no, subject, marks, semester,
+    exam_type, previous): marks is None for a deleted result and previous
+    is the result's (marks, roll_no) before this change, or None when it
+    did not exist, so listeners can tell inserts from updates and see what
+    an update changed. A range read of the primary key plus one key-index
+    probe per change, whatever the size of the table.
+    """
+    rows = conn.execute(f'''
+    SELECT h.seq, h.std_id, COALESCE(u.full_name, ''), h.roll_no,
+           {_decode_sql('h.subject', SUBJECTS)}, h.marks, h.semester,
+           {_decode_sql('h.exam', EXAM_TYPES)}, p.marks, p.roll_no
+    FROM results_history h
+    LEFT JOIN users u ON u.username = h.std_id
+    LEFT JOIN results_history p ON p.seq =
+        (SELECT MAX(q.seq) FROM results_history q
+         WHERE q.semester = h.semester AND q.exam = h.exam AND q.subject = h.subject
+           AND q.std_id = h.std_id AND q.seq < h.seq)
+    WHERE h.seq > ?
+    ORDER BY h.seq
+    LIMIT ?
+    ''', (seq, limit)).fetchall()
+    return [row[:8] + (None if row[8] is None else (row[8], row[9]),) for row in rows]
+
+
+def snapshot_sql(as_of_seq, subject=None, semester=None, exam_type=None):
+    """(sql, params) for a subquery of the results as they were after history entry as_of_seq.
+    
+    The subquery has the results table's std_id, subject, semester,
+    exam_type, marks and roll_no columns and can stand in for it in a
+    FROM clause. It reads the last history entry per key from the key
+    index, so nothing is copied; the filters narrow that index scan.
+    """
+    where = "seq <= ?"
+    params = [as_of_seq]
+    if semester is not None:
+        where += " AND semester = ?"
+        params.append(semester)
+    if exam_type is not None:
+        where += " AND exam = ?"
+        params.append(EXAM_TYPES.index(exam_type))
+    if subject is not None:
+        where += " AND subject = ?"
+        params.append(SUBJECTS.index(subject))
+    # SQLite takes the bare columns from the row holding MAX(seq)
+    sql = f'''(
+        SELECT std_id, {_decode_sql('subject', SUBJECTS)} AS subject, semester,
+               {_decode_sql('exam', EXAM_TYPES)} AS exam_type, marks, roll_no
+        FROM (SELECT std_id, subject, semester, exam, marks, roll_no, MAX(seq)
+              FROM results_history
+              WHERE {where}
+              GROUP BY semester, exam, subject, std_id)
+        WHERE marks IS NOT NULL
+    )'''
+    return sql, params
+
+
+def _student_match_sql(search_text):
+    # Three or more characters use the trigram index; shorter input falls
+    # back to LIKE over the per-student search table (one row per student)
+    if len(search_text) >= 3:
+        return "student_search MATCH ?", ['"' + search_text.replace('"', '""') + '"']
+    pattern = "%" + search_text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return ("std_id LIKE ? ESCAPE '\\' OR full_name LIKE ? ESCAPE '\\' OR roll_no LIKE ? ESCAPE '\\'",
+            [pattern, pattern, pattern])
+
+
+def search_results(conn, search_text, subject=None, semester=None, exam_type=None, limit=500,
+                   as_of_seq=None):
+    """Return up to `limit` View Results rows for students matching search_text.
+    
+    Matches are case-insensitive substrings (so also prefixes) of the name,
+    student id or roll number. Matching students are read from the search
+    index in roll number order and their results fetched in growing batches
+    by primary key, so only enough students to fill `limit` rows are touched.
+    With as_of_seq the results come from that point in the history.
+    """
+    where, params = _student_match_sql(search_text.strip())
+    students = conn.execute(
+        f"SELECT std_id FROM student_search WHERE {where} ORDER BY roll_no, std_id", params)
+    
+    if as_of_seq is not None:
+        table, table_params = snapshot_sql(as_of_seq, subject, semester, exam_type)
+        table += " r"
+        filters = ""
+        filter_params = []
+    else:
+        table = "results r"
+        table_params = []
+        filters = " AND r.deleted_at IS NULL"
+        filter_params = []
+        if subject is not None:
+            filters += " AND r.subject = ?"
+            filter_params.append(subject)
+        if semester is not None:
+            filters += " AND r.semester = ?"
+            filter_params.append(semester)
+        if exam_type is not None:
+            filters += " AND r.exam_type = ?"
+            filter_params.append(exam_type)
+    
+    rows = []
+    batch_size = 32
+    while len(rows) < limit:
+        batch = [std_id for std_id, in students.fetchmany(batch_size)]
+        if not batch:
+            break
+        placeholders = ", ".join("?" * len(batch))
+        rows.extend(conn.execute(f'''
+        SELECT u.full_name, r.std_id, r.roll_no, r.subject, r.marks, r.semester, r.exam_type
+        FROM {table}
+        JOIN users u ON r.std_id = u.username
+        WHERE r.std_id IN ({placeholders}){filters}
+        ORDER BY r.roll_no, r.subject, r.exam_type
+        LIMIT ?
+        ''', table_params + batch + filter_params + [limit - len(rows)]).fetchall())
+        batch_size = min(batch_size * 2, 512)
+    return rows
+
+
+class ResultQuery:
+    """Filtered, sorted View Results row source with keyset pagination.
+    
+    Rows are (full_name, std_id, roll_no, subject, marks, semester,
+    exam_type). Pages after the first are fetched with a row-value
+    comparison against the previous page's last row instead of OFFSET, so
+    scrolling deep into a large table costs the same as the first page.
+    With as_of_seq the rows are read from that point in the history
+    (see snapshot_sql) instead of the results table. count() also notes
+    the history seq it reflects, so a change feed can keep it current
+    with adjust_count() instead of counting again.
+    """
+    
+    SORT_COLUMNS = ["u.full_name", "r.std_id", "r.roll_no", "r.subject",
+                    "r.marks", "r.semester", "r.exam_type"]
+    KEY_COLUMNS = ["r.std_id", "r.subject", "r.semester", "r.exam_type"]
+    
+    def __init__(self, subject=None, semester=None, exam_type=None, pool=None, as_of_seq=None):
+        self.pool = pool
+        self.sort_index = 2  # roll_no
+        self.descending = False
+        self.subject = subject
+        self.semester = semester
+        self.exam_type = exam_type
+        self.as_of_seq = as_of_seq
+        self.seq = None
+        self._count = None
+        if as_of_seq is not None:
+            # The snapshot subquery applies the filters itself
+            table, self.params = snapshot_sql(as_of_seq, subject, semester, exam_type)
+            self.table = table + " r"
+            self.where = "WHERE TRUE"
+            return
+        self.table = "results r"
+        self.where = "WHERE r.deleted_at IS NULL"
+        self.params = []
+        if subject is not None:
+            self.where += " AND r.subject = ?"
+            self.params.append(subject)
+        if semester is not None:
+            self.where += " AND r.semester = ?"
+            self.params.append(semester)
+        if exam_type is not None:
+            self.where += " AND r.exam_type = ?"
+            self.params.append(exam_type)
+    
+    def _connection(self):
+        return (self.pool or get_pool()).connection()
+    
+    def clone(self):
+        """Copy with the same filter and sort, e.g. for streaming on another thread."""
+        other = copy.copy(self)
+        other.params = list(self.params)
+        return other
+    
+    def sort(self, column_index, descending=False):
+        self.sort_index = column_index
+        self.descending = descending
+        return True
+    
+    def key(self, row):
+        return (row[1], row[3], row[5], row[6])
+    
+    def matches(self, subject, semester, exam_type):
+        return ((self.subject is None or subject == self.subject) and
+                (self.semester is None or semester == self.semester) and
+                (self.exam_type is None or exam_type == self.exam_type))
+    
+    def moves(self, change):
+        """Whether a history_after() change can move a row within this query's order.
         
-        # Students - using default password pattern: student123
-        students = [
-            ('student1', 'student123', 'student', 'Alice Johnson'),
-            ('student2', 'student123', 'student', 'Bob Wilson'),
-            ('student3', 'student123', 'student', 'Carol White'),
-            ('student4', 'student123', 'student', 'David Brown'),
-            ('student5', 'student123', 'student', 'Eva Green')
-        ]
+        True for an added row, or for an update to the value sorted on;
+        a deleted row leaves the rest in order.
+        """
+        _, std_id, name, roll_no, subject, marks, semester, exam_type, previous = change
+        if marks is None or not self.matches(subject, semester, exam_type):
+            return False
+        if previous is None:
+            return True
+        row = (name, std_id, roll_no, subject, marks, semester, exam_type)
+        old = (name, std_id, previous[1], subject, previous[0], semester, exam_type)
+        return row[self.sort_index] != old[self.sort_index]
+    
+    def _sort_key(self, row):
+        return (row[self.sort_index], row[1], row[3], row[5], row[6])
+    
+    def count(self):
+        if self._count is None:
+            # One statement, so the count and seq come from the same snapshot
+            with self._connection() as conn:
+                self._count, self.seq = conn.execute(f'''
+                SELECT COUNT(*), (SELECT COALESCE(MAX(seq), 0) FROM results_history)
+                FROM {self.table}
+                JOIN users u ON r.std_id = u.username
+                {self.where}
+                ''', self.params).fetchone()
+        return self._count
+    
+    def adjust_count(self, delta, seq):
+        """Account for rows added (delta > 0) or removed by the changes up to history seq."""
+        if self._count is not None:
+            self._count += delta
+            self.seq = seq
+    
+    def _select(self):
+        return f'''
+        SELECT u.full_name, r.std_id, r.roll_no, r.subject, r.marks, r.semester, r.exam_type
+        FROM {self.table}
+        JOIN users u ON r.std_id = u.username
+        {self.where}
+        '''
+    
+    def _order_by(self):
+        columns = [self.SORT_COLUMNS[self.sort_index]] + self.KEY_COLUMNS
+        direction = "DESC" if self.descending else "ASC"
+        return " ORDER BY " + ", ".join(f"{column} {direction}" for column in columns)
+    
+    def fetch(self, offset, limit, after=None):
+        """Return `limit` rows starting at `offset`, or just after row `after`."""
+        columns = [self.SORT_COLUMNS[self.sort_index]] + self.KEY_COLUMNS
+        query = self._select()
+        params = list(self.params)
+        if after is not None:
+            operator = "<" if self.descending else ">"
+            query += f" AND ({', '.join(columns)}) {operator} ({', '.join('?' * len(columns))})"
+            params.extend(self._sort_key(after))
+        query += self._order_by()
+        query += " LIMIT ?"
+        params.append(limit)
+        if after is None and offset:
+            query += " OFFSET ?"
+            params.append(offset)
+        with self._connection() as conn:
+            return conn.execute(query, params).fetchall()
+    
+    def iter_rows(self, batch_size=5000):
+        """Stream every row in sort order from one cursor, batch_size rows at a time."""
+        with self._connection() as conn:
+            cursor = conn.execute(self._select() + self._order_by(), self.params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+    
+    def invalidate(self):
+        self._count = None
+
+
+def _filter_sql(subject=None, semester=None, exam_type=None):
+    where = ""
+    params = []
+    if subject is not None:
+        where += " AND subject = ?"
+        params.append(subject)
+    if semester is not None:
+        where += " AND semester = ?"
+        params.append(semester)
+    if exam_type is not None:
+        where += " AND exam_type = ?"
+        params.append(exam_type)
+    return where, params
+
+
+def save_results(conn, rows):
+    """Insert or update result rows in one batch and create accounts for new students.
+    
+    rows are (std_id, student_name, roll_no, subject, marks, semester,
+    exam_type, added_by); returns the number of accounts created. A stored
+    result is only rewritten (and logged in results_history) when its
+    values change.
+    """
+    # A soft-deleted result with the same key is replaced outright
+    conn.executemany('''
+    DELETE FROM results
+    WHERE std_id = ? AND subject = ? AND semester = ? AND exam_type = ? AND deleted_at IS NOT NULL
+    ''', [(row[0], row[3], row[5], row[6]) for row in rows])
+    conn.executemany('''
+    INSERT INTO results 
+    (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (std_id, subject, semester, exam_type) DO UPDATE SET
+        student_name = excluded.student_name,
+        roll_no = excluded.roll_no,
+        marks = excluded.marks,
+        added_by = excluded.added_by,
+        added_at = CURRENT_TIMESTAMP
+    WHERE marks IS NOT excluded.marks
+       OR student_name IS NOT excluded.student_name
+       OR roll_no IS NOT excluded.roll_no
+    ''', rows)
+    
+    # Student accounts use std_id as the username and the default password
+    names = {}
+    for std_id, student_name, *_ in rows:
+        names.setdefault(std_id, student_name)
+    cursor = conn.executemany('''
+    INSERT INTO users (username, password, role, full_name)
+    SELECT ?, 'student123', 'student', ?
+    WHERE NOT EXISTS (SELECT 1 FROM users WHERE username = ?)
+    ''', [(std_id, name, std_id) for std_id, name in names.items()])
+    return cursor.rowcount
+
+
+def class_marks(conn, semester, exam_type):
+    """Return [(std_id, student_name, roll_no, {subject: marks})] for a semester's students.
+    
+    Every student with a result in the semester gets a row; marks holds
+    their results for exam_type only, so missing cells show what is
+    still to be entered.
+    """
+    students = {}
+    for std_id, student_name, roll_no, subject, exam, marks in conn.execute('''
+        SELECT std_id, student_name, roll_no, subject, exam_type, marks
+        FROM results
+        WHERE semester = ? AND deleted_at IS NULL
+        ORDER BY roll_no, std_id
+    ''', (semester,)):
+        student = students.setdefault(std_id, (std_id, student_name, roll_no, {}))
+        if exam == exam_type:
+            student[3][subject] = marks
+    return list(students.values())
+
+
+def delete_results(conn, keys=None, soft=False, subject=None, semester=None, exam_type=None):
+    """Delete results in one statement; returns the number of rows deleted.
+    
+    With keys, deletes those (std_id, subject, semester, exam_type) results
+    through a temporary key table; otherwise deletes every result matching
+    the filters (e.g. semester=3, exam_type="IA1"). soft=True only stamps
+    deleted_at, which hides the rows at once and leaves the physical
+    delete to purge_deleted().
+    """
+    if soft:
+        statement = "UPDATE results SET deleted_at = CURRENT_TIMESTAMP WHERE deleted_at IS NULL"
+    else:
+        statement = "DELETE FROM results WHERE deleted_at IS NULL"
+    
+    if keys is not None:
+        conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS delete_keys (
+            std_id TEXT, subject TEXT, semester INTEGER, exam_type TEXT,
+            PRIMARY KEY (std_id, subject, semester, exam_type)
+        ) WITHOUT ROWID
+        ''')
+        conn.execute("DELETE FROM delete_keys")
+        conn.executemany("INSERT OR IGNORE INTO delete_keys VALUES (?, ?, ?, ?)", keys)
+        cursor = conn.execute(statement + '''
+        AND (std_id, subject, semester, exam_type) IN
+            (SELECT std_id, subject, semester, exam_type FROM delete_keys)
+        ''')
+        conn.execute("DELETE FROM delete_keys")
+    else:
+        where, params = _filter_sql(subject, semester, exam_type)
+        cursor = conn.execute(statement + where, params)
+    return cursor.rowcount
+
+
+def purge_deleted(conn, batch_size=5000):
+    """Physically remove soft-deleted results, then return the freed pages.
+    
+    Rows go in short batches, each committed on its own, so the purge
+    never holds the write lock for long. Returns the number of rows purged.
+    """
+    purged = 0
+    while True:
+        cursor = conn.execute('''
+        DELETE FROM results WHERE rowid IN
+            (SELECT rowid FROM results WHERE deleted_at IS NOT NULL LIMIT ?)
+        ''', (batch_size,))
+        conn.commit()
+        purged += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            break
+    
+    if purged:
+        # A no-op on databases created before incremental vacuum, until
+        # compact_database() has switched them over.
+        # Through executescript: sqlite3's execute() steps a statement without
+        # result rows only once, and each step frees a single page
+        conn.executescript("PRAGMA incremental_vacuum;")
+    return purged
+
+
+def compact_database(conn):
+    """Switch a database created before incremental vacuum over to it.
+    
+    Takes one full VACUUM, which rewrites the whole file under an exclusive
+    lock, so it is only run on request (never from a purge). Returns False
+    when the database already uses incremental vacuum.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+def initialize_database():
+    with connection() as conn:
+        migrate(conn)
+        cursor = conn.cursor()
+    
+        # Insert sample users if empty
+        cursor.execute("SELECT COUNT(*) FROM users")
+        if cursor.fetchone()[0] == 0:
+            # Teachers
+            teachers = [
+                ('admin', 'admin123', 'teacher', 'Administrator'),
+                ('john', 'john123', 'teacher', 'John Smith')
+            ]
+        
+            # Students - using default password pattern: student123
+            students = [
+                ('student1', 'student123', 'student', 'Alice Johnson'),
+                ('student2', 'student123', 'student', 'Bob Wilson'),
+                ('student3', 'student123', 'student', 'Carol White'),
+                ('student4', 'student123', 'student', 'David Brown'),
+                ('student5', 'student123', 'student', 'Eva Green')
+            ]
         
-        # Insert all users
-        cursor.executemany('INSERT INTO users (username, password, role, full_name) VALUES (?,?,?,?)', 
-                         teachers + students)
+            # Insert all users
+            cursor.executemany('INSERT INTO users (username, password, role, full_name) VALUES (?,?,?,?)', 
+                             teachers + students)
         
-        # Add some sample results
-        sample_results = []
-        subjects = ['MATHS4', 'OS', 'CNND', 'COA', 'AT']
+            # Add some sample results
+            sample_results = []
+            subjects = SUBJECTS_BY_SEM[4]
         
-        # Generate sample results for each student
-        for student in students:
-            for subject in subjects:
-                sample_results.append((
-                    student[0],  # std_id (username)
-                    student[3],  # student_name (full_name)
-                    f"R{student[0][-1]}",  # roll_no (R1, R2, etc.)
-                    subject,
-                    75,  # default mark
-                    'admin'  # added by admin
-                ))
+            # Generate sample results for each student
+            for student in students:
+                for subject in subjects:
+                    sample_results.append((
+                        student[0],  # std_id (username)
+                        student[3],  # student_name (full_name)
+                        f"R{student[0][-1]}",  # roll_no (R1, R2, etc.)
+                        subject,
+                        75,  # default mark
+                        4,  # semester
+                        'SEM',  # exam type
+                        'admin'  # added by admin
+                    ))
         
-        # Insert sample results
-        cursor.executemany('''
-        INSERT INTO results (std_id, student_name, roll_no, subject, marks, added_by)
-        VALUES (?,?,?,?,?,?)
-        ''', sample_results)
-    
-    conn.commit()
-    conn.close()
\ No newline at end of file
+            # Insert sample results
+            cursor.executemany('''
+            INSERT INTO results (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by)
+            VALUES (?,?,?,?,?,?,?,?)
+            ''', sample_results)
+
@@ -0,0 +1,35 @@
+import csv
+import gzip
+
+# Rows written between progress callbacks
+PROGRESS_EVERY = 10000
+
+
+def open_export(path):
+    """Open path for CSV writing, gzip-compressed when it ends in .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', newline='', compresslevel=6)
+    return open(path, 'w', newline='')
+
+
+def write_csv(path, headers, rows, preamble=(), progress=None):
+    """Stream rows into a CSV file and return how many were written.
+
+    rows may be any iterator (e.g. ResultQuery.iter_rows()), so memory use
+    does not depend on the number of rows. preamble rows are written after
+    the header line, before the data. progress(count) is called every
+    PROGRESS_EVERY rows and once at the end.
+    """
+    count = 0
+    with open_export(path) as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        writer.writerows(preamble)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if progress and count % PROGRESS_EVERY == 0:
+                progress(count)
+    if progress:
+        progress(count)
+    return count
@@ -0,0 +1,452 @@
+import csv
+import locale
+import os
+import random
+import time
+
+from background import process_pool
+from database import EXAM_TYPES, SUBJECTS_BY_SEM, SUBJECTS, get_pool
+
+REQUIRED_COLUMNS = ['std_id', 'student_name', 'roll_no', 'subject', 'marks', 'semester', 'exam_type']
+
+# Files larger than this are validated across a process pool
+PARALLEL_VALIDATION_BYTES = 4 * 1024 * 1024
+
+
+class ImportResult:
+    """Outcome of a bulk import.
+
+    inserted, updated and unchanged count distinct result keys; a key the
+    file repeats is counted once, with its last line.
+    """
+
+    def __init__(self, rows=0, accounts_created=0, seconds=0.0,
+                 inserted=0, updated=0, unchanged=0):
+        self.rows = rows
+        self.accounts_created = accounts_created
+        self.seconds = seconds
+        self.inserted = inserted
+        self.updated = updated
+        self.unchanged = unchanged
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def changed(self):
+        return self.inserted + self.updated + self.accounts_created > 0
+
+    def summary(self):
+        return (f"Imported {self.rows} rows in {self.seconds:.2f} s "
+                f"({self.rows_per_second:,.0f} rows/s): "
+                f"{self.inserted} new, {self.updated} updated, {self.unchanged} unchanged; "
+                f"{self.accounts_created} student accounts created")
+
+
+def row_errors(row):
+    """Return every (column, reason) problem with a row ordered as REQUIRED_COLUMNS."""
+    std_id, student_name, roll_no, subject, marks, semester, exam_type = row
+    errors = []
+
+    # Validate student information
+    for column, value in (('std_id', std_id), ('student_name', student_name), ('roll_no', roll_no)):
+        if not value.strip():
+            errors.append((column, f"Missing {column}"))
+
+    # Validate semester
+    try:
+        semester = int(semester)
+    except ValueError:
+        errors.append(('semester', f"Invalid semester: {semester}"))
+        semester = None
+    else:
+        if semester not in SUBJECTS_BY_SEM:
+            errors.append(('semester', f"Invalid semester: {semester}"))
+            semester = None
+
+    # Validate exam_type
+    if exam_type not in EXAM_TYPES:
+        errors.append(('exam_type', f"Invalid exam type: {exam_type}"))
+
+    # Validate subject, and that it is taught in the given semester
+    if subject not in SUBJECTS:
+        errors.append(('subject', f"Invalid subject: {subject}. Must be one of: {', '.join(SUBJECTS)}"))
+    elif semester is not None and subject not in SUBJECTS_BY_SEM[semester]:
+        errors.append(('subject', f"Subject {subject} is not taught in semester {semester}"))
+
+    # Validate marks
+    try:
+        value = float(marks)
+    except ValueError:
+        errors.append(('marks', f"Invalid marks: {marks}"))
+    else:
+        if not (0 <= value <= 100):
+            errors.append(('marks', f"Invalid marks: {value}"))
+
+    return errors
+
+
+def validate_row(row):
+    """Return (std_id, student_name, roll_no, subject, marks, semester, exam_type) or raise ValueError."""
+    errors = row_errors(row)
+    if errors:
+        raise ValueError("; ".join(reason for _, reason in errors))
+    std_id, student_name, roll_no, subject, marks, semester, exam_type = row
+    return (std_id, student_name, roll_no, subject, float(marks), int(semester), exam_type)
+
+
+def validate_chunk(chunk):
+    """Validate a list of (line, row) pairs; returns (row_count, [(line, column, value, reason)])."""
+    errors = []
+    for line, row in chunk:
+        for column, reason in row_errors(row):
+            errors.append((line, column, row[REQUIRED_COLUMNS.index(column)], reason))
+    return len(chunk), errors
+
+
+class ValidationReport:
+    """Every problem found in an import file, one entry per (line, column)."""
+
+    COLUMNS = ['line', 'column', 'value', 'reason']
+
+    def __init__(self):
+        self.rows = 0
+        self.errors = []
+        self.seconds = 0.0
+        self.workers = 1
+
+    def add(self, row_count, errors):
+        self.rows += row_count
+        self.errors.extend(errors)
+
+    @property
+    def error_lines(self):
+        return frozenset(line for line, *_ in self.errors)
+
+    @property
+    def valid_rows(self):
+        return self.rows - len(self.error_lines)
+
+    def write(self, path):
+        """Write the errors as CSV (line, column, value, reason)."""
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(self.COLUMNS)
+            writer.writerows(sorted(self.errors))
+
+    def summary(self):
+        return (f"{self.rows} rows checked in {self.seconds:.2f} s: "
+                f"{self.valid_rows} valid, {len(self.error_lines)} invalid")
+
+
+def _chunks(rows, size):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_file(file_path, workers=None, chunk_size=20000):
+    """Check every row of a CSV file and return a ValidationReport.
+
+    Large files are split into chunks validated by a process pool, with
+    only a few chunks in flight at a time so memory stays bounded; the
+    reader itself stays in this process. Header problems raise ValueError.
+    """
+    report = ValidationReport()
+    start = time.perf_counter()
+    if workers is None:
+        parallel = os.path.getsize(file_path) > PARALLEL_VALIDATION_BYTES
+        workers = (os.cpu_count() or 1) if parallel else 1
+
+    with open(file_path, 'r', newline='') as file:
+        chunks = _chunks(read_csv_rows(file), chunk_size)
+        if workers <= 1:
+            for chunk in chunks:
+                report.add(*validate_chunk(chunk))
+        else:
+            with process_pool(workers) as pool:
+                pending = []
+                for chunk in chunks:
+                    pending.append(pool.submit(validate_chunk, chunk))
+                    if len(pending) >= workers * 2:
+                        report.add(*pending.pop(0).result())
+                for future in pending:
+                    report.add(*future.result())
+            report.workers = workers
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def read_csv_rows(file):
+    """Yield (line, row) with row ordered as REQUIRED_COLUMNS, from an open CSV file."""
+    reader = csv.reader(file)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("CSV file is empty")
+    header = [column.strip() for column in header]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing_columns:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing_columns)}")
+    indexes = [header.index(col) for col in REQUIRED_COLUMNS]
+    for line, record in enumerate(reader, start=2):
+        if not record:
+            continue
+        if len(record) < len(header):
+            # Short rows read as empty values and fail validation
+            record = record + [''] * (len(header) - len(record))
+        yield line, [record[i] for i in indexes]
+
+
+def count_rows(file_path, buffer_size=1024 * 1024):
+    """Fast data row count from a buffered newline scan (quoted newlines count twice)."""
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as file:
+        while True:
+            block = file.read(buffer_size)
+            if not block:
+                break
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1  # final line without a newline
+    return max(0, lines - 1)
+
+
+def sample_rows(file_path, skip=0, size=200, seed=None):
+    """Reservoir sample of `size` (line, record) pairs from the data rows after the first `skip`."""
+    rng = random.Random(seed)
+    sample = []
+    with open(file_path, 'r', newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        seen = 0
+        for line, record in enumerate(reader, start=2):
+            if line - 2 < skip or not record:
+                continue
+            seen += 1
+            if len(sample) < size:
+                sample.append((line, record))
+            else:
+                slot = rng.randrange(seen)
+                if slot < size:
+                    sample[slot] = (line, record)
+    sample.sort()
+    return sample
+
+
+class CsvFileSource:
+    """VirtualTreeview row source that reads a CSV file page by page.
+
+    Only the header is read up front. Pages are parsed on demand and the
+    byte offset of each page start is remembered, so scrolling back (or
+    to a page already passed) seeks straight to it instead of re-reading
+    the file from the top. count() is the fast newline estimate.
+    """
+
+    def __init__(self, file_path, page_size=200):
+        self.file_path = file_path
+        self.page_size = page_size
+        self.encoding = locale.getpreferredencoding(False)
+        with open(file_path, 'rb') as file:
+            header_line = file.readline()
+            self._offsets = {0: file.tell()}
+        self.header = next(csv.reader([header_line.decode(self.encoding)]), [])
+        self.header = [column.strip() for column in self.header]
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = count_rows(self.file_path)
+        return self._count
+
+    def key(self, row):
+        return tuple(row)
+
+    def sort(self, column_index, descending=False):
+        # Rows are shown in file order
+        return False
+
+    def _lines(self, file, position):
+        # Decoded lines for csv.reader, tracking the offset consumed so far
+        for raw in file:
+            position[0] += len(raw)
+            yield raw.decode(self.encoding)
+
+    def fetch(self, offset, limit, after=None):
+        page = offset // self.page_size
+        # A copy: another page may be read on a worker thread meanwhile
+        known = max(number for number in list(self._offsets) if number <= page)
+        with open(self.file_path, 'rb') as file:
+            position = [self._offsets[known]]
+            file.seek(position[0])
+            reader = csv.reader(self._lines(file, position))
+            number = known
+            rows = []
+            for record in reader:
+                if not record:
+                    continue
+                rows.append(record)
+                if len(rows) == self.page_size:
+                    number += 1
+                    self._offsets[number] = position[0]
+                    if number > page:
+                        break
+                    rows = []
+        if number <= page:
+            # Ran off the end of the file
+            rows = rows if number == page else []
+        start = offset - page * self.page_size
+        return rows[start:start + limit]
+
+    def iter_rows(self):
+        with open(self.file_path, 'r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for record in reader:
+                if record:
+                    yield record
+
+    def invalidate(self):
+        self._count = None
+
+
+class CsvImporter:
+    """Streaming bulk loader for result CSV files.
+
+    Rows are read and validated in chunks and appended to a temporary
+    staging table with executemany. Once the whole file is staged, new and
+    changed results are upserted and missing student accounts created with
+    one set-based statement each, all inside a single transaction, so an
+    invalid row leaves the database untouched. Results that already hold
+    the same values are not rewritten. Memory use is bounded by chunk_size.
+    """
+
+    STAGING_TABLE = "import_staging"
+
+    def __init__(self, added_by, pool=None, chunk_size=5000, progress=None):
+        self.added_by = added_by
+        self.pool = pool
+        self.chunk_size = chunk_size
+        self.progress = progress
+
+    def _stage(self, conn, rows, skip_lines):
+        conn.execute(f'''
+        CREATE TEMP TABLE IF NOT EXISTS {self.STAGING_TABLE} (
+            line INTEGER PRIMARY KEY,
+            std_id TEXT NOT NULL,
+            student_name TEXT NOT NULL,
+            roll_no TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            marks REAL NOT NULL,
+            semester INTEGER NOT NULL,
+            exam_type TEXT NOT NULL
+        )
+        ''')
+        conn.execute(f"DELETE FROM {self.STAGING_TABLE}")
+        insert = f"INSERT INTO {self.STAGING_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+        staged = 0
+        chunk = []
+        for line, row in rows:
+            if line in skip_lines:
+                continue
+            try:
+                chunk.append((line,) + validate_row(row))
+            except ValueError as e:
+                raise ValueError(f"Error processing row {line} for {row[0]}: {str(e)}") from e
+            if len(chunk) >= self.chunk_size:
+                conn.executemany(insert, chunk)
+                staged += len(chunk)
+                chunk = []
+                if self.progress:
+                    self.progress(staged)
+        if chunk:
+            conn.executemany(insert, chunk)
+            staged += len(chunk)
+            if self.progress:
+                self.progress(staged)
+        return staged
+
+    def _apply(self, conn):
+        """Write the staged rows that differ from the stored results.
+
+        Returns (inserted, updated, unchanged, accounts_created). Rows whose
+        marks, name and roll number already match are left alone, so
+        re-importing an unchanged file writes nothing.
+        """
+        # Later lines win when the file repeats a result key; SQLite takes
+        # the bare columns from the row holding MAX(line)
+        latest = f'''
+        SELECT std_id, student_name, roll_no, subject, marks, semester, exam_type, MAX(line)
+        FROM {self.STAGING_TABLE}
+        GROUP BY std_id, subject, semester, exam_type
+        '''
+        staged, inserted, updated = conn.execute(f'''
+        SELECT COUNT(*),
+               COALESCE(SUM(r.std_id IS NULL), 0),
+               COALESCE(SUM(r.std_id IS NOT NULL AND (r.marks IS NOT s.marks
+                                                      OR r.student_name IS NOT s.student_name
+                                                      OR r.roll_no IS NOT s.roll_no)), 0)
+        FROM ({latest}) s
+        LEFT JOIN results r
+          ON r.std_id = s.std_id AND r.subject = s.subject AND r.semester = s.semester
+         AND r.exam_type = s.exam_type AND r.deleted_at IS NULL
+        ''').fetchone()
+
+        # A soft-deleted result the file brings back is replaced, as before
+        conn.execute(f'''
+        DELETE FROM results
+        WHERE deleted_at IS NOT NULL
+          AND (std_id, subject, semester, exam_type) IN
+              (SELECT std_id, subject, semester, exam_type FROM {self.STAGING_TABLE})
+        ''')
+        # WHERE true: an upsert's SELECT needs a WHERE clause to parse
+        if inserted or updated:
+            conn.execute(f'''
+            INSERT INTO results
+            (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by)
+            SELECT std_id, student_name, roll_no, subject, marks, semester, exam_type, ?
+            FROM ({latest}) WHERE true
+            ON CONFLICT (std_id, subject, semester, exam_type) DO UPDATE SET
+                marks = excluded.marks,
+                student_name = excluded.student_name,
+                roll_no = excluded.roll_no,
+                added_by = excluded.added_by,
+                added_at = CURRENT_TIMESTAMP
+            WHERE marks IS NOT excluded.marks
+               OR student_name IS NOT excluded.student_name
+               OR roll_no IS NOT excluded.roll_no
+            ''', (self.added_by,))
+
+        # One account per new std_id, named after its first row in the file
+        cursor = conn.execute(f'''
+        INSERT INTO users (username, password, role, full_name)
+        SELECT std_id, 'student123', 'student', student_name
+        FROM (SELECT std_id, student_name, MIN(line) FROM {self.STAGING_TABLE} GROUP BY std_id) s
+        WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.username = s.std_id)
+        ''')
+        accounts_created = cursor.rowcount
+        conn.execute(f"DELETE FROM {self.STAGING_TABLE}")
+        return inserted, updated, staged - inserted - updated, accounts_created
+
+    def import_rows(self, rows, skip_lines=frozenset()):
+        """Import (line, row) pairs, leaving out skip_lines; returns an ImportResult."""
+        start = time.perf_counter()
+        with (self.pool or get_pool()).connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            staged = self._stage(conn, rows, skip_lines)
+            inserted, updated, unchanged, accounts_created = self._apply(conn)
+        return ImportResult(staged, accounts_created, time.perf_counter() - start,
+                            inserted, updated, unchanged)
+
+    def import_file(self, file_path, skip_lines=frozenset()):
+        """Import a CSV file; pass a ValidationReport's error_lines to accept only the valid rows."""
+        with open(file_path, 'r', newline='') as file:
+            return self.import_rows(read_csv_rows(file), skip_lines)
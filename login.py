@@ -1,15 +1,44 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
+import importlib
 import sqlite3
 import os
-from database import initialize_database
-from teacher_dashboard import TeacherDashboard
-from student_dashboard import StudentDashboard
+import threading
+from database import initialize_database, connection
+from assets import scaled_photo
+from widgets import release_variables
+
+# The dashboards (and matplotlib/seaborn/reportlab behind them) are imported
+# on first login, not before the login window paints. While the window sits
+# idle, the heavy libraries for the selected role are imported on a background
+# thread. Only ones that never touch Tk: the dashboards and the Tk canvas
+# backend are left for the Tk thread.
+PREWARM_MODULES = {
+    "teacher": ["reportlab", "reportlab.platypus"],
+    "student": ["matplotlib", "matplotlib.figure"],
+}
+PREWARM_DELAY_MS = 300
+
+
+def prewarm(role):
+    """Import the modules a role's dashboard needs on a daemon thread."""
+    threading.Thread(target=_import_modules, args=(PREWARM_MODULES[role],),
+                     name=f"srms-prewarm-{role}", daemon=True).start()
+
+
+def _import_modules(names):
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # The real import on login reports the problem
+            return
+
 
 class LoginWindow:
-    def __init__(self, root):
-        self.root = root
+    def __init__(self, master, shell, prewarm_modules=True):
+        self.root = master.winfo_toplevel()
+        self.shell = shell
         self.root.title("Student Result System - Login")
         self.root.geometry("500x400")
         self.root.resizable(False, False)
@@ -19,14 +48,13 @@ class LoginWindow:
         
         # Background Image (optional)
         if os.path.exists("login_bg.jpg"):
-            image = Image.open("login_bg.jpg")
-            image = image.resize((500, 400), Image.Resampling.LANCZOS)
-            self.bg_image = ImageTk.PhotoImage(image)
-            bg_label = tk.Label(root, image=self.bg_image)
+            # Scaled once and cached as a PNG Tk can load directly
+            self.bg_image = scaled_photo("login_bg.jpg", (500, 400), master=master)
+            bg_label = tk.Label(master, image=self.bg_image)
             bg_label.place(x=0, y=0, relwidth=1, relheight=1)
         
         # Login Frame
-        login_frame = tk.Frame(root, bg="#E6E6FA", padx=20, pady=20)  # Light purple background
+        login_frame = tk.Frame(master, bg="#E6E6FA", padx=20, pady=20)  # Light purple background
         login_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
         
         # Title
@@ -59,7 +87,20 @@ class LoginWindow:
         style.configure("Custom.TButton", background="#FF69B4", foreground="#4B0082")
         ttk.Button(login_frame, text="Login", command=self.authenticate, style="Custom.TButton").grid(row=6, column=0, columnspan=2, pady=10)
         
-       
+        # Warm up the selected role's dashboard once the window has painted
+        self.prewarmed = set()
+        if prewarm_modules:
+            self.root.after(PREWARM_DELAY_MS, self.prewarm_role)
+            self.role_var.trace_add('write', self.prewarm_role)
+    
+    def close(self, wait=False):
+        release_variables(self)
+    
+    def prewarm_role(self, *args):
+        role = self.role_var.get()
+        if role not in self.prewarmed:
+            self.prewarmed.add(role)
+            prewarm(role)
     
     def authenticate(self):
         username = self.username_entry.get().strip()
@@ -71,51 +112,33 @@ class LoginWindow:
             return
         
         try:
-            conn = sqlite3.connect('student_results.db')
-            cursor = conn.cursor()
-            
             # First check if user exists with given role
-            cursor.execute('''
-            SELECT id, username, password, role, full_name 
-            FROM users 
-            WHERE username = ? AND role = ?
-            ''', (username, role))
-            
-            user = cursor.fetchone()
+            with connection() as conn:
+                user = conn.execute('''
+                SELECT id, username, password, role, full_name 
+                FROM users 
+                WHERE username = ? AND role = ?
+                ''', (username, role)).fetchone()
             
             if not user:
                 messagebox.showerror("Error", f"No {role} account found with this username!")
-                conn.close()
                 return
             
             # Then verify password
             if user[2] != password:  # user[2] is password
                 messagebox.showerror("Error", "Incorrect password!")
-                conn.close()
                 return
             
             # If we get here, authentication is successful
             messagebox.showinfo("Success", f"Welcome, {user[4]}!")
-            conn.close()
-            
-            self.root.destroy()  # Close login window
             
-            # Open appropriate dashboard
-            root = tk.Tk()
-            if role == "teacher":
-                app = TeacherDashboard(root, username)
-            else:
-                app = StudentDashboard(root, username)
-            root.mainloop()
+            # Replace the login window with the appropriate dashboard
+            self.shell.open_dashboard(role, username)
             
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to authenticate: {str(e)}")
-            if 'conn' in locals():
-                conn.close()
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
-            if 'conn' in locals():
-                conn.close()
 
     def toggle_password_visibility(self):
         if self.show_password_var.get():
@@ -124,6 +147,5 @@ class LoginWindow:
             self.password_entry.config(show="*")
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = LoginWindow(root)
-    root.mainloop()
\ No newline at end of file
+    from app import main
+    main()
\ No newline at end of file
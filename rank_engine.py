@@ -0,0 +1,361 @@
+import threading
+from bisect import bisect_left, insort
+
+from database import EXAM_TYPES, SUBJECTS_BY_SEM, connection, snapshot_sql
+
+# Scores are stored as integer hundredths so fractional marks stay exact
+SCORE_SCALE = 100
+
+
+class FenwickTree:
+    """Binary indexed tree of counts supporting prefix sums and k-th lookups."""
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.top_bit = 1 << size.bit_length()
+
+    def add(self, position, delta):
+        # position is 1-based
+        while position <= self.size:
+            self.tree[position] += delta
+            position += position & -position
+
+    def prefix(self, position):
+        """Sum of counts at positions 1..position."""
+        total = 0
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+    def find(self, k):
+        """Smallest position whose prefix sum exceeds k (k is 0-based)."""
+        position = 0
+        step = self.top_bit
+        while step:
+            candidate = position + step
+            if candidate <= self.size and self.tree[candidate] <= k:
+                position = candidate
+                k -= self.tree[candidate]
+            step >>= 1
+        return position + 1
+
+
+class RankEngine:
+    """Incremental rank list for one (semester, exam_type, subject) filter.
+
+    Each ranked entry is a (std_id, semester) group whose score is the sum
+    of its marks inside the filter. Scores are counted in a Fenwick tree
+    indexed from highest to lowest score, so a student's rank, the k-th
+    entry and any page of the list are found in O(log D) for a score
+    domain of D slots. Entries that share a score are ordered by std_id.
+    """
+
+    def __init__(self, semester=None, exam_type=None, subject=None):
+        self.semester = semester
+        self.exam_type = exam_type
+        self.subject = subject
+
+        subjects_per_sem = max(len(subjects) for subjects in SUBJECTS_BY_SEM.values())
+        subjects = 1 if subject is not None else subjects_per_sem
+        exams = 1 if exam_type is not None else len(EXAM_TYPES)
+        self.max_key = 100 * subjects * exams * SCORE_SCALE
+
+        self._counts = FenwickTree(self.max_key + 1)
+        self._distinct = FenwickTree(self.max_key + 1)
+        self._buckets = {}   # score key -> sorted [(std_id, semester)]
+        self._cells = {}     # (std_id, semester) -> {(subject, exam_type): marks}
+        self._scores = {}    # ranked (std_id, semester) -> score key
+        self._students = {}  # std_id -> (full_name, roll_no)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def matches(self, subject, semester, exam_type):
+        return ((self.subject is None or subject == self.subject) and
+                (self.semester is None or semester == self.semester) and
+                (self.exam_type is None or exam_type == self.exam_type))
+
+    def _position(self, key):
+        # Highest score maps to position 1
+        return self.max_key - key + 1
+
+    def _eligible(self, semester, cells):
+        if not cells:
+            return False
+        if self.subject is not None:
+            return True
+        # Ranked only once every subject of the semester is marked in each exam
+        required = len(SUBJECTS_BY_SEM.get(semester, ()))
+        per_exam = {}
+        for _, exam_type in cells:
+            per_exam[exam_type] = per_exam.get(exam_type, 0) + 1
+        return all(count == required for count in per_exam.values())
+
+    def _unrank(self, group):
+        key = self._scores.pop(group, None)
+        if key is None:
+            return
+        bucket = self._buckets[key]
+        del bucket[bisect_left(bucket, group)]
+        position = self._position(key)
+        self._counts.add(position, -1)
+        if not bucket:
+            del self._buckets[key]
+            self._distinct.add(position, -1)
+
+    def _rank(self, group):
+        cells = self._cells.get(group)
+        if not self._eligible(group[1], cells):
+            return
+        key = min(self.max_key, round(sum(cells.values()) * SCORE_SCALE))
+        bucket = self._buckets.get(key)
+        position = self._position(key)
+        if bucket is None:
+            bucket = self._buckets[key] = []
+            self._distinct.add(position, 1)
+        insort(bucket, group)
+        self._counts.add(position, 1)
+        self._scores[group] = key
+
+    def record(self, std_id, student_name, roll_no, subject, marks, semester, exam_type):
+        """Apply an inserted or replaced mark; returns True if it was in scope."""
+        if not self.matches(subject, semester, exam_type):
+            return False
+        with self._lock:
+            group = (std_id, semester)
+            self._unrank(group)
+            self._cells.setdefault(group, {})[(subject, exam_type)] = marks
+            self._students[std_id] = (student_name, roll_no)
+            self._rank(group)
+        return True
+
+    def remove(self, std_id, subject, semester, exam_type):
+        """Apply a deleted mark; returns True if it was in scope."""
+        if not self.matches(subject, semester, exam_type):
+            return False
+        with self._lock:
+            group = (std_id, semester)
+            cells = self._cells.get(group)
+            if cells is None or cells.pop((subject, exam_type), None) is None:
+                return False
+            self._unrank(group)
+            if cells:
+                self._rank(group)
+            else:
+                del self._cells[group]
+        return True
+
+    def _row(self, rank, group):
+        std_id, semester = group
+        cells = self._cells[group]
+        total = sum(cells.values())
+        if float(total).is_integer():
+            total = int(total)
+        name, roll_no = self._students.get(std_id, ("", ""))
+        return (rank, std_id, name, roll_no, total, round(total / len(cells), 1), semester)
+
+    def rank_of(self, std_id, semester, method="competition"):
+        """Rank of a student's group, or None if the student is not ranked.
+
+        method="competition" gives 1, 1, 3 for a tie; "dense" gives 1, 1, 2.
+        """
+        with self._lock:
+            key = self._scores.get((std_id, semester))
+            if key is None:
+                return None
+            ahead = self._position(key) - 1
+            if method == "dense":
+                return self._distinct.prefix(ahead) + 1
+            return self._counts.prefix(ahead) + 1
+
+    def _iter_from(self, offset, method):
+        # Yield rows in rank order starting at the given 0-based offset
+        total = len(self._scores)
+        if offset >= total:
+            return
+        position = self._counts.find(offset)
+        before = self._counts.prefix(position - 1)
+        distinct_before = self._distinct.prefix(position - 1)
+        skip = offset - before
+        while True:
+            bucket = self._buckets[self.max_key - position + 1]
+            rank = distinct_before + 1 if method == "dense" else before + 1
+            for group in bucket[skip:]:
+                yield self._row(rank, group)
+            before += len(bucket)
+            distinct_before += 1
+            if before >= total:
+                return
+            position = self._distinct.find(distinct_before)
+            skip = 0
+
+    def slice(self, offset, limit, method="competition"):
+        """`limit` rows of the rank list starting at 0-based `offset`."""
+        with self._lock:
+            rows = []
+            if limit <= 0:
+                return rows
+            for row in self._iter_from(offset, method):
+                rows.append(row)
+                if len(rows) == limit:
+                    break
+            return rows
+
+    def page(self, number, size, method="competition"):
+        """Rows of page `number` (0-based) of the rank list."""
+        return self.slice(number * size, size, method)
+
+    def top(self, k, method="competition"):
+        return self.page(0, k, method)
+
+    def rows(self, method="competition"):
+        """The complete rank list in order."""
+        with self._lock:
+            return list(self._iter_from(0, method))
+
+    def load(self, rows):
+        """Bulk load (std_id, student_name, roll_no, subject, marks, semester, exam_type) rows."""
+        with self._lock:
+            touched = set()
+            for std_id, student_name, roll_no, subject, marks, semester, exam_type in rows:
+                if not self.matches(subject, semester, exam_type):
+                    continue
+                group = (std_id, semester)
+                self._cells.setdefault(group, {})[(subject, exam_type)] = marks
+                self._students[std_id] = (student_name, roll_no)
+                touched.add(group)
+            for group in touched:
+                self._unrank(group)
+                self._rank(group)
+        return self
+
+
+def load_rank_engine(conn, semester=None, exam_type=None, subject=None, as_of_seq=None):
+    """Build a RankEngine for the given filter from the results table.
+
+    With as_of_seq the engine ranks the results as they were after that
+    history entry; such an engine is a one-off and is never kept current.
+    """
+    if as_of_seq is not None:
+        table, params = snapshot_sql(as_of_seq, subject, semester, exam_type)
+        query = f"""
+        SELECT r.std_id, COALESCE(u.full_name, ''), r.roll_no,
+               r.subject, r.marks, r.semester, r.exam_type
+        FROM {table} r
+        LEFT JOIN users u ON r.std_id = u.username
+        """
+        engine = RankEngine(semester, exam_type, subject)
+        return engine.load(conn.execute(query, params))
+
+    query = """
+    SELECT r.std_id, COALESCE(u.full_name, r.student_name), r.roll_no,
+           r.subject, r.marks, r.semester, r.exam_type
+    FROM results r
+    LEFT JOIN users u ON r.std_id = u.username
+    WHERE r.deleted_at IS NULL
+    """
+    params = []
+    if semester is not None:
+        query += " AND r.semester = ?"
+        params.append(semester)
+    if exam_type is not None:
+        query += " AND r.exam_type = ?"
+        params.append(exam_type)
+    if subject is not None:
+        query += " AND r.subject = ?"
+        params.append(subject)
+    engine = RankEngine(semester, exam_type, subject)
+    return engine.load(conn.execute(query, params))
+
+
+class RankEngineRegistry:
+    """Lazily loaded rank engines, one per filter, kept current by writes.
+
+    Writes made while an engine is loading are buffered and replayed on it
+    before it is published, so it misses none of them.
+    """
+
+    def __init__(self):
+        self._engines = {}
+        self._loading = []     # write buffers of the engines being loaded
+        self._generation = 0   # bumped by invalidate()
+        self._lock = threading.Lock()
+
+    def get(self, semester=None, exam_type=None, subject=None):
+        key = (semester, exam_type, subject)
+        buffer = []
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                return engine
+            generation = self._generation
+            self._loading.append(buffer)
+        try:
+            with connection() as conn:
+                engine = load_rank_engine(conn, semester, exam_type, subject)
+            while True:
+                with self._lock:
+                    writes, buffer[:] = buffer[:], []
+                    if not writes:
+                        self._loading.remove(buffer)
+                        if generation != self._generation:
+                            # Invalidated while loading: may have missed unbuffered changes
+                            return engine
+                        return self._engines.setdefault(key, engine)
+                # Replayed in the order they were made; writes arriving
+                # meanwhile are buffered for the next round
+                for method, args in writes:
+                    getattr(engine, method)(*args)
+        except BaseException:
+            with self._lock:
+                if buffer in self._loading:
+                    self._loading.remove(buffer)
+            raise
+
+    def _write(self, writes):
+        """Loaded engines to apply writes to; engines being loaded get them later."""
+        with self._lock:
+            for buffer in self._loading:
+                buffer.extend(writes)
+            return list(self._engines.values())
+
+    def record_results(self, rows):
+        """Apply (std_id, student_name, roll_no, subject, marks, semester, exam_type, ...) rows."""
+        writes = [('record', tuple(row[:7])) for row in rows]
+        self._apply(self._write(writes), writes)
+
+    def remove_results(self, keys):
+        """Apply deleted (std_id, subject, semester, exam_type) keys."""
+        writes = [('remove', tuple(key)) for key in keys]
+        self._apply(self._write(writes), writes)
+
+    def apply_changes(self, changes):
+        """Apply database.history_after() rows; repeating a change is harmless."""
+        writes = []
+        for _, std_id, name, roll_no, subject, marks, semester, exam_type, _ in changes:
+            if marks is None:
+                writes.append(('remove', (std_id, subject, semester, exam_type)))
+            else:
+                writes.append(('record', (std_id, name, roll_no, subject, marks, semester, exam_type)))
+        self._apply(self._write(writes), writes)
+
+    @staticmethod
+    def _apply(engines, writes):
+        for method, args in writes:
+            for engine in engines:
+                getattr(engine, method)(*args)
+
+    def invalidate(self):
+        with self._lock:
+            self._engines.clear()
+            self._generation += 1
+
+
+_registry = RankEngineRegistry()
+
+
+def get_rank_engines():
+    return _registry
@@ -0,0 +1,231 @@
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Image
+
+from background import process_pool
+from database import SUBJECTS_BY_SEM, grade_for, student_ranks
+from reports import ExportCancelled, report_styles
+
+# Same subject order as the student dashboard's performance graph
+CHART_SUBJECTS = SUBJECTS_BY_SEM[4] + SUBJECTS_BY_SEM[3]
+
+# Students rendered per task handed to a worker process
+CARDS_PER_TASK = 25
+
+
+class ReportCardResult:
+    """Outcome of a report card run."""
+
+    def __init__(self, cards, seconds, workers, output):
+        self.cards = cards
+        self.seconds = seconds
+        self.workers = workers
+        self.output = output
+
+    @property
+    def cards_per_second(self):
+        return self.cards / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (f"Generated {self.cards} report cards in {self.seconds:.1f}s "
+                f"({self.cards_per_second:,.1f} cards/s).\nSaved to: {self.output}")
+
+
+def load_report_cards(conn, semester=None, exam_type=None):
+    """Return one dict per student with their results and rank, from two queries."""
+    conditions = ["r.deleted_at IS NULL"]
+    params = []
+    if semester:
+        conditions.append("r.semester = ?")
+        params.append(semester)
+    if exam_type:
+        conditions.append("r.exam_type = ?")
+        params.append(exam_type)
+
+    ranks = student_ranks(conn)
+    cards = []
+    current = None
+    for std_id, name, roll_no, subject, semester_, exam, marks in conn.execute(f'''
+        SELECT r.std_id, r.student_name, r.roll_no, r.subject, r.semester, r.exam_type, r.marks
+        FROM results r
+        WHERE {" AND ".join(conditions)}
+        ORDER BY r.std_id, r.semester, r.exam_type, r.subject
+    ''', params):
+        if current is None or current['std_id'] != std_id:
+            current = {'std_id': std_id, 'name': name, 'roll_no': roll_no,
+                       'rank': ranks.get(std_id), 'results': []}
+            cards.append(current)
+        current['results'].append((subject, semester_, exam, marks))
+    return cards
+
+
+def assign_filenames(cards):
+    """Give every card a distinct file name (card['filename']), safe on every platform.
+    
+    Different IDs can clean up to the same name ("A/1" and "A 1"), and
+    some file systems ignore case, so repeats get a counter rather than
+    overwriting an earlier card.
+    """
+    used = set()
+    for card in cards:
+        base = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{card['std_id']}_report_card")
+        name = base
+        count = 1
+        while name.lower() in used:
+            count += 1
+            name = f"{base}_{count}"
+        used.add(name.lower())
+        card['filename'] = name + ".pdf"
+
+
+def _chart_png(results):
+    """Bar chart of the highest mark per subject, as PNG bytes (None without results)."""
+    # Imported here so that only the processes that draw pay for matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import seaborn as sns
+
+    best = {}
+    for subject, _, _, mark in results:
+        if subject not in best or mark > best[subject]:
+            best[subject] = mark
+    subjects = [subject for subject in CHART_SUBJECTS if subject in best]
+    if not subjects:
+        return None
+    marks = [best[subject] for subject in subjects]
+
+    # Figure + Agg canvas rather than pyplot: no global figure registry to leak into
+    fig = Figure(figsize=(7, 3.6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.bar(subjects, marks, color=sns.color_palette("husl", len(subjects)))
+    for bar in ax.patches:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 1, f'{int(height)}%',
+                ha='center', va='bottom', fontsize=8, fontweight='bold')
+    ax.set_title('Subject-wise Performance', fontsize=11, fontweight='bold')
+    ax.set_ylabel('Marks (%)')
+    ax.set_ylim(0, min(105, max(marks) + 10))
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.patch.set_facecolor('#f8f9fa')
+    # Fixed margins: the layout never changes, and tight_layout() costs a full extra draw
+    fig.subplots_adjust(left=0.09, right=0.98, top=0.9, bottom=0.22)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100)
+    return buffer.getvalue()
+
+
+def render_card(card, path):
+    """Write one student's report card PDF to path."""
+    styles = report_styles()
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    elements = [Paragraph("Student Report Card", styles['title'])]
+    elements.append(Paragraph(f"Name: {card['name']}", styles['filter']))
+    elements.append(Paragraph(f"Student ID: {card['std_id']}", styles['filter']))
+    elements.append(Paragraph(f"Roll No: {card['roll_no'] or ''}", styles['filter']))
+
+    if card['rank']:
+        rank, total_students, semester, exam_type = card['rank']
+        percentile = (total_students - rank + 1) / total_students * 100
+        elements.append(Paragraph(
+            f"Class Rank: {rank} of {total_students} (Semester {semester} {exam_type}) - "
+            f"Top {percentile:.1f}% of the Class",
+            styles['filter']))
+    else:
+        elements.append(Paragraph("Class Rank: Not ranked yet", styles['filter']))
+    elements.append(Spacer(1, 12))
+
+    data = [["Subject", "Semester", "Exam Type", "Marks", "Grade"]]
+    for subject, semester, exam_type, marks in card['results']:
+        data.append([subject, semester, exam_type, marks, grade_for(marks)])
+    elements.append(Table(data, repeatRows=1, style=styles['table']))
+
+    chart = _chart_png(card['results'])
+    if chart:
+        elements.append(Spacer(1, 16))
+        elements.append(Image(io.BytesIO(chart), width=7 * inch, height=3.6 * inch))
+    doc.build(elements)
+
+
+def render_cards(cards, directory):
+    """Worker task: render a batch of cards into directory; returns how many."""
+    for card in cards:
+        render_card(card, os.path.join(directory, card['filename']))
+    return len(cards)
+
+
+def _tasks(cards, size):
+    for start in range(0, len(cards), size):
+        yield cards[start:start + size]
+
+
+def generate_report_cards(cards, output, workers=None, progress=None, cancelled=None):
+    """Render a PDF per student into a directory, or a single zip if output ends in .zip.
+
+    Cards are handed out in small batches to a process pool, since drawing
+    the chart and laying out the PDF is CPU bound and reportlab/matplotlib
+    hold the GIL. progress(done, total) is called as batches finish and
+    cancelled() is polled between them; cancelling raises ExportCancelled.
+    """
+    start = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    bundle = output.lower().endswith('.zip')
+    directory = tempfile.mkdtemp(prefix="report_cards_") if bundle else output
+    os.makedirs(directory, exist_ok=True)
+
+    assign_filenames(cards)
+    done = 0
+    try:
+        if workers <= 1:
+            for batch in _tasks(cards, CARDS_PER_TASK):
+                if cancelled and cancelled():
+                    raise ExportCancelled()
+                done += render_cards(batch, directory)
+                if progress:
+                    progress(done, len(cards))
+        else:
+            with process_pool(workers) as pool:
+                tasks = _tasks(cards, CARDS_PER_TASK)
+                pending = set()
+                try:
+                    while True:
+                        # Keep a couple of batches queued per worker, no more
+                        for batch in tasks:
+                            pending.add(pool.submit(render_cards, batch, directory))
+                            if len(pending) >= workers * 2:
+                                break
+                        if not pending:
+                            break
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            done += future.result()
+                        if progress:
+                            progress(done, len(cards))
+                        if cancelled and cancelled():
+                            raise ExportCancelled()
+                except BaseException:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+        if bundle:
+            # Stored, not deflated: the PDFs and their PNGs are already compressed
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+                for card in cards:
+                    archive.write(os.path.join(directory, card['filename']), card['filename'])
+    finally:
+        if bundle:
+            shutil.rmtree(directory, ignore_errors=True)
+    return ReportCardResult(done, time.perf_counter() - start, workers, output)
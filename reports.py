@@ -0,0 +1,126 @@
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, LongTable, TableStyle
+
+
+class ExportCancelled(Exception):
+    """Raised inside a PDF build when the user cancels it."""
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Paragraph and table styles shared by every report, built once."""
+    sample = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=sample['Title'],
+        fontSize=16,
+        spaceAfter=30
+    )
+    filter_style = ParagraphStyle(
+        'FilterStyle',
+        parent=sample['Normal'],
+        fontSize=10,
+        spaceAfter=10
+    )
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    return {'title': title_style, 'filter': filter_style, 'table': table_style,
+            'normal': sample['Normal']}
+
+
+class RankListPdf:
+    """Rank list PDF laid out as a series of page-sized LongTable chunks.
+
+    Rows are consumed from any iterator and cut into chunks of one page
+    worth of rows, each its own LongTable with the header row repeated and
+    fixed column widths. reportlab therefore never measures or splits one
+    huge table, and layout time grows linearly with the number of rows.
+    progress(page) is called as each page is started; cancelled() is
+    polled while building and aborts the build with ExportCancelled.
+    """
+
+    # Heights in points of the header row and a body row with TABLE_STYLE
+    HEADER_HEIGHT = 30
+    ROW_HEIGHT = 18
+
+    def __init__(self, filename, headers, rows, filters=(), title="Rank List Report",
+                 rows_per_chunk=None, col_widths=None, progress=None, cancelled=None):
+        self.filename = filename
+        self.headers = list(headers)
+        self.rows = rows
+        self.filters = filters
+        self.title = title
+        self.rows_per_chunk = rows_per_chunk
+        self.col_widths = col_widths
+        self.progress = progress
+        self.cancelled = cancelled
+
+    @classmethod
+    def rows_per_page(cls, height=letter[1] - 2 * inch):
+        return int((height - cls.HEADER_HEIGHT) // cls.ROW_HEIGHT) - 1
+
+    @classmethod
+    def estimated_pages(cls, row_count):
+        return max(1, -(-row_count // cls.rows_per_page()))
+
+    def _col_widths(self, width):
+        if self.col_widths:
+            return self.col_widths
+        # Wider column for the name, the rest share the page evenly
+        weights = [2.2 if header == "Name" else 1.0 for header in self.headers]
+        unit = width / sum(weights)
+        return [weight * unit for weight in weights]
+
+    def _chunks(self, col_widths, rows_per_chunk):
+        styles = report_styles()
+        chunk = []
+        for row in self.rows:
+            chunk.append(list(row))
+            if len(chunk) == rows_per_chunk:
+                yield LongTable([self.headers] + chunk, colWidths=col_widths,
+                                repeatRows=1, style=styles['table'])
+                chunk = []
+            if self.cancelled and self.cancelled():
+                raise ExportCancelled()
+        if chunk:
+            yield LongTable([self.headers] + chunk, colWidths=col_widths,
+                            repeatRows=1, style=styles['table'])
+
+    def _on_page(self, canvas, doc):
+        if self.cancelled and self.cancelled():
+            raise ExportCancelled()
+        if self.progress:
+            self.progress(doc.page)
+
+    def build(self):
+        """Write the PDF; returns the number of pages."""
+        styles = report_styles()
+        doc = SimpleDocTemplate(self.filename, pagesize=letter,
+                                leftMargin=0.6 * inch, rightMargin=0.6 * inch)
+        elements = [Paragraph(self.title, styles['title'])]
+
+        # Add filter information
+        for label, value in self.filters:
+            elements.append(Paragraph(f"{label}: {value}", styles['filter']))
+        elements.append(Spacer(1, 20))
+
+        rows_per_chunk = self.rows_per_chunk or self.rows_per_page(doc.height)
+        elements.extend(self._chunks(self._col_widths(doc.width), rows_per_chunk))
+        doc.build(elements, onFirstPage=self._on_page, onLaterPages=self._on_page)
+        return doc.page
@@ -1,43 +1,63 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 import sqlite3
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from database import connection, grade_for, latest_seq, student_rank
+from widgets import BusyIndicator, TreeBinder, release_variables
+from background import BackgroundExecutor
+from change_feed import ChangeFeed
 
 class StudentDashboard:
     # Valid subjects list to match teacher dashboard
     SUBJECTS = ["MATHS4", "OS", "CNND", "COA", "AT", "MATHS3", "DSA", "PCPF", "DBMS", "PCOM"]
     
-    def __init__(self, root, username):
-        self.root = root
+    def __init__(self, master, username, shell):
+        self.frame = master
+        self.root = master.winfo_toplevel()
+        self.shell = shell
         self.username = username
         self.root.title(f"Student Dashboard - {username}")
         self.root.geometry("1000x700")
         self.root.configure(bg="#e3f2fd")  # Light blue background
-        
-        # Initialize database connection
-        self.conn = sqlite3.connect('student_results.db')
-        self.cursor = self.conn.cursor()
+        master.configure(bg="#e3f2fd")
         
         # Initialize student data
         self.student_profile = None
         self.student_results = []
-        
-        # Load data and setup UI
-        self.load_student_data()
+        # Results changed elsewhere that are still to be re-read
+        self.stale_results = set()
+        self.reload_results = False
+        
+        # One reusable figure per graph, created with the analytics tab's first
+        # graph so matplotlib is only loaded then; closed with the window
+        self.charts = None
+        self.legend_frame = None
+        self.legend_subjects = None
+        self.executor = None
+        self.change_feed = None
+        # (semester, exam_type) the shown rank is computed over
+        self.rank_cohort = None
+        
+        # Load data and setup UI; the profile is needed to draw the header,
+        # later queries run on a worker thread
+        if not self.load_student_data():
+            # Back to the login window once this constructor has returned
+            self.root.after_idle(self.shell.show_login)
+            return
+        self.executor = BackgroundExecutor(self.root)
         self.setup_ui()
+        self.executor.on_busy = self.busy_indicator.set_busy
+        
+        # Marks entered by a teacher show up without logging in again
+        self.change_feed = ChangeFeed(self.root, self.executor, self.apply_changes,
+                                      last_seq=self.loaded_seq)
+        self.change_feed.start()
         
         # Check if using default password and show warning
         self.check_default_password()
-        
-        # Handle window closing
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
     def setup_ui(self):
         # Header Frame
-        header_frame = tk.Frame(self.root, bg="#2196f3", height=80)
+        header_frame = tk.Frame(self.frame, bg="#2196f3", height=80)
         header_frame.pack(fill=tk.X)
         
         # Title
@@ -64,17 +84,22 @@ class StudentDashboard:
         )
         logout_btn.pack(side=tk.RIGHT, padx=10)
         
+        # Shown while a query is running in the background
+        self.busy_indicator = BusyIndicator(right_container, text="Loading...")
+        self.busy_indicator.label.configure(background="#2196f3", foreground="white")
+        self.busy_indicator.pack(side=tk.RIGHT, padx=10)
+        
         # Student Name
         if self.student_profile:
             tk.Label(right_container, text=f"Welcome, {self.student_profile[3]}", 
                     font=("Arial", 14), bg="#2196f3", fg="white").pack(side=tk.RIGHT, padx=10)
         
         # Create a navigation frame with gradient effect
-        self.nav_frame = tk.Frame(self.root, bg="#bbdefb", height=60)
+        self.nav_frame = tk.Frame(self.frame, bg="#bbdefb", height=60)
         self.nav_frame.pack(fill=tk.X)
         
         # Add a separator for visual appeal
-        separator = ttk.Separator(self.root, orient="horizontal")
+        separator = ttk.Separator(self.frame, orient="horizontal")
         separator.pack(fill=tk.X, padx=5)
         
         # Create and configure button styles
@@ -124,7 +149,7 @@ class StudentDashboard:
         self.profile_btn.pack(side=tk.LEFT, padx=15)
         
         # Create a main content frame with border
-        self.content_frame = tk.Frame(self.root, bg="white", bd=1, relief=tk.SOLID)
+        self.content_frame = tk.Frame(self.frame, bg="white", bd=1, relief=tk.SOLID)
         self.content_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Create frames for different sections (initially hidden)
@@ -184,6 +209,8 @@ class StudentDashboard:
         
         # Pack everything
         self.results_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Rows stay in (subject, semester, exam_type) order, as they are queried
+        self.results_binder = TreeBinder(self.results_tree, sort_key=lambda key, values: key)
         y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
         
@@ -229,8 +256,7 @@ class StudentDashboard:
         self.graph_frame = ttk.Frame(analytics_container)
         self.graph_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        # Generate initial chart and rank position
-        self.create_bar_graph()
+        # The graph is drawn when the tab is first shown; fetch the rank now
         self.update_rank_position()
     
     def setup_profile_tab(self):
@@ -287,29 +313,26 @@ class StudentDashboard:
                  command=self.show_change_password).pack(side=tk.LEFT, padx=5)
     
     def load_student_data(self):
-        """Load all student data from database"""
+        """Load all student data from database; returns False if the dashboard cannot open"""
         try:
-            # Get student profile
-            self.cursor.execute('''
-            SELECT id, username, password, full_name 
-            FROM users 
-            WHERE username=? AND role='student'
-            ''', (self.username,))
-            self.student_profile = self.cursor.fetchone()
-            
-            if not self.student_profile:
-                messagebox.showerror("Error", "Student profile not found!")
-                self.root.destroy()
-                return
-            
-            # Get student results
-            self.cursor.execute('''
-            SELECT subject, marks, added_by, added_at, roll_no 
-            FROM results 
-            WHERE std_id=?
-            ORDER BY subject
-            ''', (self.username,))
-            self.student_results = self.cursor.fetchall()
+            with connection() as conn:
+                cursor = conn.cursor()
+                
+                # Get student profile
+                cursor.execute('''
+                SELECT id, username, password, full_name 
+                FROM users 
+                WHERE username=? AND role='student'
+                ''', (self.username,))
+                self.student_profile = cursor.fetchone()
+                
+                if not self.student_profile:
+                    messagebox.showerror("Error", "Student profile not found!")
+                    return False
+                
+                # Changes after this point reach the dashboard through the change feed
+                self.loaded_seq = latest_seq(conn)
+                self.student_results = self._query_results(conn)
             
             # Get roll number from results (if any)
             self.roll_no = None
@@ -320,68 +343,114 @@ class StudentDashboard:
             if not self.student_results:
                 messagebox.showinfo("Information", "No results found. Please check with your teacher.")
             
+            return True
+            
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"Failed to load student data: {str(e)}")
-            self.root.destroy()
+            return False
+    
+    def _query_results(self, conn):
+        """The student's results as (subject, marks, added_by, added_at, roll_no, semester, exam_type)"""
+        return conn.execute('''
+        SELECT subject, marks, added_by, added_at, roll_no, semester, exam_type
+        FROM results 
+        WHERE std_id=? AND deleted_at IS NULL
+        ORDER BY subject, semester, exam_type
+        ''', (self.username,)).fetchall()
+    
+    def _result_row(self, result):
+        """(key, values) of a results row for the Treeview"""
+        subject, marks, added_by, added_at, _, semester, exam_type = result
+        return (subject, semester, exam_type), (subject, marks, self.calculate_grade(marks), added_by, added_at)
     
     def load_results(self):
-        """Load results into Treeview"""
-        # Clear existing items
-        for row in self.results_tree.get_children():
-            self.results_tree.delete(row)
-        
-        # Insert new data
-        for subject, marks, added_by, added_at, _ in self.student_results:
-            grade = self.calculate_grade(marks)
-            self.results_tree.insert("", tk.END, values=(subject, marks, grade, added_by, added_at))
+        """Load results into Treeview; only rows that changed are touched, at the next idle time"""
+        self.results_binder.bind(self._result_row(result) for result in self.student_results)
+    
+    def apply_changes(self, changes):
+        """React to results changed by any session (from the change feed)
+        
+        The student's own rows are re-read only when one of them changed, and
+        the rank only when a result of the ranked semester and exam did.
+        """
+        if changes is None:
+            self.reload_results = True
+        else:
+            self.stale_results.update(
+                (subject, semester, exam_type)
+                for _, std_id, _, _, subject, _, semester, exam_type, _ in changes if std_id == self.username)
+        own = self.reload_results or bool(self.stale_results)
+        on_error = lambda e: messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
+        # A new request supersedes the last one, so it covers every key still stale
+        if self.reload_results:
+            self.executor.submit('results', self._fetch_results, on_done=self._show_new_results,
+                                 on_error=on_error)
+        elif self.stale_results:
+            self.executor.submit('results', self._fetch_changed_results, frozenset(self.stale_results),
+                                 on_done=self._show_changed_results, on_error=on_error)
+        if own or any((change[6], change[7]) == self.rank_cohort for change in changes):
+            self.update_rank_position(show_loading=False)
+    
+    def _fetch_results(self):
+        with connection() as conn:
+            return self._query_results(conn)
+    
+    def _fetch_changed_results(self, keys):
+        """{(subject, semester, exam_type): results row, or None once deleted} for keys"""
+        with connection() as conn:
+            return {key: conn.execute('''
+                SELECT subject, marks, added_by, added_at, roll_no, semester, exam_type
+                FROM results
+                WHERE std_id=? AND subject=? AND semester=? AND exam_type=? AND deleted_at IS NULL
+                ''', (self.username, *key)).fetchone() for key in keys}
+    
+    def _show_new_results(self, results):
+        self.reload_results = False
+        self.stale_results.clear()
+        if not self.results_tree.winfo_exists() or results == self.student_results:
+            return
+        self.student_results = results
+        if results:
+            self.roll_no = results[0][4]
+        self.load_results()
+        self._results_changed()
+    
+    def _show_changed_results(self, changed):
+        self.stale_results.difference_update(changed)
+        if not self.results_tree.winfo_exists():
+            return
+        results = {(result[0], result[5], result[6]): result for result in self.student_results}
+        patches = []
+        for key, result in changed.items():
+            if results.get(key) == result:
+                continue
+            if result is None:
+                del results[key]
+                patches.append((key, None))
+            else:
+                results[key] = result
+                patches.append(self._result_row(result))
+        if not patches:
+            return
+        self.student_results = [results[key] for key in sorted(results)]
+        if self.student_results:
+            self.roll_no = self.student_results[0][4]
+        # Only the changed rows are touched
+        self.results_binder.bind_patch(patches)
+        self._results_changed()
+    
+    def _results_changed(self):
+        # The graph is redrawn when the analytics tab is next shown otherwise
+        if self.analytics_frame.winfo_manager():
+            self.create_bar_graph()
     
     def calculate_grade(self, marks):
         """Calculate grade based on marks"""
-        if marks >= 90: return "A+"
-        elif marks >= 80: return "A"
-        elif marks >= 70: return "B"
-        elif marks >= 60: return "C"
-        elif marks >= 50: return "D"
-        else: return "F"
+        return grade_for(marks)
     
     def update_chart(self):
         """Update the progress chart"""
-        # Clear previous chart
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        
-        if not self.student_results:
-            ttk.Label(self.chart_frame, text="No results available for visualization").pack()
-            return
-        
-        # Prepare data
-        subjects = [row[0] for row in self.student_results]
-        marks = [row[1] for row in self.student_results]
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(8, 4))
-        bars = ax.bar(subjects, marks, color='#2196f3')
-        
-        # Customize chart
-        ax.set_title('Subject-wise Performance')
-        ax.set_ylabel('Marks')
-        ax.set_ylim(0, 100)
-        plt.xticks(rotation=45)
-        
-        # Add value labels
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                    f'{int(height)}',
-                    ha='center', va='bottom')
-        
-        # Adjust layout
-        plt.tight_layout()
-        
-        # Embed in Tkinter
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.create_bar_graph()
     
     def load_profile(self):
         """Load profile data into labels"""
@@ -516,30 +585,31 @@ class StudentDashboard:
                 return
             
             try:
-                # First verify current password
-                self.cursor.execute('''
-                SELECT id FROM users 
-                WHERE username = ? AND password = ? AND role = 'student'
-                ''', (self.username, current))
-                
-                user = self.cursor.fetchone()
-                if not user:
-                    messagebox.showerror("Error", "Current password is incorrect!")
-                    return
+                with connection() as conn:
+                    cursor = conn.cursor()
+                    
+                    # First verify current password
+                    cursor.execute('''
+                    SELECT id FROM users 
+                    WHERE username = ? AND password = ? AND role = 'student'
+                    ''', (self.username, current))
+                    
+                    user = cursor.fetchone()
+                    if not user:
+                        messagebox.showerror("Error", "Current password is incorrect!")
+                        return
+                    
+                    # Update password
+                    cursor.execute('''
+                    UPDATE users 
+                    SET password = ? 
+                    WHERE username = ? AND role = 'student'
+                    ''', (new, self.username))
                 
-                # Update password
-                self.cursor.execute('''
-                UPDATE users 
-                SET password = ? 
-                WHERE username = ? AND role = 'student'
-                ''', (new, self.username))
-                
-                self.conn.commit()
                 messagebox.showinfo("Success", "Password changed successfully!")
                 dialog.destroy()
                 
             except sqlite3.Error as e:
-                self.conn.rollback()
                 messagebox.showerror("Database Error", f"Failed to change password: {str(e)}")
         
         # Use a regular tk.Button instead of ttk.Button for better color control
@@ -587,34 +657,22 @@ class StudentDashboard:
             bg="white"
         ).pack(side=tk.BOTTOM, pady=5)
     
-    def on_closing(self):
-        """Handle window closing"""
-        if hasattr(self, 'conn'):
-            self.conn.close()
-        self.root.destroy()
+    def close(self, wait=False):
+        """Stop background work and free the figures; called by the shell before the view goes"""
+        if self.change_feed:
+            self.change_feed.stop()
+        if self.executor:
+            self.executor.shutdown(wait=wait)
+        if self.charts:
+            self.charts.close()
+        release_variables(self)
 
     def create_bar_graph(self):
-        # Clear previous graph
-        for widget in self.graph_frame.winfo_children():
-            widget.destroy()
-        
-        # Set seaborn style
-        sns.set_style("whitegrid")
-        sns.set_context("notebook", font_scale=1.2)
-        
-        # Create figure
-        fig, ax = plt.subplots(figsize=(12, 8))  # Larger figure for more subjects
-        
-        # Get data from student_results
-        if not self.student_results:
-            ttk.Label(self.graph_frame, text="No results available for visualization", 
-                     font=("Arial", 14)).pack(pady=50)
-            return
-        
+        """Draw the subject-wise performance graph, reusing the existing figure"""
         # Extract data - create a dictionary to store the highest mark for each subject
         # since a student might have multiple exams for the same subject
         subjects_data = {}
-        for subject, mark, _, _, _ in self.student_results:
+        for subject, mark, *_ in self.student_results:
             # Keep the highest mark for each subject
             if subject not in subjects_data or mark > subjects_data[subject]:
                 subjects_data[subject] = mark
@@ -627,51 +685,45 @@ class StudentDashboard:
                 subjects.append(subject)
                 marks.append(subjects_data[subject])
         
+        # matplotlib and seaborn are loaded on the first graph
+        import seaborn as sns
+        from charts import ChartManager, results_key
+        if self.charts is None:
+            self.charts = ChartManager()
+        
         if not subjects:
+            self.charts.forget(self.graph_frame)
+            for widget in self.graph_frame.winfo_children():
+                widget.destroy()
+            self.legend_frame = None
+            self.legend_subjects = None
             ttk.Label(self.graph_frame, text="No results available for visualization", 
                      font=("Arial", 14)).pack(pady=50)
             return
         
+        if self.legend_subjects is None:
+            # Clear the "no results" message
+            for widget in self.graph_frame.winfo_children():
+                widget.destroy()
+        
         # Create a color palette
         palette = sns.color_palette("husl", len(subjects))
         
-        # Create bars with seaborn
-        bars = sns.barplot(x=subjects, y=marks, palette=palette, ax=ax)
-        
-        # Add value labels on top of bars
-        for i, bar in enumerate(ax.patches):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 1,
-                   f'{int(height)}%',
-                   ha='center', va='bottom', fontsize=11, fontweight='bold')
-        
-        # Customize the graph
-        ax.set_title('Subject-wise Performance', fontsize=16, fontweight='bold', pad=20)
-        ax.set_xlabel('Subjects', fontsize=14, fontweight='bold', labelpad=10)
-        ax.set_ylabel('Marks (%)', fontsize=14, fontweight='bold', labelpad=10)
-        
-        # Set y-axis limits with some padding
-        ax.set_ylim(0, min(105, max(marks) + 10))
+        # Only redrawn when the results changed since the last time
+        canvas = self.charts.bar_chart(self.graph_frame, results_key(self.student_results),
+                                       subjects, marks, palette)
+        canvas_widget = canvas.get_tk_widget()
+        if not canvas_widget.winfo_manager():
+            canvas_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Remove top and right spines
-        sns.despine()
-        
-        # Rotate x-axis labels for better readability
-        plt.xticks(rotation=45, ha='right')
-        
-        # Add a subtle background color
-        fig.patch.set_facecolor('#f8f9fa')
-        
-        # Adjust layout to prevent label cutoff
-        plt.tight_layout()
-        
-        # Create canvas and add to frame
-        canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        if subjects == self.legend_subjects:
+            return
+        if self.legend_frame is not None:
+            self.legend_frame.destroy()
+        self.legend_subjects = subjects
         
         # Add a legend with color squares in a scrollable frame if many subjects
-        legend_frame = ttk.Frame(self.graph_frame)
+        self.legend_frame = legend_frame = ttk.Frame(self.graph_frame)
         legend_frame.pack(fill=tk.X, padx=10, pady=(5, 10))
         
         # Create legend items
@@ -713,6 +765,9 @@ class StudentDashboard:
         self.profile_frame.pack_forget()
         self.analytics_frame.pack(fill=tk.BOTH, expand=True)
         
+        # No-op unless the results changed since the graph was drawn
+        self.create_bar_graph()
+        
     def show_profile(self):
         # Update button states
         self.results_btn.configure(state="normal", style="Nav.TButton")
@@ -727,18 +782,8 @@ class StudentDashboard:
     def logout(self):
         """Logout and return to login screen"""
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
-            # Close database connection
-            if hasattr(self, 'conn'):
-                self.conn.close()
-            
-            # Destroy current window
-            self.root.destroy()
-            
-            # Open login window again
-            from login import LoginWindow
-            login_root = tk.Tk()
-            LoginWindow(login_root)
-            login_root.mainloop()
+            # Pooled connections stay open so the next session starts warm
+            self.shell.show_login()
 
     def check_default_password(self):
         """Check if user is using default password and show warning"""
@@ -755,6 +800,8 @@ class StudentDashboard:
     
     def show_password_warning(self):
         """Show warning dialog for default password"""
+        if not self.frame.winfo_exists():
+            return  # Logged out before the warning was due
         result = messagebox.askquestion(
             "Security Warning",
             "You are using the default password which is not secure.\n\n"
@@ -765,97 +812,53 @@ class StudentDashboard:
         if result == "yes":
             self.show_change_password()
 
-    def update_rank_position(self):
+    def update_rank_position(self, show_loading=True):
         """Update the student's rank position in the class"""
-        try:
-            # Connect to database
-            conn = sqlite3.connect('student_results.db')
-            cursor = conn.cursor()
-            
-            # Get the student's current semester
-            cursor.execute("""
-                SELECT DISTINCT semester 
-                FROM results 
-                WHERE std_id = ? 
-                ORDER BY semester DESC 
-                LIMIT 1
-            """, (self.username,))
-            current_semester = cursor.fetchone()
-            
-            if not current_semester:
-                self.rank_position_label.config(text="No Data Available")
-                self.total_students_label.config(text="")
-                self.percentile_label.config(text="")
-                return
-                
-            current_semester = current_semester[0]
-            
-            # Calculate total marks for each student in the current semester
-            query = """
-            WITH StudentTotals AS (
-                SELECT 
-                    r.std_id,
-                    SUM(r.marks) as total_marks,
-                    COUNT(*) as subject_count
-                FROM results r
-                WHERE r.semester = ?
-                GROUP BY r.std_id
-                HAVING subject_count = (
-                    SELECT COUNT(DISTINCT subject) 
-                    FROM results 
-                    WHERE semester = ?
-                )
+        if show_loading:
+            self.rank_position_label.config(text="...")
+        self.executor.submit('rank', self._fetch_rank_position,
+                             on_done=self._show_rank_position,
+                             on_error=lambda e: messagebox.showerror("Database Error", f"An error occurred: {str(e)}"))
+    
+    def _fetch_rank_position(self):
+        # Rank and cohort size come from the materialized semester totals
+        with connection() as conn:
+            return student_rank(conn, self.username)
+    
+    def _show_rank_position(self, position):
+        if not self.rank_position_label.winfo_exists():
+            return
+        student_rank_no = None
+        total_students = 0
+        self.rank_cohort = None
+        if position is not None:
+            student_rank_no, total_students, semester, exam_type = position
+            self.rank_cohort = (semester, exam_type)
+        
+        if student_rank_no is not None:
+            # Update rank position label
+            self.rank_position_label.config(
+                text=f"#{student_rank_no}",
+                foreground="#2196F3"  # Blue color for rank
             )
-            SELECT 
-                std_id,
-                total_marks,
-                ROW_NUMBER() OVER (ORDER BY total_marks DESC) as rank,
-                COUNT(*) OVER () as total_students
-            FROM StudentTotals
-            """
             
-            cursor.execute(query, (current_semester, current_semester))
-            results = cursor.fetchall()
-            
-            # Find student's rank
-            student_rank = None
-            total_students = 0
-            
-            for std_id, total_marks, rank, total in results:
-                if std_id == self.username:
-                    student_rank = rank
-                    total_students = total
-                    break
+            # Update total students label
+            self.total_students_label.config(
+                text=f"Out of {total_students} Students"
+            )
             
-            if student_rank is not None:
-                # Update rank position label
-                self.rank_position_label.config(
-                    text=f"#{student_rank}",
-                    foreground="#2196F3"  # Blue color for rank
-                )
-                
-                # Update total students label
-                self.total_students_label.config(
-                    text=f"Out of {total_students} Students"
-                )
-                
-                # Calculate and update percentile
-                percentile = ((total_students - student_rank + 1) / total_students) * 100
-                self.percentile_label.config(
-                    text=f"Top {percentile:.1f}% of the Class"
-                )
-            else:
-                self.rank_position_label.config(text="No Data Available")
-                self.total_students_label.config(text="")
-                self.percentile_label.config(text="")
-                
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
+            # Calculate and update percentile
+            percentile = ((total_students - student_rank_no + 1) / total_students) * 100
+            self.percentile_label.config(
+                text=f"Top {percentile:.1f}% of the Class"
+            )
+        else:
+            self.rank_position_label.config(text="No Data Available")
+            self.total_students_label.config(text="")
+            self.percentile_label.config(text="")
 
 if __name__ == "__main__":
+    from app import AppShell
     root = tk.Tk()
-    app = StudentDashboard(root, "alice")  # Test with sample student
+    AppShell(root).open_dashboard("student", "alice")  # Test with sample student
     root.mainloop()
\ No newline at end of file
@@ -1,24 +1,43 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import sqlite3
-import csv
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+import os
+from datetime import datetime, timedelta
+from database import (SUBJECTS, SUBJECTS_BY_SEM, connection, migrate, save_results, class_marks,
+                      search_results, delete_results, purge_deleted, compact_database, history_seq,
+                      ResultQuery)
+from rank_engine import get_rank_engines, load_rank_engine
+from widgets import (VirtualTreeview, ListSource, RankEngineSource, BusyIndicator, FilterPipeline,
+                     ProgressDialog, EditableGrid, release_variables)
+from background import BackgroundExecutor
+from change_feed import ChangeFeed
+from importer import CsvImporter, CsvFileSource, REQUIRED_COLUMNS, sample_rows, validate_file
+from exporter import write_csv
 
 class TeacherDashboard:
     # List of valid subjects organized by semester
-    SUBJECTS_BY_SEM = {
-        3: ["MATHS3", "DSA", "DBMS", "PCPF", "PCOM"],
-        4: ["MATHS4", "OS", "CNND", "COA", "AT"]
-    }
+    SUBJECTS_BY_SEM = SUBJECTS_BY_SEM
     
     # Combined list of all subjects
-    SUBJECTS = ["MATHS3", "DSA", "DBMS", "PCPF", "PCOM", "MATHS4", "OS", "CNND", "COA", "AT"]
+    SUBJECTS = SUBJECTS
     
-    def __init__(self, root, username):
-        self.root = root
+    # Maximum rows shown for a search-box query
+    SEARCH_RESULT_LIMIT = 500
+    
+    # Milliseconds to wait after the last keystroke before searching
+    SEARCH_DEBOUNCE_MS = 250
+    
+    # Deleted records are hidden at once and purged by a background job
+    SOFT_DELETE = True
+    
+    # Accepted "As of" inputs and the time each one spans; an entry includes
+    # every change up to the end of it (the whole day or the whole minute)
+    AS_OF_FORMATS = (("%Y-%m-%d %H:%M:%S", timedelta(seconds=1)),
+                     ("%Y-%m-%d %H:%M", timedelta(minutes=1)),
+                     ("%Y-%m-%d", timedelta(days=1)))
+    
+    def __init__(self, master, username, shell):
+        self.root = master.winfo_toplevel()
+        self.shell = shell
         self.username = username
         self.root.title(f"Teacher Dashboard - {username}")
         self.root.geometry("1200x800")
@@ -32,65 +51,48 @@ class TeacherDashboard:
         self.style.map('TButton', background=[('active', '#2980b9')])
         
         self.root.configure(bg="#f0f0f0")
+        master.configure(bg="#f0f0f0")
         
-        # Initialize database connection and create table if not exists
-        self.conn = sqlite3.connect('student_results.db')
-        self.cursor = self.conn.cursor()
-        
-        # Create tables if they don't exist
-        self.cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT CHECK (role IN ('student', 'teacher')) NOT NULL,
-            full_name TEXT NOT NULL
-        )
-        ''')
-        
-        # Create default admin user if not exists
-        self.cursor.execute('''
-        INSERT OR IGNORE INTO users (username, password, role, full_name)
-        VALUES (?, ?, ?, ?)
-        ''', ('admin', 'admin123', 'teacher', 'Administrator'))
-        
-        # Generate the subject list for the SQL constraint
-        subjects_list = "'" + "', '".join(self.SUBJECTS) + "'"
-        
-        self.cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS results (
-            std_id TEXT,
-            student_name TEXT NOT NULL,
-            roll_no TEXT NOT NULL,
-            subject TEXT NOT NULL CHECK (subject IN ({subjects_list})),
-            marks INTEGER NOT NULL CHECK (marks >= 0 AND marks <= 100),
-            semester INTEGER CHECK (semester IN (3, 4)),
-            exam_type TEXT CHECK (exam_type IN ('IA1', 'IA2', 'SEM')),
-            added_by TEXT NOT NULL,
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (std_id, subject, semester, exam_type),
-            FOREIGN KEY (added_by) REFERENCES users(username),
-            FOREIGN KEY (std_id) REFERENCES users(username)
-        )
-        ''')
-        self.conn.commit()
-        
-        # Handle window closing
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # Bring the schema up to date (no DDL runs when it is already current)
+        # and create default admin user if not exists
+        with connection() as conn:
+            migrate(conn)
+            conn.execute('''
+            INSERT OR IGNORE INTO users (username, password, role, full_name)
+            VALUES (?, ?, ?, ?)
+            ''', ('admin', 'admin123', 'teacher', 'Administrator'))
         
         # Setup main container with gradient effect
-        self.main_container = tk.Frame(self.root, bg="#f0f0f0")
+        self.main_container = tk.Frame(master, bg="#f0f0f0")
         self.main_container.pack(fill=tk.BOTH, expand=True)
         
         # Setup header
         self.setup_header()
         
-        # Setup content area
-        self.setup_content()
+        # Database work runs on worker threads so the window stays responsive
+        self.executor = BackgroundExecutor(self.root, on_busy=self.busy_indicator.set_busy)
         
-        # Current marks frame reference (to be updated when semester changes)
-        self.marks_frame = None
+        # Finish any purge a previous session left behind
+        self._schedule_purge()
+        
+        # Tabs are built on first use and then kept; each remembers the data
+        # generation it last loaded and refreshes when shown after a reload
+        self.tabs = {}
+        self.current_tab = None
+        self.data_generation = 0
+        self.tab_generations = {}
+        
+        # Results written by any session are applied to the open tabs as they
+        # arrive; created before the tabs load so no change is missed
+        self.change_feed = ChangeFeed(self.root, self.executor, self.apply_changes)
+        self.change_feed.start()
+        
+        # Marks entries are built once per semester and swapped on change
+        self.marks_pages = {}
         self.marks_entries = {}
+        
+        # Setup content area
+        self.setup_content()
     
     def setup_header(self):
         header_frame = tk.Frame(self.main_container, bg="#2c3e50", height=80)
@@ -107,6 +109,11 @@ class TeacherDashboard:
                              relief="flat", padx=20, pady=8,
                              activebackground="#c0392b")
         logout_btn.pack(side=tk.RIGHT, padx=30, pady=15)
+        
+        # Shown while a query is running in the background
+        self.busy_indicator = BusyIndicator(header_frame, text="Loading...")
+        self.busy_indicator.label.configure(background="#2c3e50", foreground="white")
+        self.busy_indicator.pack(side=tk.RIGHT, padx=10)
     
     def setup_content(self):
         # Create main content frame with shadow effect
@@ -129,6 +136,12 @@ class TeacherDashboard:
                                        command=self.show_add_result)
         self.add_result_btn.pack(side=tk.LEFT, padx=15)
         
+        # Class Marks button (grid entry for a whole class)
+        self.class_marks_btn = ttk.Button(nav_frame, text="Class Marks",
+                                        style="Custom.TButton",
+                                        command=self.show_class_marks)
+        self.class_marks_btn.pack(side=tk.LEFT, padx=15)
+        
         # View Result button
         self.view_result_btn = ttk.Button(nav_frame, text="View Result", 
                                         style="Custom.TButton",
@@ -155,26 +168,114 @@ class TeacherDashboard:
         self.show_add_result()
     
     def show_add_result(self):
-        self.clear_content()
-        self.setup_add_result_tab()
+        self.show_tab('add', self.setup_add_result_tab)
         # Update button states
         self.add_result_btn.state(['!disabled'])
         self.view_result_btn.state(['!disabled'])
         self.rank_list_btn.state(['!disabled'])
         
     def show_view_result(self):
-        self.clear_content()
-        self.show_view_result_tab()
+        self.show_tab('results', self.show_view_result_tab, refresh=self.load_results)
         # Update button states
         self.add_result_btn.state(['!disabled'])
         self.view_result_btn.state(['!disabled'])
         self.rank_list_btn.state(['!disabled'])
     
-    def clear_content(self):
-        for widget in self.content_area.winfo_children():
-            widget.destroy()
+    def show_tab(self, name, build, refresh=None):
+        """Show a tab, building it the first time and refreshing it if the data changed"""
+        tab = self.tabs.get(name)
+        if tab is None:
+            # The builder loads the tab's data itself
+            tab = self.tabs[name] = ttk.Frame(self.content_area)
+            build(tab)
+            self.tab_generations[name] = self.data_generation
+        elif refresh is not None and self.tab_generations.get(name) != self.data_generation:
+            self.tab_generations[name] = self.data_generation
+            refresh()
+        
+        if self.current_tab is not None and self.current_tab != name:
+            self.tabs[self.current_tab].pack_forget()
+        tab.pack(fill=tk.BOTH, expand=True)
+        self.current_tab = name
+    
+    def data_changed(self):
+        """Note that results were written here; the change feed brings them to the tabs now"""
+        self.change_feed.poll()
+    
+    def apply_changes(self, changes):
+        """Apply changed results (from the change feed) to the tabs that have been built"""
+        if changes is None:
+            # Too many to apply one by one
+            get_rank_engines().invalidate()
+            self.reload_tabs()
+            return
+        get_rank_engines().apply_changes(changes)
+        if 'results' in self.tabs:
+            self._apply_results_changes(changes)
+        if 'rank' in self.tabs and self.rank_as_of is None:
+            source = self.rank_view.source
+            if isinstance(source, RankEngineSource) and any(
+                    source.engine.matches(subject, semester, exam_type)
+                    for *_, subject, _, semester, exam_type, _ in changes):
+                self.rank_view.refresh()
+        if 'grid' in self.tabs and self.grid_loaded:
+            self._apply_grid_changes(changes)
+    
+    def _apply_results_changes(self, changes):
+        source = self.results_view.source
+        if source is None or self.results_as_of is not None:
+            return  # Nothing loaded yet, or a snapshot, which never changes
+        if isinstance(source, ListSource):
+            # A search result is bounded: run it again if it may be affected
+            _, subject, semester, exam_type, _ = self._results_filter_state()
+            if any((subject is None or change[4] == subject) and
+                   (semester is None or change[6] == semester) and
+                   (exam_type is None or change[7] == exam_type) for change in changes):
+                self.filter_results()
+            return
+        
+        rows = []
+        delta = 0
+        reorder = False
+        for change in changes:
+            seq, std_id, name, roll_no, subject, marks, semester, exam_type, previous = change
+            if not source.matches(subject, semester, exam_type):
+                continue
+            if marks is not None:
+                rows.append((name, std_id, roll_no, subject, marks, semester, exam_type))
+                reorder = reorder or source.moves(change)
+            if source.seq is not None and seq > source.seq:
+                # Already counted when the count was read after it
+                delta += (marks is not None) - (previous is not None)
+        if delta or reorder:
+            source.adjust_count(delta, changes[-1][0])
+            # Refetch the rows on screen on a worker, without counting again
+            self.results_view.set_source(source, keep_position=True, total=self.results_view.total + delta)
+        elif rows:
+            self.results_view.update_rows(rows)
+    
+    def _apply_grid_changes(self, changes):
+        grid_semester, grid_exam_type = self.grid_loaded
+        for _, std_id, name, roll_no, subject, marks, semester, exam_type, _ in changes:
+            if semester != grid_semester:
+                continue
+            if not self.marks_grid.has_row(std_id):
+                if marks is None:
+                    continue
+                self.marks_grid.add_row(std_id, (std_id, name, roll_no))
+            if exam_type == grid_exam_type:
+                self.marks_grid.set_saved(std_id, subject, "" if marks is None else marks)
+    
+    def reload_tabs(self):
+        """Reload the visible tab now and the others when they are next shown"""
+        self.data_generation += 1
+        refresh = {'results': self.load_results, 'rank': self.update_rank_list,
+                   'grid': self.refresh_class_marks}.get(self.current_tab)
+        if refresh is not None:
+            self.tab_generations[self.current_tab] = self.data_generation
+            refresh()
     
-    def setup_add_result_tab(self):
+    def setup_add_result_tab(self, tab):
         style = ttk.Style()
         style.configure("Custom.TLabelframe", background="#ffffff", padding=15)
         style.configure("Custom.TLabelframe.Label", font=("Helvetica", 12, "bold"))
@@ -183,7 +284,7 @@ class TeacherDashboard:
         style.configure("Action.TButton", font=("Helvetica", 12, "bold"), padding=5)
         
         # Main Frame
-        main_frame = ttk.LabelFrame(self.content_area, text="Add New Result", 
+        main_frame = ttk.LabelFrame(tab, text="Add New Result", 
                                   style="Custom.TLabelframe")
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
@@ -249,7 +350,15 @@ class TeacherDashboard:
         self.marks_canvas = tk.Canvas(self.marks_labelframe, bg="#ffffff", highlightthickness=0)
         self.marks_scrollbar = ttk.Scrollbar(self.marks_labelframe, orient="vertical", command=self.marks_canvas.yview)
         
+        # One frame inside the canvas holds a page of entries per semester
         self.marks_frame = ttk.Frame(self.marks_canvas, style="Custom.TFrame")
+        self.marks_frame.bind("<Configure>", lambda e: self.marks_canvas.configure(scrollregion=self.marks_canvas.bbox("all")))
+        self.marks_canvas.create_window((0, 0), window=self.marks_frame, anchor="nw")
+        self.marks_canvas.configure(yscrollcommand=self.marks_scrollbar.set)
+        
+        # Pack canvas and scrollbar
+        self.marks_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.marks_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Initialize marks entries
         self.update_subject_entries()
@@ -275,29 +384,23 @@ class TeacherDashboard:
         # Get the current semester
         sem = int(self.semester_var.get())
         
-        # Clear existing marks frame
-        if hasattr(self, 'marks_frame') and self.marks_frame:
-            for widget in self.marks_frame.winfo_children():
-                widget.destroy()
-            
-        # Create a new frame
-        self.marks_frame = ttk.Frame(self.marks_canvas, style="Custom.TFrame")
-        self.marks_frame.bind("<Configure>", lambda e: self.marks_canvas.configure(scrollregion=self.marks_canvas.bbox("all")))
-        
-        self.marks_canvas.create_window((0, 0), window=self.marks_frame, anchor="nw")
-        self.marks_canvas.configure(yscrollcommand=self.marks_scrollbar.set)
-        
-        # Pack canvas and scrollbar
-        self.marks_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-        self.marks_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Hide the entries of the other semester; their contents are kept
+        for other, (page, _) in self.marks_pages.items():
+            if other != sem:
+                page.pack_forget()
         
-        # Create mark entries only for the subjects in the selected semester
-        self.marks_entries = {}
-        semester_subjects = self.SUBJECTS_BY_SEM[sem]
-        
-        for i, subject in enumerate(semester_subjects):
+        if sem not in self.marks_pages:
+            self.marks_pages[sem] = self._build_marks_page(self.SUBJECTS_BY_SEM[sem])
+        page, self.marks_entries = self.marks_pages[sem]
+        page.pack(fill=tk.X)
+    
+    def _build_marks_page(self, semester_subjects):
+        """Create a label and entry per subject; returns (frame, {subject: entry})"""
+        page = ttk.Frame(self.marks_frame, style="Custom.TFrame")
+        entries = {}
+        for subject in semester_subjects:
             # Create frame for each subject row
-            row_frame = ttk.Frame(self.marks_frame)
+            row_frame = ttk.Frame(page)
             row_frame.pack(fill=tk.X, padx=5, pady=5)
             
             # Add subject label
@@ -306,17 +409,148 @@ class TeacherDashboard:
             # Add entry field
             entry = ttk.Entry(row_frame, style="Info.TEntry", width=20)
             entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            self.marks_entries[subject] = entry
-        
-        # Configure grid weights
-        self.marks_frame.grid_columnconfigure(1, weight=1)
+            entries[subject] = entry
+        return page, entries
+    
+    def show_class_marks(self):
+        self.show_tab('grid', self.setup_class_marks_tab, refresh=self.refresh_class_marks)
     
-    def show_view_result_tab(self):
-        # Clear everything first
-        self.clear_content()
+    def setup_class_marks_tab(self, tab):
+        main_frame = ttk.LabelFrame(tab, text="Class Marks", style="Custom.TLabelframe")
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        
+        # Semester and exam whose marks are shown
+        controls_frame = ttk.Frame(main_frame)
+        controls_frame.pack(fill=tk.X, pady=(0, 10))
         
+        ttk.Label(controls_frame, text="Semester:").pack(side=tk.LEFT, padx=(0, 5))
+        self.grid_semester_var = tk.StringVar(value="3")
+        semester_combo = ttk.Combobox(controls_frame, textvariable=self.grid_semester_var,
+                                      values=["3", "4"], state="readonly", width=10)
+        semester_combo.pack(side=tk.LEFT, padx=(0, 20))
+        semester_combo.bind("<<ComboboxSelected>>", self.load_class_marks)
+        
+        ttk.Label(controls_frame, text="Exam Type:").pack(side=tk.LEFT, padx=(0, 5))
+        self.grid_exam_type_var = tk.StringVar(value="IA1")
+        exam_type_combo = ttk.Combobox(controls_frame, textvariable=self.grid_exam_type_var,
+                                       values=["IA1", "IA2", "SEM"], state="readonly", width=10)
+        exam_type_combo.pack(side=tk.LEFT, padx=(0, 20))
+        exam_type_combo.bind("<<ComboboxSelected>>", self.load_class_marks)
+        
+        ttk.Button(controls_frame, text="Save All", style="Action.TButton",
+                   command=self.save_class_marks).pack(side=tk.RIGHT, padx=5)
+        self.grid_status = ttk.Label(controls_frame, text="")
+        self.grid_status.pack(side=tk.RIGHT, padx=10)
+        
+        # Row for a student who has no results in this semester yet
+        add_row_frame = ttk.Frame(main_frame)
+        add_row_frame.pack(fill=tk.X, pady=(0, 10))
+        self.grid_new_entries = {}
+        for label in ("Student ID", "Name", "Roll No"):
+            ttk.Label(add_row_frame, text=f"{label}:").pack(side=tk.LEFT, padx=(0, 5))
+            entry = ttk.Entry(add_row_frame, width=15)
+            entry.pack(side=tk.LEFT, padx=(0, 15))
+            self.grid_new_entries[label] = entry
+        ttk.Button(add_row_frame, text="Add Student",
+                   command=self.add_class_marks_row).pack(side=tk.LEFT, padx=5)
+        
+        # Students as rows, the semester's subjects as columns
+        self.marks_grid = EditableGrid(main_frame, ("Student ID", "Name", "Roll No"),
+                                       self._parse_marks, widths={"Name": 160},
+                                       on_change=self._update_grid_status)
+        self.marks_grid.pack(fill=tk.BOTH, expand=True)
+        self.grid_loaded = None
+        
+        self.load_class_marks()
+    
+    @staticmethod
+    def _parse_marks(text):
+        """Marks typed into a grid cell; raises ValueError unless between 0 and 100"""
+        marks = float(text)
+        if not 0 <= marks <= 100:
+            raise ValueError(f"{text} is not between 0 and 100")
+        return int(marks) if marks.is_integer() else marks
+    
+    def load_class_marks(self, event=None):
+        """Load the grid for the selected semester and exam type"""
+        semester = int(self.grid_semester_var.get())
+        exam_type = self.grid_exam_type_var.get()
+        if (self.marks_grid.dirty_cells() and
+                not messagebox.askyesno("Unsaved Marks", "Discard the marks that have not been saved?")):
+            # Put the selection back to what the grid shows
+            if self.grid_loaded:
+                self.grid_semester_var.set(str(self.grid_loaded[0]))
+                self.grid_exam_type_var.set(self.grid_loaded[1])
+            return
+        self.executor.submit('grid', self._load_class_marks, semester, exam_type,
+                             on_done=self._show_class_marks,
+                             on_error=self._database_error("Failed to load class marks"))
+    
+    def refresh_class_marks(self):
+        # Results changed elsewhere; keep the grid as it is while it has unsaved edits
+        if not self.marks_grid.dirty_cells():
+            self.load_class_marks()
+    
+    def _load_class_marks(self, semester, exam_type):
+        with connection() as conn:
+            return semester, exam_type, class_marks(conn, semester, exam_type)
+    
+    def _show_class_marks(self, loaded):
+        semester, exam_type, students = loaded
+        self.grid_loaded = (semester, exam_type)
+        self.marks_grid.set_columns(self.SUBJECTS_BY_SEM[semester])
+        for std_id, name, roll_no, marks in students:
+            self.marks_grid.add_row(std_id, (std_id, name, roll_no), marks)
+        self._update_grid_status()
+    
+    def _update_grid_status(self):
+        changed = len(self.marks_grid.dirty_cells())
+        self.grid_status.configure(text=f"{changed} unsaved marks" if changed else "")
+    
+    def add_class_marks_row(self):
+        std_id, name, roll_no = (entry.get().strip() for entry in self.grid_new_entries.values())
+        if not all([std_id, name, roll_no]):
+            messagebox.showerror("Error", "Please fill all student information fields!")
+            return
+        if self.marks_grid.has_row(std_id):
+            messagebox.showinfo("Class Marks", f"{std_id} is already in the grid.")
+            return
+        self.marks_grid.add_row(std_id, (std_id, name, roll_no))
+        for entry in self.grid_new_entries.values():
+            entry.delete(0, tk.END)
+        self.marks_grid.edit(std_id, self.marks_grid.edit_columns[0])
+    
+    def save_class_marks(self):
+        """Write every changed cell in one transaction"""
+        cells = self.marks_grid.dirty_cells()
+        if not cells:
+            messagebox.showinfo("Class Marks", "There are no changes to save.")
+            return
+        semester, exam_type = self.grid_loaded
+        marks_data = []
+        for (std_id, subject), marks in cells.items():
+            row = self.marks_grid.row(std_id)
+            marks_data.append((std_id, row["Name"], row["Roll No"], subject, marks,
+                               semester, exam_type, self.username))
+        self.executor.submit(None, self._save_class_marks, marks_data,
+                             on_done=lambda _: self._on_class_marks_saved(cells),
+                             on_error=self._database_error("Failed to save marks"))
+    
+    def _save_class_marks(self, marks_data):
+        with connection() as conn:
+            save_results(conn, marks_data)
+        get_rank_engines().record_results(marks_data)
+    
+    def _on_class_marks_saved(self, cells):
+        # The grid already shows the saved values; only the dirty flags change
+        self.marks_grid.mark_saved(cells)
+        self.data_changed()
+        students = len({std_id for std_id, _ in cells})
+        messagebox.showinfo("Success", f"Saved {len(cells)} marks for {students} students.")
+    
+    def show_view_result_tab(self, tab):
         # Create main frame
-        main_frame = ttk.Frame(self.content_area)
+        main_frame = ttk.Frame(tab)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
         # Search Results Section
@@ -366,141 +600,155 @@ class TeacherDashboard:
         delete_btn = ttk.Button(button_frame, text="Delete Selected", command=self.delete_selected_records)
         delete_btn.pack(side=tk.LEFT, padx=5)
         
+        delete_filtered_btn = ttk.Button(button_frame, text="Delete All Filtered",
+                                         command=self.delete_filtered_records)
+        delete_filtered_btn.pack(side=tk.LEFT, padx=5)
+        
+        compact_btn = ttk.Button(button_frame, text="Compact Database", command=self.compact_database)
+        compact_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Historical snapshot; blank shows the current results
+        self.results_as_of = None
+        self.results_as_of_var = self._as_of_entry(button_frame, self.apply_results_as_of)
+        
         # Results Preview Section
         preview_frame = ttk.LabelFrame(main_frame, text="Results Preview")
         preview_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Create Treeview with scrollbar
-        tree_frame = ttk.Frame(preview_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Create Treeview
+        # Virtual Treeview: only the visible rows are materialized and pages
+        # are fetched as the user scrolls; clicking a heading sorts in SQL
         columns = ("Name", "Student ID", "Roll No", "Subject", "Marks", "Semester", "Exam Type")
-        self.results_tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
-        
-        # Set column headings and widths
-        for col in columns:
-            self.results_tree.heading(col, text=col)
-            self.results_tree.column(col, width=100)  # Adjust width as needed
-        
-        # Add scrollbars
-        y_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.results_tree.yview)
-        x_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.results_tree.xview)
-        self.results_tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
-        
-        # Pack scrollbars and treeview
-        self.results_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        
-        # Bind search and filter events
-        self.search_var.trace('w', self.filter_results)
-        self.subject_filter.trace('w', self.filter_results)
-        self.semester_filter.trace('w', self.filter_results)
-        self.exam_type_filter.trace('w', self.filter_results)
+        self.results_view = VirtualTreeview(preview_frame, columns, executor=self.executor,
+                                            on_error=self._database_error("An error occurred"))
+        self.results_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Bind semester change to update subject filter
-        self.semester_combo.bind('<<ComboboxSelected>>', self.update_subject_filter)
+        self.semester_filter.trace_add('write', self.update_results_subject_filter)
+        
+        # Bind search and filter events; keystrokes are debounced and the
+        # semester/subject pair changes are coalesced into a single query
+        self.results_filters = FilterPipeline(self.results_view, self._results_filter_state,
+                                              self._query_results)
+        self.results_filters.watch(self.search_var, delay=self.SEARCH_DEBOUNCE_MS)
+        self.results_filters.watch(self.subject_filter)
+        self.results_filters.watch(self.semester_filter)
+        self.results_filters.watch(self.exam_type_filter)
         
         # Load initial results
         self.load_results()
     
     def logout(self):
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
-            if hasattr(self, 'conn'):
-                self.conn.close()
-            self.root.destroy()
-            # Import and create new login window
-            import login
-            new_root = tk.Tk()
-            login.LoginWindow(new_root)
-            new_root.mainloop()
+            # Pooled connections and rank engines stay warm for the next session
+            self.shell.show_login()
     
     def filter_results(self, *args):
         """Filter results based on search text and dropdown selections"""
-        search_text = self.search_var.get().lower()
+        # Re-query even when the filters are unchanged (the data may not be)
+        self.results_filters.refresh()
+    
+    def _results_filter_state(self):
+        """Effective View Results filter as (search_text, subject, semester, exam_type, as_of)"""
         subject = self.subject_filter.get()
         semester = self.semester_filter.get()
         exam_type = self.exam_type_filter.get()
-        
-        # Clear current display
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-        
+        return (
+            self.search_var.get().strip(),
+            None if subject == "All" else subject,
+            None if semester == "All" else int(semester),
+            None if exam_type == "All" else exam_type,
+            self.results_as_of
+        )
+    
+    def _as_of_entry(self, parent, apply):
+        """Add an "As of" entry to parent that calls apply on Enter; returns its variable"""
+        ttk.Label(parent, text="As of the end of (YYYY-MM-DD [HH:MM[:SS]]):").pack(side=tk.LEFT, padx=(20, 5))
+        variable = tk.StringVar()
+        entry = ttk.Entry(parent, textvariable=variable, width=20)
+        entry.pack(side=tk.LEFT)
+        entry.bind('<Return>', apply)
+        ttk.Button(parent, text="Show", command=apply).pack(side=tk.LEFT, padx=5)
+        return variable
+    
+    def _parse_as_of(self, text):
+        """Unix time for an "As of" entry, None when blank; raises ValueError"""
+        text = text.strip()
+        if not text:
+            return None
+        for pattern, span in self.AS_OF_FORMATS:
+            try:
+                moment = datetime.strptime(text, pattern)
+            except ValueError:
+                continue
+            # The last whole second before the span ends (changed_at is in seconds)
+            return int((moment + span).timestamp()) - 1
+        raise ValueError(text)
+    
+    def _as_of_label(self, as_of):
+        return "Now" if as_of is None else datetime.fromtimestamp(as_of).strftime("%Y-%m-%d %H:%M:%S")
+    
+    def _read_as_of(self, variable):
+        """Parsed "As of" entry, or False after telling the user it is invalid"""
         try:
-            conn = sqlite3.connect('student_results.db')
-            cursor = conn.cursor()
-            
-            # Build query with filters - using correct column name std_id
-            query = """
-            SELECT u.full_name, r.std_id, r.roll_no, r.subject, r.marks, r.semester, r.exam_type
-            FROM results r
-            JOIN users u ON r.std_id = u.username
-            WHERE 1=1
-            """
-            params = []
-            
-            if subject != "All":
-                query += " AND r.subject = ?"
-                params.append(subject)
-            
-            if semester != "All":
-                query += " AND r.semester = ?"
-                params.append(semester)
-                
-            if exam_type != "All":
-                query += " AND r.exam_type = ?"
-                params.append(exam_type)
-                
-            query += " ORDER BY r.roll_no, r.subject, r.exam_type"
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            # Filter by search text and add to treeview
-            for result in results:
-                if (search_text == "" or 
-                    search_text in str(result[0]).lower() or  # name
-                    search_text in str(result[1]).lower() or  # std_id
-                    search_text in str(result[2]).lower()):   # roll_no
-                    self.results_tree.insert('', 'end', values=result)
-                    
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
+            return self._parse_as_of(variable.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid date! Use YYYY-MM-DD, YYYY-MM-DD HH:MM or YYYY-MM-DD HH:MM:SS.")
+            return False
+    
+    def apply_results_as_of(self, event=None):
+        as_of = self._read_as_of(self.results_as_of_var)
+        if as_of is not False:
+            self.results_as_of = as_of
+            self.results_filters.refresh()
+    
+    def _query_results(self, state):
+        search_text, subject, semester, exam_type, as_of = state
+        filters = dict(subject=subject, semester=semester, exam_type=exam_type)
+        
+        # A newer filter supersedes any query still running on this channel
+        self.executor.submit('results', self._load_results_source, search_text, filters,
+                             self.results_view.current_sort(), self.results_view.page_size, as_of,
+                             on_done=self._show_results_source,
+                             on_error=self._database_error("An error occurred"))
+    
+    def _load_results_source(self, search_text, filters, sort, page_size, as_of=None):
+        """Build the View Results source and its first page (runs on a worker thread)"""
+        if as_of is not None:
+            # Read from the results history as it stood at that time
+            with connection() as conn:
+                filters['as_of_seq'] = history_seq(conn, as_of)
+        if search_text:
+            # Match name, std_id or roll_no through the trigram search index
+            with connection() as conn:
+                results = search_results(conn, search_text, limit=self.SEARCH_RESULT_LIMIT, **filters)
+            source = ListSource(results, key=lambda row: (row[1], row[3], row[5], row[6]))
+        else:
+            # Pages are read lazily with keyset pagination as the user scrolls
+            source = ResultQuery(**filters)
+        sort_column, descending = sort
+        if sort_column is not None:
+            source.sort(sort_column, descending)
+        return source, source.count(), source.fetch(0, page_size)
+    
+    def _show_results_source(self, loaded):
+        # The tab may have been closed while the query was running
+        if not self.results_view.winfo_exists():
+            return
+        source, total, first_page = loaded
+        self.results_view.set_source(source, first_page=first_page, total=total)
+    
+    def _database_error(self, message):
+        """on_error callback showing a database error with the given prefix"""
+        def show(error):
+            messagebox.showerror("Database Error", f"{message}: {str(error)}")
+        return show
     
     def load_results(self):
-        """Load all results into the treeview"""
-        # Clear existing items
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
-            
-        try:
-            # Connect to database
-            conn = sqlite3.connect('student_results.db')
-            cursor = conn.cursor()
-            
-            # Get all results with student names - ordered by std_id
-            query = """
-            SELECT u.full_name, r.std_id, r.roll_no, r.subject, r.marks, r.semester, r.exam_type
-            FROM results r
-            JOIN users u ON r.std_id = u.username
-            ORDER BY r.std_id ASC, r.roll_no, r.subject, r.exam_type
-            """
-            cursor.execute(query)
-            results = cursor.fetchall()
-            
-            # Insert into treeview
-            for result in results:
-                self.results_tree.insert('', 'end', values=result)
-                
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
+        """Reload the results view for the current filters"""
+        # Nothing to refresh until the View Results tab has been built
+        if 'results' not in self.tabs:
+            return
+        self.filter_results()
     
     def add_result(self):
         try:
@@ -533,54 +781,42 @@ class TeacherDashboard:
                     messagebox.showerror("Error", f"Invalid marks for {subject}! Please enter a number.")
                     return
             
-            # Connect to database
-            conn = sqlite3.connect('student_results.db')
-            cursor = conn.cursor()
-            
-            try:
-                # Insert all marks
-                cursor.executemany('''
-                INSERT OR REPLACE INTO results 
-                (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', marks_data)
-                
-                # Check if student user exists
-                cursor.execute('''
-                SELECT id FROM users WHERE username = ? AND role = 'student'
-                ''', (std_id,))
-                
-                if not cursor.fetchone():
-                    # Create student user account using std_id as username
-                    cursor.execute('''
-                    INSERT INTO users (username, password, role, full_name)
-                    VALUES (?, ?, 'student', ?)
-                    ''', (std_id, 'student123', name))
-                
-                conn.commit()
-                messagebox.showinfo("Success", "Results added successfully!")
-                
-                # Clear form
-                self.clear_form()
-                
-                # Refresh results display
-                self.load_results()
-                
-            except sqlite3.Error as e:
-                conn.rollback()
-                messagebox.showerror("Database Error", f"Failed to add results: {str(e)}")
-            finally:
-                conn.close()
+            # Save on a worker thread; the form is cleared once the write commits
+            self.executor.submit(None, self._save_results, std_id, name, marks_data,
+                                 on_done=self._on_results_saved,
+                                 on_error=self._database_error("Failed to add results"))
                 
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
+    def _save_results(self, std_id, name, marks_data):
+        """Write one student's marks and keep the rank engines current (worker thread)"""
+        # Insert all marks on a pooled connection; commits on success. A
+        # student account is created from std_id if there is none yet
+        with connection() as conn:
+            save_results(conn, marks_data)
+        
+        # Keep the in-memory rank lists in step with the committed marks
+        get_rank_engines().record_results(marks_data)
+    
+    def _on_results_saved(self, _):
+        messagebox.showinfo("Success", "Results added successfully!")
+        
+        # Clear form
+        self.clear_form()
+        
+        # Refresh results display
+        self.data_changed()
+    
     def clear_form(self):
         self.name_entry.delete(0, tk.END)
         self.std_id_entry.delete(0, tk.END)
         self.roll_no_entry.delete(0, tk.END)
         self.semester_var.set("3")
         self.exam_type_var.set("IA1")
+        for _, entries in self.marks_pages.values():
+            for entry in entries.values():
+                entry.delete(0, tk.END)
         # Update subject entries for semester 3
         self.update_subject_entries()
     
@@ -597,108 +833,48 @@ class TeacherDashboard:
             return
         
         try:
+            # Only the header is read here; rows are read as they come on screen
+            source = CsvFileSource(file_path)
+            
+            # Check required columns
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in source.header]
+            if missing_columns:
+                messagebox.showerror("Error", f"CSV is missing required columns: {', '.join(missing_columns)}")
+                return
+            
             preview_window = tk.Toplevel(self.root)
             preview_window.title("CSV Preview")
             preview_window.geometry("800x500")  # Make it larger to accommodate more columns
             
-            # Preview CSV content
-            with open(file_path, 'r') as file:
-                reader = csv.DictReader(file)
-                preview_data = list(reader)
-                
-                # Check required columns
-                required_columns = ['std_id', 'student_name', 'roll_no', 'subject', 'marks', 'semester', 'exam_type']
-                missing_columns = [col for col in required_columns if col not in preview_data[0]]
-                
-                if missing_columns:
-                    messagebox.showerror("Error", f"CSV is missing required columns: {', '.join(missing_columns)}")
-                    preview_window.destroy()
-                    return
-                
-                # Create preview treeview
-                preview_tree = ttk.Treeview(preview_window, columns=list(preview_data[0].keys()), show="headings")
-                for col in preview_data[0].keys():
-                    preview_tree.heading(col, text=col)
-                    preview_tree.column(col, width=100)
-                
-                # Add preview data
-                for row in preview_data:
-                    preview_tree.insert("", tk.END, values=list(row.values()))
-                
-                # Add scrollbars
-                y_scrollbar = ttk.Scrollbar(preview_window, orient="vertical", command=preview_tree.yview)
-                x_scrollbar = ttk.Scrollbar(preview_window, orient="horizontal", command=preview_tree.xview)
-                
-                # Configure scrollbars
-                preview_tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
-                
-                # Pack preview and scrollbars
-                preview_tree.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
-                y_scrollbar.pack(fill=tk.Y, side=tk.RIGHT)
-                x_scrollbar.pack(fill=tk.X, side=tk.BOTTOM)
-                
-                # Confirm button
-                if messagebox.askyesno("Confirm Import", "Do you want to import this data?"):
-                    # Process and import data
-                    for row in preview_data:
-                        try:
-                            # Validate semester
-                            semester = int(row['semester'])
-                            if semester not in [3, 4]:
-                                raise ValueError(f"Invalid semester: {semester}")
-                            
-                            # Validate exam_type
-                            exam_type = row['exam_type']
-                            if exam_type not in ['IA1', 'IA2', 'SEM']:
-                                raise ValueError(f"Invalid exam type: {exam_type}")
-                            
-                            # Validate subject
-                            subject = row['subject']
-                            if subject not in self.SUBJECTS:
-                                raise ValueError(f"Invalid subject: {subject}. Must be one of: {', '.join(self.SUBJECTS)}")
-                            
-                            # Validate marks
-                            marks = float(row['marks'])
-                            if not (0 <= marks <= 100):
-                                raise ValueError(f"Invalid marks: {marks}")
-                            
-                            # Insert into database
-                            self.cursor.execute('''
-                                INSERT OR REPLACE INTO results 
-                                (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                row['std_id'],
-                                row['student_name'],
-                                row['roll_no'],
-                                subject,
-                                marks,
-                                semester,
-                                exam_type,
-                                self.username
-                            ))
-                            
-                            # Check if student user exists
-                            self.cursor.execute('''
-                                SELECT id FROM users WHERE username = ? AND role = 'student'
-                            ''', (row['std_id'],))
-                            
-                            if not self.cursor.fetchone():
-                                # Create student user account
-                                self.cursor.execute('''
-                                    INSERT INTO users (username, password, role, full_name)
-                                    VALUES (?, ?, 'student', ?)
-                                ''', (row['std_id'], 'student123', row['student_name']))
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Error processing row for {row['std_id']}: {str(e)}")
-                            self.conn.rollback()
-                            preview_window.destroy()
-                            return
-                    
-                    self.conn.commit()
-                    messagebox.showinfo("Success", "CSV imported successfully!")
-                    self.load_results()
+            # Row count from a buffered newline scan, without parsing the file
+            ttk.Label(preview_window,
+                      text=f"{os.path.basename(file_path)}: about {source.count():,} rows").pack(
+                          fill=tk.X, padx=10, pady=5)
+            
+            notebook = ttk.Notebook(preview_window)
+            notebook.pack(fill=tk.BOTH, expand=True)
+            
+            # The whole file, paged lazily as the user scrolls
+            file_view = VirtualTreeview(notebook, source.header, executor=self.executor)
+            file_view.set_source(source)
+            notebook.add(file_view, text="File")
             
+            # A random sample of the rows after the first page, read off the UI thread
+            sample_view = VirtualTreeview(notebook, ("Row",) + tuple(source.header))
+            notebook.add(sample_view, text="Random Sample")
+            self.executor.submit('preview', sample_rows, file_path, skip=file_view.page_size,
+                                 on_done=lambda sample: self._show_preview_sample(sample_view, sample))
+            
+            # Confirm button
+            if messagebox.askyesno("Confirm Import", "Do you want to import this data?",
+                                   parent=preview_window):
+                # Validate every row on a worker thread (and across processes for
+                # large files) before anything is written
+                self.executor.submit(None, validate_file, file_path,
+                                     on_done=lambda report: self._on_csv_validated(file_path, report),
+                                     on_error=lambda e: messagebox.showerror("Error", str(e)))
+            
+            self.executor.cancel('preview')
             preview_window.destroy()
             
         except Exception as e:
@@ -706,40 +882,93 @@ class TeacherDashboard:
             if 'preview_window' in locals():
                 preview_window.destroy()
     
+    def _show_preview_sample(self, sample_view, sample):
+        if sample_view.winfo_exists():
+            sample_view.set_source(ListSource([[line] + record for line, record in sample]))
+    
+    def _on_csv_validated(self, file_path, report):
+        """Import a validated CSV, or offer to import only its valid rows"""
+        skip_lines = frozenset()
+        if report.errors:
+            # Machine-readable report next to the CSV: line, column, value, reason
+            report_path = os.path.splitext(file_path)[0] + "_errors.csv"
+            try:
+                report.write(report_path)
+            except OSError as e:
+                report_path = f"(could not be written: {str(e)})"
+            
+            if not report.valid_rows:
+                messagebox.showerror("Import Aborted",
+                                     f"{report.summary()}\n\nNo valid rows to import.\n"
+                                     f"Error report: {report_path}")
+                return
+            if not messagebox.askyesno("Invalid Rows",
+                                       f"{report.summary()}\n\nError report: {report_path}\n\n"
+                                       f"Import the {report.valid_rows} valid rows and skip the rest?"):
+                return
+            skip_lines = report.error_lines
+        
+        # Re-read the file on a worker thread
+        self.executor.submit(None, self._import_file, file_path, skip_lines,
+                             on_done=self._on_csv_imported,
+                             on_error=lambda e: messagebox.showerror("Error", str(e)))
+    
+    def _import_file(self, file_path, skip_lines):
+        """Stream the CSV into the database in one transaction (worker thread)
+        
+        Raises ValueError naming the offending row; nothing is committed then.
+        """
+        result = CsvImporter(self.username).import_file(file_path, skip_lines)
+        if result.changed:
+            # Reloading is cheaper than replaying a bulk import into each rank engine
+            get_rank_engines().invalidate()
+        return result
+    
+    def _on_csv_imported(self, result):
+        messagebox.showinfo("Success", f"CSV imported successfully!\n\n{result.summary()}")
+        if result.changed:
+            self.data_changed()
+    
     def export_to_csv(self):
         """Export filtered results to CSV file"""
-        if not self.results_tree.get_children():
+        if not self.results_view.total:
             messagebox.showinfo("Export", "No results to export!")
             return
             
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension='.csv',
-                filetypes=[("CSV files", '*.csv')],
-                title="Export Results"
-            )
-            
-            if filename:
-                with open(filename, 'w', newline='') as csvfile:
-                    writer = csv.writer(csvfile)
-                    # Write headers
-                    headers = [self.results_tree.heading(col)['text'] for col in self.results_tree['columns']]
-                    writer.writerow(headers)
-                    
-                    # Write data
-                    for item in self.results_tree.get_children():
-                        row = self.results_tree.item(item)['values']
-                        writer.writerow(row)
-                        
-                messagebox.showinfo("Export Successful", f"Results exported to {filename}")
-                
-        except Exception as e:
-            messagebox.showerror("Export Error", f"An error occurred while exporting: {str(e)}")
+        filename = filedialog.asksaveasfilename(
+            defaultextension='.csv',
+            filetypes=[("CSV files", '*.csv'), ("Gzipped CSV files", '*.csv.gz')],
+            title="Export Results"
+        )
+        
+        if filename:
+            # Stream the current filter and sort order straight from a database
+            # cursor; the search view holds at most SEARCH_RESULT_LIMIT rows
+            source = self.results_view.source
+            if isinstance(source, ResultQuery):
+                rows = source.clone().iter_rows()
+            else:
+                rows = list(source.iter_rows())
+            self._start_export(filename, list(self.results_view.columns), rows)
+    
+    def _start_export(self, filename, headers, rows, preamble=()):
+        """Write rows to filename on a worker thread, showing progress in the header"""
+        def progress(count):
+            self.executor.post(self.busy_indicator.set_text, f"Exporting... {count:,} rows")
+        
+        self.executor.submit(None, write_csv, filename, headers, rows, preamble, progress,
+                             on_done=lambda count: messagebox.showinfo(
+                                 "Export Successful", f"{count} rows exported to {filename}"),
+                             on_error=lambda e: messagebox.showerror(
+                                 "Export Error", f"An error occurred while exporting: {str(e)}"))
     
     def delete_selected_records(self):
         """Delete selected records from the database and treeview"""
-        selected_items = self.results_tree.selection()
-        if not selected_items:
+        if self.results_as_of is not None:
+            messagebox.showinfo("Delete", "Historical results cannot be deleted. Clear the As of date first.")
+            return
+        selected_keys = self.results_view.selected_keys()
+        if not selected_keys:
             messagebox.showinfo("Delete", "Please select records to delete!")
             return
             
@@ -747,34 +976,93 @@ class TeacherDashboard:
                                   "Are you sure you want to delete the selected records?"):
             return
             
-        try:
-            conn = sqlite3.connect('student_results.db')
-            cursor = conn.cursor()
-            
-            for item in selected_items:
-                values = self.results_tree.item(item)['values']
-                # Delete from database - using correct column name std_id
-                cursor.execute("""
-                    DELETE FROM results 
-                    WHERE std_id = ? AND subject = ? AND semester = ? AND exam_type = ?
-                """, (values[1], values[3], values[5], values[6]))
-                
-                # Remove from treeview
-                self.results_tree.delete(item)
-                
-            conn.commit()
-            messagebox.showinfo("Success", "Selected records have been deleted!")
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
-    
-    def on_closing(self):
-        if hasattr(self, 'conn'):
-            self.conn.close()
-        self.root.destroy()
+        # Keys are (std_id, subject, semester, exam_type) from the source rows
+        keys = list(selected_keys)
+        self.executor.submit(None, self._delete_results, keys=keys,
+                             on_done=self._on_records_deleted,
+                             on_error=self._database_error("An error occurred"))
+    
+    def delete_filtered_records(self):
+        """Delete every record matching the semester, subject and exam type filters"""
+        search_text, subject, semester, exam_type, as_of = self._results_filter_state()
+        if as_of is not None:
+            messagebox.showinfo("Delete", "Historical results cannot be deleted. Clear the As of date first.")
+            return
+        if search_text:
+            messagebox.showinfo("Delete", "Clear the search box to delete by filter, "
+                                "or select the records and use Delete Selected.")
+            return
+        if subject is None and semester is None and exam_type is None:
+            messagebox.showinfo("Delete", "Choose a semester, subject or exam type to delete by filter.")
+            return
+        
+        description = ", ".join(f"{label} {value}" for label, value in
+                                (("Semester", semester), ("Subject", subject), ("Exam Type", exam_type))
+                                if value is not None)
+        if not messagebox.askyesno("Confirm Delete",
+                                   f"Are you sure you want to delete all {self.results_view.total} "
+                                   f"records for {description}?"):
+            return
+        
+        self.executor.submit(None, self._delete_results,
+                             subject=subject, semester=semester, exam_type=exam_type,
+                             on_done=self._on_records_deleted,
+                             on_error=self._database_error("An error occurred"))
+    
+    def _delete_results(self, keys=None, **filters):
+        """Delete results by key or filter in one statement (worker thread)"""
+        with connection() as conn:
+            deleted = delete_results(conn, keys, soft=self.SOFT_DELETE, **filters)
+        
+        if keys is not None:
+            get_rank_engines().remove_results(keys)
+        else:
+            # Cheaper to reload than to find the affected entries
+            get_rank_engines().invalidate()
+        return deleted
+    
+    def _on_records_deleted(self, deleted):
+        self.data_changed()
+        if self.SOFT_DELETE:
+            self._schedule_purge()
+        messagebox.showinfo("Success", f"{deleted} records have been deleted!")
+    
+    def _schedule_purge(self):
+        """Physically remove soft-deleted records in the background"""
+        self.executor.submit('purge', self._purge_deleted,
+                             on_error=self._database_error("Failed to purge deleted records"))
+    
+    def _purge_deleted(self):
+        with connection() as conn:
+            return purge_deleted(conn)
+    
+    def compact_database(self):
+        """Let an older database give space back after purges (one full VACUUM)"""
+        if not messagebox.askyesno("Compact Database",
+                                   "Compacting rewrites the whole database and needs every other "
+                                   "session to be idle. Continue?"):
+            return
+        self.executor.submit(None, self._compact_database,
+                             on_done=self._on_database_compacted,
+                             on_error=self._database_error("Failed to compact the database"))
+    
+    def _compact_database(self):
+        with connection() as conn:
+            return compact_database(conn)
+    
+    def _on_database_compacted(self, compacted):
+        if compacted:
+            messagebox.showinfo("Compact Database", "The database has been compacted.")
+        else:
+            messagebox.showinfo("Compact Database",
+                                "The database already gives space back after each purge.")
+    
+    def close(self, wait=False):
+        """Stop background work; the shell calls this before the view is destroyed"""
+        self.change_feed.stop()
+        # wait=True lets a running write finish before the pool is closed
+        self.executor.shutdown(wait=wait)
+        release_variables(self)
 
     def show_change_password(self):
         # Create change password dialog
@@ -865,23 +1153,24 @@ class TeacherDashboard:
                 return
             
             try:
-                # Verify current password
-                self.cursor.execute("SELECT password FROM users WHERE username = ?", (self.username,))
-                stored_password = self.cursor.fetchone()
-                
-                if not stored_password or stored_password[0] != current:
-                    messagebox.showerror("Error", "Current password is incorrect!")
-                    return
-                
-                # Update password
-                self.cursor.execute("UPDATE users SET password = ? WHERE username = ?", (new, self.username))
-                self.conn.commit()
+                with connection() as conn:
+                    cursor = conn.cursor()
+                    
+                    # Verify current password
+                    cursor.execute("SELECT password FROM users WHERE username = ?", (self.username,))
+                    stored_password = cursor.fetchone()
+                    
+                    if not stored_password or stored_password[0] != current:
+                        messagebox.showerror("Error", "Current password is incorrect!")
+                        return
+                    
+                    # Update password
+                    cursor.execute("UPDATE users SET password = ? WHERE username = ?", (new, self.username))
                 messagebox.showinfo("Success", "Password changed successfully!")
                 dialog.destroy()
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to change password: {str(e)}")
-                self.conn.rollback()
         
         # Buttons frame with larger buttons
         btn_frame = ttk.Frame(main_frame)
@@ -902,6 +1191,14 @@ class TeacherDashboard:
         # Focus on first entry
         current_pwd.focus()
 
+    def update_results_subject_filter(self, *args):
+        """Limit the View Results subject choices to the selected semester"""
+        semester = self.semester_filter.get()
+        subjects = ["All"] + (self.SUBJECTS if semester == "All" else self.SUBJECTS_BY_SEM[int(semester)])
+        self.subject_filter_combo['values'] = subjects
+        if self.subject_filter.get() not in subjects:
+            self.subject_filter.set("All")
+    
     def update_subject_filter(self, *args):
         """Update subject filter based on selected semester"""
         semester = self.rank_semester_filter.get()
@@ -915,12 +1212,9 @@ class TeacherDashboard:
         self.rank_subject_combo['values'] = subjects
         self.rank_subject_filter.set("All")
 
-    def setup_rank_list_tab(self):
-        # Clear existing content
-        self.clear_content()
-        
+    def setup_rank_list_tab(self, tab):
         # Create main frame
-        main_frame = ttk.Frame(self.content_area)
+        main_frame = ttk.Frame(tab)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
         # Create filters frame
@@ -959,132 +1253,83 @@ class TeacherDashboard:
         # Export buttons
         ttk.Button(export_frame, text="Export to CSV", command=self.export_rank_list_csv).pack(side=tk.LEFT, padx=5)
         ttk.Button(export_frame, text="Export to PDF", command=self.export_rank_list_pdf).pack(side=tk.LEFT, padx=5)
+        ttk.Button(export_frame, text="Generate Report Cards",
+                  command=self.generate_report_cards).pack(side=tk.LEFT, padx=5)
         
-        # Create Treeview for rank list
-        tree_frame = ttk.Frame(main_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Rank list of a historical snapshot, e.g. before moderation
+        self.rank_as_of = None
+        self.rank_as_of_var = self._as_of_entry(export_frame, self.apply_rank_as_of)
         
-        # Create Treeview
+        # Virtual Treeview for rank list, paged straight from the rank engine
         columns = ("Rank", "Student ID", "Name", "Roll No", "Total Marks", "Average", "Semester")
-        self.rank_tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
-        
-        # Set column headings and widths
-        self.rank_tree.heading("Rank", text="Rank")
-        self.rank_tree.heading("Student ID", text="Student ID")
-        self.rank_tree.heading("Name", text="Name")
-        self.rank_tree.heading("Roll No", text="Roll No")
-        self.rank_tree.heading("Total Marks", text="Total Marks")
-        self.rank_tree.heading("Average", text="Average")
-        self.rank_tree.heading("Semester", text="Semester")
-        
-        # Set column widths
-        self.rank_tree.column("Rank", width=50)
-        self.rank_tree.column("Student ID", width=100)
-        self.rank_tree.column("Name", width=150)
-        self.rank_tree.column("Roll No", width=100)
-        self.rank_tree.column("Total Marks", width=100)
-        self.rank_tree.column("Average", width=100)
-        self.rank_tree.column("Semester", width=100)
-        
-        # Add scrollbars
-        y_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.rank_tree.yview)
-        x_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.rank_tree.xview)
-        
-        # Configure scrollbars
-        self.rank_tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
-        
-        # Pack scrollbars and treeview
-        self.rank_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        
-        # Bind filter events
-        self.rank_semester_filter.trace('w', self.update_subject_filter)
-        self.rank_semester_filter.trace('w', self.update_rank_list)
-        self.rank_subject_filter.trace('w', self.update_rank_list)
-        self.rank_exam_type_filter.trace('w', self.update_rank_list)
+        widths = {"Rank": 50, "Name": 150}
+        self.rank_view = VirtualTreeview(main_frame, columns, widths=widths, executor=self.executor,
+                                         on_error=self._database_error("An error occurred"))
+        self.rank_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # Bind filter events; the subject reset done by update_subject_filter
+        # lands in the same query as the semester change that caused it
+        self.rank_semester_filter.trace_add('write', self.update_subject_filter)
+        self.rank_filters = FilterPipeline(self.rank_view, self._rank_filter_state,
+                                           self._query_rank_list)
+        self.rank_filters.watch(self.rank_semester_filter)
+        self.rank_filters.watch(self.rank_subject_filter)
+        self.rank_filters.watch(self.rank_exam_type_filter)
         
         # Load initial rank list
         self.update_rank_list()
 
     def update_rank_list(self, *args):
         """Update the rank list based on selected filters"""
-        # Clear existing items
-        for item in self.rank_tree.get_children():
-            self.rank_tree.delete(item)
-            
-        try:
-            # Connect to database
-            conn = sqlite3.connect('student_results.db')
-            cursor = conn.cursor()
-            
-            # Build query based on filters
-            query = """
-            WITH StudentTotals AS (
-                SELECT 
-                    r.std_id,
-                    u.full_name,
-                    r.roll_no,
-                    r.semester,
-                    r.subject,
-                    r.marks,
-                    COUNT(*) OVER (PARTITION BY r.std_id, r.semester) as subject_count
-                FROM results r
-                JOIN users u ON r.std_id = u.username
-                WHERE 1=1
-            """
-            
-            params = []
-            
-            if self.rank_semester_filter.get() != "All":
-                query += " AND r.semester = ?"
-                params.append(int(self.rank_semester_filter.get()))
-                
-            if self.rank_subject_filter.get() != "All":
-                query += " AND r.subject = ?"
-                params.append(self.rank_subject_filter.get())
-                
-            if self.rank_exam_type_filter.get() != "All":
-                query += " AND r.exam_type = ?"
-                params.append(self.rank_exam_type_filter.get())
-                
-            query += """
-            )
-            SELECT 
-                ROW_NUMBER() OVER (ORDER BY SUM(marks) DESC) as rank,
-                std_id,
-                full_name,
-                roll_no,
-                SUM(marks) as total_marks,
-                ROUND(AVG(CAST(marks AS FLOAT)), 1) as average_marks,
-                semester
-            FROM StudentTotals
-            GROUP BY std_id, full_name, roll_no, semester
-            HAVING COUNT(DISTINCT subject) = (
-                SELECT COUNT(DISTINCT subject) 
-                FROM results 
-                WHERE semester = StudentTotals.semester
-            )
-            ORDER BY total_marks DESC
-            """
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            # Insert into treeview
-            for result in results:
-                self.rank_tree.insert('', 'end', values=result)
-                
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
+        self.rank_filters.refresh()
+    
+    def apply_rank_as_of(self, event=None):
+        as_of = self._read_as_of(self.rank_as_of_var)
+        if as_of is not False:
+            self.rank_as_of = as_of
+            self.rank_filters.refresh()
+    
+    def _rank_filter_state(self):
+        """Effective rank filter as (semester, exam_type, subject, as_of)"""
+        # Translate "All" filters into None for the ranking query
+        semester = self.rank_semester_filter.get()
+        subject = self.rank_subject_filter.get()
+        exam_type = self.rank_exam_type_filter.get()
+        return (
+            None if semester == "All" else int(semester),
+            None if exam_type == "All" else exam_type,
+            None if subject == "All" else subject,
+            self.rank_as_of
+        )
+    
+    def _query_rank_list(self, state):
+        semester, exam_type, subject, as_of = state
+        filters = dict(semester=semester, exam_type=exam_type, subject=subject)
+        
+        # Loading an engine for a new filter reads the results table off the UI thread
+        self.executor.submit('rank', self._load_rank_engine, filters, self.rank_view.page_size, as_of,
+                             on_done=self._show_rank_engine,
+                             on_error=self._database_error("An error occurred"))
+    
+    def _load_rank_engine(self, filters, page_size, as_of=None):
+        if as_of is not None:
+            # A snapshot never changes, so its engine is built for this view only
+            with connection() as conn:
+                engine = load_rank_engine(conn, as_of_seq=history_seq(conn, as_of), **filters)
+        else:
+            # The engine is loaded once per filter and then updated in place
+            engine = get_rank_engines().get(**filters)
+        return engine, len(engine), engine.slice(0, page_size)
+    
+    def _show_rank_engine(self, loaded):
+        if not self.rank_view.winfo_exists():
+            return
+        engine, total, first_page = loaded
+        self.rank_view.set_source(RankEngineSource(engine), first_page=first_page, total=total)
 
     def show_rank_list(self):
         """Show the rank list tab"""
-        self.clear_content()
-        self.setup_rank_list_tab()
+        self.show_tab('rank', self.setup_rank_list_tab, refresh=self.update_rank_list)
         # Update button states
         self.add_result_btn.state(['!disabled'])
         self.view_result_btn.state(['!disabled'])
@@ -1092,110 +1337,122 @@ class TeacherDashboard:
 
     def export_rank_list_csv(self):
         """Export rank list to CSV file"""
-        if not self.rank_tree.get_children():
+        if not self.rank_view.total:
             messagebox.showinfo("Export", "No data to export!")
             return
             
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension='.csv',
-                filetypes=[("CSV files", '*.csv')],
-                title="Export Rank List"
-            )
-            
-            if filename:
-                with open(filename, 'w', newline='') as csvfile:
-                    writer = csv.writer(csvfile)
-                    
-                    # Write headers
-                    headers = [self.rank_tree.heading(col)['text'] for col in self.rank_tree['columns']]
-                    writer.writerow(headers)
-                    
-                    # Write filter information
-                    writer.writerow(['Filters'])
-                    writer.writerow(['Semester', self.rank_semester_filter.get()])
-                    writer.writerow(['Subject', self.rank_subject_filter.get()])
-                    writer.writerow(['Exam Type', self.rank_exam_type_filter.get()])
-                    writer.writerow([])  # Empty row for separation
-                    
-                    # Write data
-                    for item in self.rank_tree.get_children():
-                        row = self.rank_tree.item(item)['values']
-                        writer.writerow(row)
-                        
-                messagebox.showinfo("Export Successful", f"Rank list exported to {filename}")
-                
-        except Exception as e:
-            messagebox.showerror("Export Error", f"An error occurred while exporting: {str(e)}")
+        filename = filedialog.asksaveasfilename(
+            defaultextension='.csv',
+            filetypes=[("CSV files", '*.csv'), ("Gzipped CSV files", '*.csv.gz')],
+            title="Export Rank List"
+        )
+        
+        if filename:
+            # Write filter information between the headers and the data
+            preamble = [
+                ['Filters'],
+                ['Semester', self.rank_semester_filter.get()],
+                ['Subject', self.rank_subject_filter.get()],
+                ['Exam Type', self.rank_exam_type_filter.get()],
+                ['As of', self._as_of_label(self.rank_as_of)],
+                []  # Empty row for separation
+            ]
+            self._start_export(filename, list(self.rank_view.columns),
+                               self.rank_view.source.iter_rows(), preamble)
 
     def export_rank_list_pdf(self):
         """Export rank list to PDF file"""
-        if not self.rank_tree.get_children():
+        if not self.rank_view.total:
             messagebox.showinfo("Export", "No data to export!")
             return
             
-        try:
-            filename = filedialog.asksaveasfilename(
-                defaultextension='.pdf',
-                filetypes=[("PDF files", '*.pdf')],
-                title="Export Rank List"
-            )
+        filename = filedialog.asksaveasfilename(
+            defaultextension='.pdf',
+            filetypes=[("PDF files", '*.pdf')],
+            title="Export Rank List"
+        )
+        
+        if filename:
+            # Add filter information
+            filters = [
+                ("Semester", self.rank_semester_filter.get()),
+                ("Subject", self.rank_subject_filter.get()),
+                ("Exam Type", self.rank_exam_type_filter.get()),
+                ("As of", self._as_of_label(self.rank_as_of)),
+            ]
+            # reportlab is only loaded once a PDF is first exported
+            from reports import RankListPdf
+            total = self.rank_view.total
+            pages = RankListPdf.estimated_pages(total)
+            dialog = ProgressDialog(self.root, "Export Rank List", f"Laying out {total} students...",
+                                    maximum=pages)
             
-            if filename:
-                # Create PDF document
-                doc = SimpleDocTemplate(filename, pagesize=letter)
-                elements = []
-                
-                # Add title
-                title_style = ParagraphStyle(
-                    'CustomTitle',
-                    parent=getSampleStyleSheet()['Title'],
-                    fontSize=16,
-                    spaceAfter=30
-                )
-                elements.append(Paragraph("Rank List Report", title_style))
-                
-                # Add filter information
-                filter_style = ParagraphStyle(
-                    'FilterStyle',
-                    parent=getSampleStyleSheet()['Normal'],
-                    fontSize=10,
-                    spaceAfter=10
-                )
-                elements.append(Paragraph(f"Semester: {self.rank_semester_filter.get()}", filter_style))
-                elements.append(Paragraph(f"Subject: {self.rank_subject_filter.get()}", filter_style))
-                elements.append(Paragraph(f"Exam Type: {self.rank_exam_type_filter.get()}", filter_style))
-                elements.append(Spacer(1, 20))
-                
-                # Create table data
-                data = [[self.rank_tree.heading(col)['text'] for col in self.rank_tree['columns']]]
-                for item in self.rank_tree.get_children():
-                    data.append(self.rank_tree.item(item)['values'])
-                
-                # Create table
-                table = Table(data)
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 12),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 1), (-1, -1), 10),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                elements.append(table)
-                
-                # Build PDF
-                doc.build(elements)
-                messagebox.showinfo("Export Successful", f"Rank list exported to {filename}")
-                
-        except Exception as e:
-            messagebox.showerror("Export Error", f"An error occurred while exporting: {str(e)}")
+            def progress(page):
+                self.executor.post(dialog.update_progress, page, f"Page {page} of about {pages}")
+            
+            pdf = RankListPdf(filename, self.rank_view.columns, self.rank_view.source.iter_rows(),
+                              filters, progress=progress, cancelled=dialog.cancelled)
+            self.executor.submit(None, pdf.build,
+                                 on_done=lambda page_count: self._on_rank_pdf_done(dialog, filename, page_count),
+                                 on_error=lambda e: self._on_rank_pdf_failed(dialog, filename, e))
+    
+    def _on_rank_pdf_done(self, dialog, filename, page_count):
+        dialog.close()
+        messagebox.showinfo("Export Successful", f"Rank list exported to {filename} ({page_count} pages)")
+    
+    def _on_rank_pdf_failed(self, dialog, filename, error):
+        from reports import ExportCancelled
+        dialog.close()
+        if isinstance(error, ExportCancelled):
+            # Do not leave a truncated PDF behind
+            if os.path.exists(filename):
+                os.remove(filename)
+        else:
+            messagebox.showerror("Export Error", f"An error occurred while exporting: {str(error)}")
+
+    def generate_report_cards(self):
+        """Generate a PDF report card for every student, for the selected semester and exam"""
+        directory = filedialog.askdirectory(title="Save Report Cards To")
+        if not directory:
+            return
+        bundle = messagebox.askyesnocancel("Report Cards",
+                                           "Bundle the report cards into a single zip file?")
+        if bundle is None:
+            return
+        output = os.path.join(directory, "report_cards.zip") if bundle else directory
+        
+        semester, exam_type, *_ = self._rank_filter_state()
+        dialog = ProgressDialog(self.root, "Report Cards", "Loading results...")
+        
+        def progress(done, total):
+            self.executor.post(dialog.update_progress, done * 100 / total,
+                               f"Report card {done} of {total}")
+        
+        self.executor.submit(None, self._generate_report_cards, semester, exam_type, output,
+                             progress, dialog.cancelled,
+                             on_done=lambda result: self._on_report_cards_done(dialog, result),
+                             on_error=lambda e: self._on_report_cards_failed(dialog, e))
+    
+    def _generate_report_cards(self, semester, exam_type, output, progress, cancelled):
+        from report_cards import load_report_cards, generate_report_cards
+        with connection() as conn:
+            cards = load_report_cards(conn, semester=semester, exam_type=exam_type)
+        if not cards:
+            return None
+        return generate_report_cards(cards, output, progress=progress, cancelled=cancelled)
+    
+    def _on_report_cards_done(self, dialog, result):
+        dialog.close()
+        if result is None:
+            messagebox.showinfo("Report Cards", "No results found for the selected filters!")
+        else:
+            messagebox.showinfo("Report Cards", result.summary())
+    
+    def _on_report_cards_failed(self, dialog, error):
+        from reports import ExportCancelled
+        dialog.close()
+        if not isinstance(error, ExportCancelled):
+            messagebox.showerror("Export Error", f"An error occurred while generating report cards: {str(error)}")
 
     def fetch_student_details(self, event=None):
         """Fetch student details when student ID is entered"""
@@ -1203,9 +1460,14 @@ class TeacherDashboard:
         if not std_id:
             return
             
-        try:
-            # Connect to database
-            conn = sqlite3.connect('student_results.db')
+        # Look the student up off the UI thread; the latest ID typed wins
+        self.executor.submit('student', self._lookup_student, std_id,
+                             on_done=self._fill_student_details,
+                             on_error=self._database_error("Failed to fetch student details"))
+    
+    def _lookup_student(self, std_id):
+        """Return (full_name, latest roll_no) for a student, or None (worker thread)"""
+        with connection() as conn:
             cursor = conn.cursor()
             
             # First try to get details from users table
@@ -1214,32 +1476,34 @@ class TeacherDashboard:
             WHERE username = ? AND role = 'student'
             ''', (std_id,))
             user_result = cursor.fetchone()
+            if not user_result:
+                return None
             
-            if user_result:
-                # Get the most recent roll number from results
-                cursor.execute('''
-                SELECT roll_no FROM results 
-                WHERE std_id = ? 
-                ORDER BY added_at DESC LIMIT 1
-                ''', (std_id,))
-                roll_result = cursor.fetchone()
-                
-                # Update the entry fields
-                self.name_entry.delete(0, tk.END)
-                self.name_entry.insert(0, user_result[0])
-                
-                if roll_result:
-                    self.roll_no_entry.delete(0, tk.END)
-                    self.roll_no_entry.insert(0, roll_result[0])
-            
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", f"Failed to fetch student details: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
+            # Get the most recent roll number from results
+            cursor.execute('''
+            SELECT roll_no FROM results 
+            WHERE std_id = ? AND deleted_at IS NULL
+            ORDER BY added_at DESC LIMIT 1
+            ''', (std_id,))
+            roll_result = cursor.fetchone()
+        return user_result[0], roll_result[0] if roll_result else None
+    
+    def _fill_student_details(self, details):
+        if details is None or not self.name_entry.winfo_exists():
+            return
+        full_name, roll_no = details
+        
+        # Update the entry fields
+        self.name_entry.delete(0, tk.END)
+        self.name_entry.insert(0, full_name)
+        
+        if roll_no is not None:
+            self.roll_no_entry.delete(0, tk.END)
+            self.roll_no_entry.insert(0, roll_no)
 
 # To test the dashboard independently
 if __name__ == "__main__":
+    from app import AppShell
     root = tk.Tk()
-    app = TeacherDashboard(root, "admin")
+    AppShell(root).open_dashboard("teacher", "admin")
     root.mainloop()
\ No newline at end of file
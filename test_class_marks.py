@@ -0,0 +1,49 @@
+import tkinter as tk
+
+import pytest
+
+from database import class_marks, save_results
+from widgets import EditableGrid
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+def test_grid_keeps_fixed_values_as_added(root):
+    grid = EditableGrid(root, ("Student ID", "Name", "Roll No"), validate=int)
+    grid.set_columns(("OS",))
+    grid.add_row("S1", ("S1", "1234", "007"), {"OS": 50})
+    assert grid.row("S1") == {"Student ID": "S1", "Name": "1234", "Roll No": "007"}
+
+
+def test_class_marks_save_keeps_roll_no(root, pool):
+    grid = EditableGrid(root, ("Student ID", "Name", "Roll No"), validate=int)
+    grid.set_columns(("OS", "COA"))
+    grid.add_row("S1", ("S1", "Asha", "007"))
+    grid._set_cell("S1", "OS", 81)
+
+    # As TeacherDashboard.save_class_marks builds the rows it saves
+    rows = []
+    for (std_id, subject), marks in grid.dirty_cells().items():
+        row = grid.row(std_id)
+        rows.append((std_id, row["Name"], row["Roll No"], subject, marks, 4, "IA1", "admin"))
+    with pool.connection() as conn:
+        save_results(conn, rows)
+        assert class_marks(conn, 4, "IA1") == [("S1", "Asha", "007", {"OS": 81})]
+
+
+def test_save_results_keeps_leading_zero_roll_no(pool):
+    with pool.connection() as conn:
+        save_results(conn, [("S1", "Asha", "007", "OS", 81, 4, "IA1", "admin")])
+        # Saving the same values again is not a change
+        save_results(conn, [("S1", "Asha", "007", "OS", 81, 4, "IA1", "admin")])
+        assert conn.execute("SELECT roll_no FROM results").fetchall() == [("007",)]
+        assert conn.execute("SELECT COUNT(*) FROM results_history").fetchone()[0] == 1
@@ -0,0 +1,95 @@
+import change_feed
+from change_feed import ChangeFeed
+from database import (ResultQuery, delete_results, history_seq, history_since, latest_seq,
+                      save_results, search_results, snapshot_sql)
+
+SEED_ROWS = [
+    ("S1", "Asha", "001", "OS", 70, 4, "IA1", "admin"),
+    ("S2", "Ravi", "002", "OS", 60, 4, "IA1", "admin"),
+]
+
+
+def change_later(pool):
+    """Correct S1, delete S2 and add S3; returns the seq before the changes."""
+    with pool.connection() as conn:
+        seq = latest_seq(conn)
+        save_results(conn, [("S1", "Asha", "001", "OS", 75, 4, "IA1", "admin"),
+                            ("S3", "Meera", "003", "OS", 90, 4, "IA1", "admin")])
+        delete_results(conn, [("S2", "OS", 4, "IA1")])
+    return seq
+
+
+def test_result_query_reads_a_point_in_time(pool):
+    seq = change_later(pool)
+    then = ResultQuery(semester=4, pool=pool, as_of_seq=seq)
+    assert then.count() == 2
+    assert [(row[1], row[4]) for row in then.fetch(0, 10)] == [("S1", 70), ("S2", 60)]
+    now = ResultQuery(semester=4, pool=pool)
+    assert [(row[1], row[4]) for row in now.fetch(0, 10)] == [("S1", 75), ("S3", 90)]
+
+
+def test_search_results_reads_a_point_in_time(pool):
+    seq = change_later(pool)
+    with pool.connection() as conn:
+        assert [(row[1], row[4]) for row in search_results(conn, "", as_of_seq=seq)] == \
+            [("S1", 70), ("S2", 60)]
+
+
+def test_history_since_and_snapshot_as_of_a_time(pool):
+    change_later(pool)
+    with pool.connection() as conn:
+        # Seed rows at t=100; the correction, insert and delete at t=200, 300, 400
+        conn.execute("UPDATE results_history SET changed_at = 100 WHERE seq <= 2")
+        conn.execute("UPDATE results_history SET changed_at = 200 WHERE seq = 3")
+        conn.execute("UPDATE results_history SET changed_at = 300 WHERE seq = 4")
+        conn.execute("UPDATE results_history SET changed_at = 400 WHERE seq = 5")
+        assert [(seq, changed_at, std_id, marks)
+                for seq, changed_at, std_id, _, _, _, marks, _ in history_since(conn, 250)] == \
+            [(4, 300, "S3", 90), (5, 400, "S2", None)]
+
+        assert history_seq(conn, 50) == 0
+        assert history_seq(conn, 350) == 4
+        table, params = snapshot_sql(history_seq(conn, 350), semester=4)
+        assert conn.execute(f"SELECT std_id, marks FROM {table} ORDER BY std_id", params).fetchall() == \
+            [("S1", 75), ("S2", 60), ("S3", 90)]
+
+
+class Root:
+    def after(self, delay, callback):
+        return "after"
+
+    def after_cancel(self, after):
+        pass
+
+
+class Executor:
+    """Runs submitted work at once, as if the worker finished straight away."""
+
+    def submit(self, channel, func, *args, on_done=None, on_error=None, quiet=False):
+        on_done(func(*args))
+
+
+def feed_for(monkeypatch, pool, max_changes):
+    monkeypatch.setattr(change_feed, "connection", pool.connection)
+    delivered = []
+    return ChangeFeed(Root(), Executor(), delivered.append, max_changes=max_changes), delivered
+
+
+def test_change_feed_delivers_changes(monkeypatch, pool):
+    feed, delivered = feed_for(monkeypatch, pool, max_changes=10)
+    change_later(pool)
+    feed.poll()
+    assert [(change[1], change[5]) for change in delivered[0]] == \
+        [("S1", 75), ("S3", 90), ("S2", None)]
+    feed.poll()
+    assert len(delivered) == 1  # Nothing new
+
+
+def test_change_feed_asks_for_a_reload_past_max_changes(monkeypatch, pool):
+    feed, delivered = feed_for(monkeypatch, pool, max_changes=2)
+    change_later(pool)
+    feed.poll()
+    assert delivered == [None]
+    with pool.connection() as conn:
+        assert feed.last_seq == latest_seq(conn)
+    assert feed.stats['reloads'] == 1
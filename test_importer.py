@@ -0,0 +1,140 @@
+import csv
+
+import pytest
+
+import importer
+from importer import REQUIRED_COLUMNS, CsvImporter, row_errors, validate_file, validate_row
+
+VALID = ["S1", "Asha", "001", "OS", "81", "4", "IA1"]
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(REQUIRED_COLUMNS)
+        writer.writerows(rows)
+    return str(path)
+
+
+def with_value(column, value):
+    row = list(VALID)
+    row[REQUIRED_COLUMNS.index(column)] = value
+    return row
+
+
+def test_a_valid_row_has_no_errors():
+    assert row_errors(VALID) == []
+    assert validate_row(VALID) == ("S1", "Asha", "001", "OS", 81.0, 4, "IA1")
+
+
+@pytest.mark.parametrize("column, value, reason", [
+    ("std_id", " ", "Missing std_id"),
+    ("roll_no", "", "Missing roll_no"),
+    ("semester", "x", "Invalid semester: x"),
+    ("semester", "9", "Invalid semester: 9"),
+    ("exam_type", "IA3", "Invalid exam type: IA3"),
+    ("marks", "abc", "Invalid marks: abc"),
+    ("marks", "101", "Invalid marks: 101.0"),
+])
+def test_row_errors_name_the_column(column, value, reason):
+    assert row_errors(with_value(column, value)) == [(column, reason)]
+
+
+def test_subject_must_be_taught_in_the_semester():
+    [(column, reason)] = row_errors(with_value("semester", "3"))
+    assert column == "subject"
+    assert reason == "Subject OS is not taught in semester 3"
+    [(column, reason)] = row_errors(with_value("subject", "ART"))
+    assert reason.startswith("Invalid subject: ART. Must be one of: ")
+
+
+def test_validate_row_reports_every_problem():
+    row = with_value("marks", "-1")
+    row[REQUIRED_COLUMNS.index("exam_type")] = "X"
+    with pytest.raises(ValueError, match="^Invalid exam type: X; Invalid marks: -1.0$"):
+        validate_row(row)
+
+
+def test_an_invalid_row_leaves_the_database_untouched(tmp_path, pool):
+    path = write_csv(tmp_path / "results.csv", [VALID, with_value("marks", "101")])
+    with pytest.raises(ValueError, match="row 3 for S1"):
+        CsvImporter("admin", pool=pool).import_file(path)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 0
+
+
+def test_partial_accept_imports_only_the_valid_rows(tmp_path, pool):
+    path = write_csv(tmp_path / "results.csv", [
+        VALID,
+        ["S2", "Ravi", "002", "OS", "abc", "4", "IA1"],
+        ["S2", "Ravi", "002", "COA", "65", "4", "IA1"],
+        ["S3", "Meera", "003", "OS", "90", "4", "IA1"],
+    ])
+    report = validate_file(path)
+    assert report.error_lines == {3}
+    assert (report.rows, report.valid_rows) == (4, 3)
+
+    result = CsvImporter("admin", pool=pool).import_file(path, skip_lines=report.error_lines)
+    assert (result.rows, result.inserted, result.updated, result.unchanged) == (3, 3, 0, 0)
+    assert result.accounts_created == 3
+    with pool.connection() as conn:
+        assert conn.execute("SELECT std_id, subject FROM results ORDER BY std_id, subject").fetchall() == \
+            [("S1", "OS"), ("S2", "COA"), ("S3", "OS")]
+
+
+def history_count(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM results_history").fetchone()[0]
+
+
+def test_importing_the_same_file_again_changes_nothing(tmp_path, pool):
+    path = write_csv(tmp_path / "results.csv", [
+        VALID,
+        ["S2", "Ravi", "002", "OS", "65", "4", "IA1"],
+        ["S2", "Ravi", "002", "COA", "70", "4", "IA1"],
+    ])
+    importer = CsvImporter("admin", pool=pool)
+    first = importer.import_file(path)
+    assert (first.inserted, first.updated, first.unchanged) == (3, 0, 0)
+    logged = history_count(pool)
+
+    again = importer.import_file(path)
+    assert (again.rows, again.inserted, again.updated, again.unchanged) == (3, 0, 0, 3)
+    assert again.accounts_created == 0
+    assert not again.changed
+    assert history_count(pool) == logged
+
+
+def test_a_changed_row_is_the_only_one_rewritten(tmp_path, pool):
+    importer = CsvImporter("admin", pool=pool)
+    importer.import_file(write_csv(tmp_path / "first.csv", [VALID, with_value("subject", "COA")]))
+    logged = history_count(pool)
+
+    result = importer.import_file(write_csv(tmp_path / "second.csv",
+                                            [with_value("marks", "85"), with_value("subject", "COA")]))
+    assert (result.inserted, result.updated, result.unchanged) == (0, 1, 1)
+    assert result.changed
+    assert history_count(pool) == logged + 1
+
+
+def test_large_files_validate_across_processes_with_the_same_report(tmp_path, monkeypatch):
+    rows = []
+    bad_lines = set()
+    for i in range(110_000):
+        row = [f"S{i:06d}", f"Student {i}", f"{i:06d}", "OS", str(i % 101), "4", "IA1"]
+        if i % 9973 == 0 or i % 7919 == 0:
+            row[4 if i % 9973 == 0 else 6] = "bad"
+            bad_lines.add(i + 2)  # Line 1 is the header
+        rows.append(row)
+    path = write_csv(tmp_path / "large.csv", rows)
+    assert (tmp_path / "large.csv").stat().st_size > importer.PARALLEL_VALIDATION_BYTES
+
+    inline = validate_file(path, workers=1, chunk_size=8000)
+    # More than 4 MB picks the process pool on its own, one worker per core
+    monkeypatch.setattr(importer.os, "cpu_count", lambda: 2)
+    pooled = validate_file(path, chunk_size=8000)
+    assert (inline.workers, pooled.workers) == (1, 2)
+    assert pooled.rows == inline.rows == 110_000
+    assert sorted(pooled.errors) == sorted(inline.errors)
+    assert pooled.error_lines == inline.error_lines
+    assert inline.error_lines == bad_lines
@@ -0,0 +1,160 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import database
+from database import (MIGRATIONS, SCHEMA_VERSION, ConnectionPool, delete_results, migrate, save_results,
+                      schema_version)
+
+BASELINE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_results.db")
+
+
+def totals(conn):
+    return conn.execute('''
+    SELECT std_id, semester, exam_type, total, subject_count FROM student_semester_totals
+    WHERE subject_count > 0 ORDER BY std_id, semester, exam_type
+    ''').fetchall()
+
+
+def grouped_results(conn):
+    return conn.execute('''
+    SELECT std_id, semester, exam_type, SUM(marks), COUNT(*) FROM results
+    WHERE deleted_at IS NULL
+    GROUP BY std_id, semester, exam_type ORDER BY std_id, semester, exam_type
+    ''').fetchall()
+
+
+def grouped_results_before_soft_delete(conn):
+    return conn.execute('''
+    SELECT std_id, semester, exam_type, SUM(marks), COUNT(*) FROM results
+    GROUP BY std_id, semester, exam_type ORDER BY std_id, semester, exam_type
+    ''').fetchall()
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """A copy of the committed database, as it was before any migration."""
+    path = tmp_path / "baseline.db"
+    shutil.copy(BASELINE_DB, path)
+    pool = ConnectionPool(str(path))
+    yield pool
+    pool.close_all()
+
+
+def test_fresh_database_migrates_to_the_latest_version(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "fresh.db"))
+    with pool.connection() as conn:
+        assert migrate(conn)
+        assert schema_version(conn) == SCHEMA_VERSION == 7
+        assert "deleted_at" in columns(conn, "results")
+        for table in ("users", "student_semester_totals", "student_search", "results_history"):
+            assert columns(conn, table)
+        # Already current
+        assert not migrate(conn)
+    pool.close_all()
+
+
+def test_baseline_database_keeps_its_results(baseline):
+    with baseline.connection() as conn:
+        assert schema_version(conn) == 0
+        before = conn.execute("SELECT * FROM results ORDER BY std_id, subject, semester, exam_type").fetchall()
+        assert before
+
+        assert migrate(conn)
+        assert schema_version(conn) == 7
+        after = conn.execute('''
+        SELECT std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by, added_at
+        FROM results ORDER BY std_id, subject, semester, exam_type
+        ''').fetchall()
+        assert after == before
+        assert conn.execute("SELECT COUNT(*) FROM results WHERE deleted_at IS NOT NULL").fetchone()[0] == 0
+        # Backfilled: the history starts with every live result
+        assert conn.execute("SELECT COUNT(*) FROM results_history").fetchone()[0] == len(before)
+        assert totals(conn) == grouped_results(conn)
+
+
+def test_totals_follow_every_kind_of_write(baseline):
+    with baseline.connection() as conn:
+        migrate(conn)
+        std_id, subject, semester, exam_type = conn.execute(
+            "SELECT std_id, subject, semester, exam_type FROM results LIMIT 1").fetchone()
+        save_results(conn, [
+            (std_id, "Renamed", "99", subject, 12, semester, exam_type, "admin"),
+            ("NEW1", "New Student", "100", "OS", 77, 4, "IA1", "admin"),
+            ("NEW1", "New Student", "100", "COA", 66, 4, "IA1", "admin"),
+        ])
+        assert totals(conn) == grouped_results(conn)
+
+        delete_results(conn, [("NEW1", "OS", 4, "IA1")], soft=True)
+        assert totals(conn) == grouped_results(conn)
+        # Purging the soft-deleted row must not subtract it again
+        conn.execute("DELETE FROM results WHERE deleted_at IS NOT NULL")
+        assert totals(conn) == grouped_results(conn)
+
+        delete_results(conn, [(std_id, subject, semester, exam_type)])
+        # Bringing back a soft-deleted result replaces it
+        delete_results(conn, [("NEW1", "COA", 4, "IA1")], soft=True)
+        save_results(conn, [("NEW1", "New Student", "100", "COA", 70, 4, "IA1", "admin")])
+        assert totals(conn) == grouped_results(conn)
+
+
+def test_legacy_results_are_rebuilt_with_semester_and_exam_type(tmp_path):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+    CREATE TABLE results (
+        std_id TEXT,
+        student_name TEXT NOT NULL,
+        roll_no TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        marks INTEGER NOT NULL,
+        added_by TEXT NOT NULL,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (std_id, subject)
+    );
+    INSERT INTO results (std_id, student_name, roll_no, subject, marks, added_by)
+    VALUES ('S1', 'Asha', '001', 'DSA', 70, 'admin'), ('S1', 'Asha', '001', 'OS', 80, 'admin');
+    ''')
+    conn.close()
+
+    pool = ConnectionPool(str(path))
+    with pool.connection() as conn:
+        migrate(conn)
+        assert schema_version(conn) == 7
+        assert conn.execute(
+            "SELECT subject, semester, exam_type, marks FROM results ORDER BY subject").fetchall() == \
+            [("DSA", 3, "SEM", 70), ("OS", 4, "SEM", 80)]
+        assert "results_legacy" not in [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")]
+        assert totals(conn) == grouped_results(conn)
+    pool.close_all()
+
+
+def test_migrations_resume_from_the_stored_version(monkeypatch, baseline):
+    # Stop after the totals table, as a database from that release would be
+    monkeypatch.setattr(database, "MIGRATIONS", MIGRATIONS[:3])
+    monkeypatch.setattr(database, "SCHEMA_VERSION", 3)
+    with baseline.connection() as conn:
+        assert migrate(conn)
+        assert schema_version(conn) == 3
+        assert "deleted_at" not in columns(conn, "results")
+        conn.execute('''
+        INSERT INTO results (std_id, student_name, roll_no, subject, marks, semester, exam_type, added_by)
+        VALUES ('NEW1', 'New Student', '100', 'OS', 77, 4, 'IA1', 'admin')
+        ''')
+        conn.commit()
+        assert totals(conn) == grouped_results_before_soft_delete(conn)
+
+        monkeypatch.undo()
+        assert migrate(conn)
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert "deleted_at" in columns(conn, "results")
+        assert totals(conn) == grouped_results(conn)
+        assert conn.execute("SELECT COUNT(*) FROM results_history").fetchone()[0] == \
+            conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
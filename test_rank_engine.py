@@ -0,0 +1,125 @@
+import pytest
+
+import rank_engine
+from database import SUBJECTS_BY_SEM, latest_seq, save_results
+from rank_engine import RankEngine, RankEngineRegistry, load_rank_engine
+
+SEED_ROWS = [
+    ("S1", "Asha", "001", "OS", 70, 4, "IA1", "admin"),
+    ("S2", "Ravi", "002", "OS", 60, 4, "IA1", "admin"),
+]
+
+# OS marks in semester 4 IA1: two ties, ranked by std_id within each
+TIED_MARKS = {"S1": 90, "S2": 90, "S3": 80, "S4": 70, "S5": 70, "S6": 50}
+
+
+@pytest.fixture
+def registry_pool(monkeypatch, pool):
+    """The test database, used by the registry's own loads."""
+    monkeypatch.setattr(rank_engine, "connection", pool.connection)
+    return pool
+
+
+def tied_engine():
+    engine = RankEngine(4, "IA1", "OS")
+    for std_id, marks in TIED_MARKS.items():
+        engine.record(std_id, f"Student {std_id}", std_id[1:], "OS", marks, 4, "IA1")
+    return engine
+
+
+def test_competition_ranks_skip_past_ties():
+    engine = tied_engine()
+    assert [(row[0], row[1]) for row in engine.rows()] == \
+        [(1, "S1"), (1, "S2"), (3, "S3"), (4, "S4"), (4, "S5"), (6, "S6")]
+
+
+def test_dense_ranks_do_not_skip():
+    engine = tied_engine()
+    assert [(row[0], row[1]) for row in engine.rows("dense")] == \
+        [(1, "S1"), (1, "S2"), (2, "S3"), (3, "S4"), (3, "S5"), (4, "S6")]
+
+
+@pytest.mark.parametrize("method", ["competition", "dense"])
+@pytest.mark.parametrize("offset", [0, 1, 2, 4, 5])
+def test_slices_agree_with_rank_of(method, offset):
+    # Offsets 1 and 4 start inside a tied bucket
+    engine = tied_engine()
+    rows = engine.slice(offset, 3, method)
+    assert rows == engine.rows(method)[offset:offset + 3]
+    for rank, std_id, *_ in rows:
+        assert engine.rank_of(std_id, 4, method) == rank
+
+
+def test_pages_and_top():
+    engine = tied_engine()
+    everything = engine.rows()
+    assert engine.top(3) == everything[:3]
+    assert engine.page(1, 2) == everything[2:4]
+    assert engine.page(2, 4) == []
+    assert engine.slice(4, 10) == everything[4:]
+
+
+def test_removing_a_subject_unranks_the_student():
+    engine = RankEngine(4, "IA1")
+    for std_id in ("S1", "S2"):
+        for subject in SUBJECTS_BY_SEM[4]:
+            engine.record(std_id, std_id, std_id[1:], subject, 80 if std_id == "S1" else 60, 4, "IA1")
+    assert [row[1] for row in engine.rows()] == ["S1", "S2"]
+
+    assert engine.remove("S1", SUBJECTS_BY_SEM[4][0], 4, "IA1")
+    assert engine.rank_of("S1", 4) is None
+    assert len(engine) == 1
+    assert [(row[0], row[1]) for row in engine.rows()] == [(1, "S2")]
+
+    # Marked again, S1 is back in first place
+    engine.record("S1", "S1", "1", SUBJECTS_BY_SEM[4][0], 80, 4, "IA1")
+    assert engine.rank_of("S1", 4) == 1
+
+
+def test_engine_loads_results_as_of_a_history_entry(pool):
+    with pool.connection() as conn:
+        seq = latest_seq(conn)
+        save_results(conn, [("S2", "Ravi", "002", "OS", 95, 4, "IA1", "admin")])
+        then = load_rank_engine(conn, 4, "IA1", "OS", as_of_seq=seq)
+        now = load_rank_engine(conn, 4, "IA1", "OS")
+    assert [(row[1], row[4]) for row in then.rows()] == [("S1", 70), ("S2", 60)]
+    assert [(row[1], row[4]) for row in now.rows()] == [("S2", 95), ("S1", 70)]
+
+
+def load_with_write(monkeypatch, pool, registry, rows):
+    """Make the next engine load see the database before rows are saved and recorded."""
+    def load(conn, *args):
+        engine = load_rank_engine(conn, *args)
+        with pool.connection() as other:
+            save_results(other, rows)
+        registry.record_results(rows)
+        return engine
+    monkeypatch.setattr(rank_engine, "load_rank_engine", load)
+
+
+def fresh_rows(pool, *filters):
+    with pool.connection() as conn:
+        return load_rank_engine(conn, *filters).rows()
+
+
+def test_engine_loading_keeps_writes_made_meanwhile(monkeypatch, registry_pool):
+    registry = RankEngineRegistry()
+    load_with_write(monkeypatch, registry_pool, registry,
+                    [("S2", "Ravi", "002", "OS", 90, 4, "IA1", "admin"),
+                     ("S3", "Meera", "003", "OS", 80, 4, "IA1", "admin")])
+    engine = registry.get(4, "IA1", "OS")
+    assert [row[1] for row in engine.rows()] == ["S2", "S3", "S1"]
+    assert engine.rows() == fresh_rows(registry_pool, 4, "IA1", "OS")
+    assert registry.get(4, "IA1", "OS") is engine
+
+
+def test_engine_invalidated_while_loading_is_not_kept(monkeypatch, registry_pool):
+    registry = RankEngineRegistry()
+
+    def load(conn, *args):
+        registry.invalidate()
+        return load_rank_engine(conn, *args)
+    monkeypatch.setattr(rank_engine, "load_rank_engine", load)
+    engine = registry.get(4, "IA1", "OS")
+    monkeypatch.setattr(rank_engine, "load_rank_engine", load_rank_engine)
+    assert registry.get(4, "IA1", "OS") is not engine
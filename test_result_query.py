@@ -0,0 +1,56 @@
+from database import ResultQuery, history_after, latest_seq, save_results
+
+SEED_ROWS = [
+    ("S1", "Asha", "003", "OS", 70, 4, "IA1", "admin"),
+    ("S2", "Ravi", "001", "OS", 60, 4, "IA1", "admin"),
+    ("S3", "Meera", "002", "OS", 80, 4, "IA1", "admin"),
+]
+
+
+def changes_after(pool, rows):
+    with pool.connection() as conn:
+        seq = latest_seq(conn)
+        save_results(conn, rows)
+        return history_after(conn, seq, 100)
+
+
+def test_history_after_reports_previous_values(pool):
+    changes = changes_after(pool, [("S1", "Asha", "004", "OS", 75, 4, "IA1", "admin"),
+                                   ("S4", "Kiran", "005", "OS", 50, 4, "IA1", "admin")])
+    assert [change[8] for change in changes] == [(70, "003"), None]
+
+
+def test_roll_no_sort_reorders_on_roll_no_change(pool):
+    query = ResultQuery(semester=4, pool=pool)
+    assert query.sort_index == 2  # roll_no by default
+    [change] = changes_after(pool, [("S1", "Asha", "000", "OS", 70, 4, "IA1", "admin")])
+    assert query.moves(change)
+    assert [row[1] for row in query.fetch(0, 10)] == ["S1", "S2", "S3"]
+
+
+def test_roll_no_sort_keeps_order_on_marks_change(pool):
+    query = ResultQuery(semester=4, pool=pool)
+    [change] = changes_after(pool, [("S1", "Asha", "003", "OS", 20, 4, "IA1", "admin")])
+    assert not query.moves(change)
+
+
+def test_name_sort_reorders_on_insert(pool):
+    query = ResultQuery(semester=4, pool=pool)
+    query.sort(0)
+    [change] = changes_after(pool, [("S4", "Bala", "004", "OS", 50, 4, "IA1", "admin")])
+    assert query.moves(change)
+    [update] = changes_after(pool, [("S4", "Bala", "004", "OS", 55, 4, "IA1", "admin")])
+    assert not query.moves(update)
+
+
+def test_marks_sort_reorders_on_marks_change(pool):
+    query = ResultQuery(semester=4, pool=pool)
+    query.sort(4, descending=True)
+    [change] = changes_after(pool, [("S2", "Ravi", "001", "OS", 90, 4, "IA1", "admin")])
+    assert query.moves(change)
+
+
+def test_changes_outside_the_filter_never_reorder(pool):
+    query = ResultQuery(semester=3, pool=pool)
+    [change] = changes_after(pool, [("S5", "Dev", "006", "OS", 50, 4, "IA1", "admin")])
+    assert not query.moves(change)
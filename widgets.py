@@ -0,0 +1,976 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+from bisect import bisect_left
+from collections import OrderedDict
+
+
+def release_variables(owner):
+    """Remove every trace on the tk variables held as attributes of owner.
+
+    A trace callback is a Tcl command that references its bound method, so
+    it keeps the whole view alive for as long as the root exists. Views
+    call this when they are closed.
+    """
+    for value in list(vars(owner).values()):
+        if isinstance(value, tk.Variable):
+            for mode, callback in value.trace_info():
+                value.trace_remove(mode, callback)
+
+
+def _longest_increasing(values):
+    """Indexes of one longest strictly increasing subsequence of values."""
+    tails = []      # index of the smallest tail of each subsequence length
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        low, high = 0, len(tails)
+        while low < high:
+            middle = (low + high) // 2
+            if values[tails[middle]] < value:
+                low = middle + 1
+            else:
+                high = middle
+        if low:
+            previous[i] = tails[low - 1]
+        if low == len(tails):
+            tails.append(i)
+        else:
+            tails[low] = i
+    indexes = []
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        indexes.append(i)
+        i = previous[i]
+    return indexes[::-1]
+
+
+class TreeBinder:
+    """Keeps a Treeview's items in step with keyed rows.
+
+    Every row key has one item, so a refresh only touches what changed.
+    apply(rows) shows a whole new result set: gone keys are deleted, new
+    ones inserted, changed values updated, and only items off one longest
+    run already in the new order are moved. patch(rows) changes just the
+    given keys (values None deletes one), e.g. those a change feed
+    reported, without diffing the rows that did not change: each patched
+    row costs one bisect plus a list shift, the shift being a memmove of
+    the index list. Keys must be unique.
+
+    Rows keep the order apply() was given, and patched-in keys go at the
+    end; with sort_key(key, values), rows are kept sorted by it (ties by
+    key) and a patch that changes a row's sort value moves it. Positions
+    come from a sorted (rank, key) index, so they never need a scan of
+    the tree. bind() and bind_patch() batch refreshes into one idle
+    callback. Selected items that survive stay selected, and with
+    keep_scroll the top row stays in view.
+    """
+
+    def __init__(self, tree, sort_key=None, keep_scroll=True):
+        self.tree = tree
+        self.sort_key = sort_key
+        self.keep_scroll = keep_scroll
+        self._items = {}    # key -> item id
+        self._values = {}   # key -> values shown
+        self._rank = {}     # key -> rank
+        self._ranks = []    # (rank, key) in tree order
+        self._appended = 0  # rank of the last row without a sort_key
+        self._pending = None
+        self._patches = {}
+        self._after = None
+        self.stats = {'inserted': 0, 'updated': 0, 'moved': 0, 'deleted': 0}
+
+    def __len__(self):
+        return len(self._ranks)
+
+    def bind(self, rows):
+        """apply() rows at the next idle time, replacing anything still waiting."""
+        self._pending = list(rows)
+        self._patches.clear()
+        self._schedule()
+
+    def bind_patch(self, rows):
+        """patch() rows at the next idle time, after anything still waiting."""
+        self._patches.update(rows)
+        self._schedule()
+
+    def flush(self):
+        """Apply rows still waiting for the idle callback."""
+        if self._after is not None:
+            self.tree.after_cancel(self._after)
+            self._after = None
+        rows, self._pending = self._pending, None
+        patches, self._patches = self._patches, {}
+        # The view may have been closed before it went idle
+        if not self.tree.winfo_exists():
+            return
+        if rows is not None:
+            self.apply(rows)
+        if patches:
+            self.patch(patches.items())
+
+    def clear(self):
+        self._pending = None
+        self._patches.clear()
+        self.apply([])
+
+    def item(self, key):
+        """Item id showing key, or None."""
+        return self._items.get(key)
+
+    def _schedule(self):
+        if self._after is None:
+            self._after = self.tree.after_idle(self.flush)
+
+    def _position(self, key):
+        return bisect_left(self._ranks, (self._rank[key], key))
+
+    def _link(self, key, values):
+        """Enter key in the index; returns its position."""
+        if self.sort_key is None:
+            self._appended += 1
+            rank = self._appended
+        else:
+            rank = self.sort_key(key, values)
+        entry = (rank, key)
+        index = bisect_left(self._ranks, entry)
+        self._ranks.insert(index, entry)
+        self._rank[key] = rank
+        return index
+
+    def _unlink(self, key):
+        del self._ranks[self._position(key)]
+        del self._rank[key]
+
+    def _top_key(self):
+        if not self.keep_scroll or not self._ranks:
+            return None
+        top = int(round(self.tree.yview()[0] * len(self._ranks)))
+        return self._ranks[top][1] if top < len(self._ranks) else None
+
+    def _keep_top(self, key):
+        if key is not None and key in self._rank:
+            self.tree.yview_moveto(self._position(key) / len(self._ranks))
+
+    def patch(self, rows):
+        """Insert, update, move or (for values None) delete the given (key, values) rows."""
+        tree = self.tree
+        top = self._top_key()
+        selected = None
+        reselect = []
+        for key, values in rows:
+            item = self._items.get(key)
+            if values is None:
+                if item is not None:
+                    self._unlink(key)
+                    tree.delete(item)
+                    del self._items[key], self._values[key]
+                    self.stats['deleted'] += 1
+                continue
+            values = tuple(values)
+            if item is None:
+                self._items[key] = tree.insert("", self._link(key, values), values=values)
+                self._values[key] = values
+                self.stats['inserted'] += 1
+                continue
+            if self.sort_key is not None and self.sort_key(key, values) != self._rank[key]:
+                if selected is None:
+                    selected = set(tree.selection())
+                self._unlink(key)
+                # Detached first, so the index is unambiguous
+                tree.detach(item)
+                tree.move(item, "", self._link(key, values))
+                if item in selected:
+                    reselect.append(item)
+                self.stats['moved'] += 1
+            if self._values[key] != values:
+                tree.item(item, values=values)
+                self._values[key] = values
+                self.stats['updated'] += 1
+        if reselect:
+            # Detaching an item may drop it from the selection
+            tree.selection_add(reselect)
+        self._keep_top(top)
+
+    def apply(self, rows):
+        """Make the tree show exactly the (key, values) rows, now."""
+        tree = self.tree
+        values = {key: tuple(row) for key, row in rows}
+        if self.sort_key is None:
+            ranks = list(enumerate(values, 1))
+            self._appended = len(ranks)
+        else:
+            ranks = sorted((self.sort_key(key, row), key) for key, row in values.items())
+        keys = [key for _, key in ranks]
+        top = self._top_key()
+
+        gone = [key for key in self._items if key not in values]
+        if gone:
+            tree.delete(*[self._items.pop(key) for key in gone])
+            for key in gone:
+                del self._values[key]
+            self.stats['deleted'] += len(gone)
+
+        # Surviving items on a longest run already in the new order stay put
+        survivors = [key for _, key in self._ranks if key in self._items]
+        wanted = [key for key in keys if key in self._items]
+        moving = set()
+        if survivors != wanted:
+            position = {key: i for i, key in enumerate(keys)}
+            staying = _longest_increasing([position[key] for key in survivors])
+            moving = set(survivors).difference(survivors[i] for i in staying)
+
+        # With the movers detached, the tree holds only rows already in
+        # order, so each row's index in the new order is its index there
+        selected = set(tree.selection()) if moving else ()
+        for key in moving:
+            tree.detach(self._items[key])
+        for i, key in enumerate(keys):
+            item = self._items.get(key)
+            if item is None:
+                self._items[key] = tree.insert("", i, values=values[key])
+                self._values[key] = values[key]
+                self.stats['inserted'] += 1
+                continue
+            if key in moving:
+                tree.move(item, "", i)
+                self.stats['moved'] += 1
+            if self._values[key] != values[key]:
+                tree.item(item, values=values[key])
+                self._values[key] = values[key]
+                self.stats['updated'] += 1
+        reselect = [self._items[key] for key in moving if self._items[key] in selected]
+        if reselect:
+            # Detaching an item may drop it from the selection
+            tree.selection_add(reselect)
+
+        self._ranks = ranks
+        self._rank = {key: rank for rank, key in ranks}
+        self._keep_top(top)
+
+
+class ListSource:
+    """Row source over an in-memory list (e.g. a bounded search result)."""
+
+    def __init__(self, rows, key=None):
+        self.rows = list(rows)
+        self._key = key
+
+    def key(self, row):
+        return self._key(row) if self._key else tuple(row)
+
+    def count(self):
+        return len(self.rows)
+
+    def sort(self, column_index, descending=False):
+        self.rows.sort(key=lambda row: row[column_index], reverse=descending)
+        return True
+
+    def fetch(self, offset, limit, after=None):
+        return self.rows[offset:offset + limit]
+
+    def iter_rows(self):
+        return iter(self.rows)
+
+    def invalidate(self):
+        pass
+
+
+class RankEngineSource:
+    """Row source reading pages straight from a RankEngine in rank order."""
+
+    def __init__(self, engine, method="competition"):
+        self.engine = engine
+        self.method = method
+
+    def key(self, row):
+        return (row[1], row[6])
+
+    def count(self):
+        return len(self.engine)
+
+    def sort(self, column_index, descending=False):
+        # The rank list is always presented in rank order
+        return False
+
+    def fetch(self, offset, limit, after=None):
+        return self.engine.slice(offset, limit, self.method)
+
+    def iter_rows(self):
+        # Generator, so the list is built by whoever consumes it
+        yield from self.engine.rows(self.method)
+
+    def invalidate(self):
+        pass
+
+
+class BusyIndicator(ttk.Frame):
+    """Indeterminate progress bar shown while background work is running."""
+
+    def __init__(self, master, text="Loading...", **kwargs):
+        super().__init__(master, **kwargs)
+        self.text = text
+        self.label = ttk.Label(self, text=text)
+        self.label.pack(side=tk.LEFT, padx=(0, 5))
+        self.progress = ttk.Progressbar(self, mode="indeterminate", length=80)
+        self.progress.pack(side=tk.LEFT)
+        self._visible = True
+        self.set_busy(False)
+
+    def set_text(self, text):
+        self.label.configure(text=text)
+
+    def set_busy(self, busy):
+        if not busy:
+            self.label.configure(text=self.text)
+        if busy and not self._visible:
+            self.progress.start(15)
+            for child in (self.label, self.progress):
+                child.pack(side=tk.LEFT, padx=(0, 5))
+            self.winfo_toplevel().configure(cursor="watch")
+        elif not busy and self._visible:
+            self.progress.stop()
+            for child in (self.label, self.progress):
+                child.pack_forget()
+            self.winfo_toplevel().configure(cursor="")
+        self._visible = busy
+
+
+class ProgressDialog(tk.Toplevel):
+    """Small window with a progress bar and a Cancel button for long jobs.
+
+    cancelled() may be polled from a worker thread; update() and close()
+    must be called on the Tk thread (e.g. through BackgroundExecutor.post).
+    """
+
+    def __init__(self, master, title, text="", maximum=100):
+        super().__init__(master)
+        self.title(title)
+        self.resizable(False, False)
+        self.transient(master)
+        self._cancel_event = threading.Event()
+
+        self.label = ttk.Label(self, text=text, width=45)
+        self.label.pack(padx=15, pady=(15, 5))
+        self.progress = ttk.Progressbar(self, length=300, maximum=maximum)
+        self.progress.pack(padx=15, pady=5)
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(pady=(5, 15))
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+
+    def cancel(self):
+        self._cancel_event.set()
+        self.label.configure(text="Cancelling...")
+        self.cancel_button.state(['disabled'])
+
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def update_progress(self, value, text=None):
+        if not self.winfo_exists() or self.cancelled():
+            return
+        self.progress.configure(value=value)
+        if text is not None:
+            self.label.configure(text=text)
+
+    def close(self):
+        if self.winfo_exists():
+            self.destroy()
+
+
+class FilterPipeline:
+    """Turns filter variable changes into as few queries as possible.
+
+    Every watched variable write counts as an event and (re)starts a
+    timer; when it fires, read_state() is called and on_change(state) runs
+    only if the state differs from the last one queried. Changes made in
+    the same Tk event (e.g. a semester change resetting the subject) are
+    thereby coalesced into one query, and typing is debounced by giving
+    the search variable a longer delay. `owner` is the widget showing the
+    results; nothing runs once it has been destroyed.
+    """
+
+    def __init__(self, owner, read_state, on_change, delay=0):
+        self.owner = owner
+        self.read_state = read_state
+        self.on_change = on_change
+        self.delay = delay
+        self._pending = None
+        self._last_state = None
+        self.stats = {'events': 0, 'queries': 0, 'skipped': 0}
+
+    def watch(self, variable, delay=None):
+        """Schedule a query `delay` ms after each write to variable."""
+        delay = self.delay if delay is None else delay
+        variable.trace_add('write', lambda *args: self.schedule(delay))
+
+    def schedule(self, delay=None):
+        self.stats['events'] += 1
+        self._cancel()
+        self._pending = self.owner.after(self.delay if delay is None else delay, self._fire)
+
+    def _cancel(self):
+        if self._pending is not None:
+            self.owner.after_cancel(self._pending)
+            self._pending = None
+
+    def _fire(self):
+        self._pending = None
+        if not self.owner.winfo_exists():
+            return
+        state = self.read_state()
+        if state == self._last_state:
+            self.stats['skipped'] += 1
+            return
+        self._run(state)
+
+    def refresh(self):
+        """Query the current state now, even if it has not changed."""
+        self._cancel()
+        self._run(self.read_state())
+
+    def _run(self, state):
+        self._last_state = state
+        self.stats['queries'] += 1
+        self.on_change(state)
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview that only materializes the rows currently on screen.
+
+    Rows come from a source object providing count(), fetch(offset, limit,
+    after=None), key(row), sort(column_index, descending) and invalidate().
+    Pages of `page_size` rows are fetched on demand (after the previous
+    page's last row when it is cached, so SQL sources can use keyset
+    pagination) and a few recent pages are kept. The tree itself holds one
+    item per visible line, kept by row key through a TreeBinder, so
+    scrolling or a refresh only touches the lines that changed and memory
+    and redraw cost do not depend on the number of rows.
+
+    Given a BackgroundExecutor, missing pages and counts are read on a
+    worker on this view's own channel (so only its latest request counts)
+    and the rows are drawn when they arrive; the executor's busy indicator
+    shows meanwhile. Without one they are read on the Tk thread, which is
+    only meant for in-memory sources.
+    """
+
+    def __init__(self, master, columns, widths=None, page_size=200, cached_pages=8,
+                 executor=None, on_error=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = tuple(columns)
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.executor = executor
+        self.on_error = on_error
+        self._channel = f"view-{id(self)}"
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings", selectmode="extended")
+        for i, col in enumerate(self.columns):
+            self.tree.heading(col, text=col, command=lambda i=i: self.sort_by(i))
+            width = widths.get(col, 100) if widths else 100
+            self.tree.column(col, width=width)
+
+        self.y_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.x_scrollbar = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.x_scrollbar.set)
+
+        self.y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.source = None
+        self.total = 0
+        self.offset = 0
+        self.visible_rows = 20
+        self.sort_column = None
+        self.sort_descending = False
+        self._pages = OrderedDict()
+        self._binder = TreeBinder(self.tree, keep_scroll=False)
+        self._item_rows = {}
+        self._selected_keys = set()
+        self._populating = False
+        self._counted = True
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.tree.bind("<Prior>", lambda e: self._scroll_by(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self._scroll_by(self.visible_rows))
+        self.tree.bind("<Up>", self._on_up)
+        self.tree.bind("<Down>", self._on_down)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    # Data source -------------------------------------------------------
+
+    def set_source(self, source, keep_position=False, first_page=None, total=None):
+        """Show rows from source.
+
+        first_page and total may carry the first page and row count already
+        read off the UI thread; whatever else is needed is fetched.
+        """
+        self.source = source
+        self._clear_pages()
+        if not keep_position:
+            self.offset = 0
+            self._selected_keys.clear()
+        if source is not None and self.sort_column is not None:
+            if not source.sort(self.sort_column, self.sort_descending):
+                self.sort_column = None
+        if first_page is not None:
+            self._pages[0] = first_page
+        self._counted = True
+        if source is None:
+            self.total = 0
+        elif total is not None:
+            self.total = total
+        elif self.executor is None:
+            self.total = source.count()
+        else:
+            # Keep the old total (and scroll range) until the count arrives
+            self._counted = False
+        self._render()
+
+    def current_sort(self):
+        return self.sort_column, self.sort_descending
+
+    def refresh(self):
+        """Re-read the current source, keeping scroll position and selection."""
+        if self.source is not None:
+            self.source.invalidate()
+        self.set_source(self.source, keep_position=True)
+
+    def update_rows(self, rows):
+        """Replace cached and on-screen rows that share a key with one of rows.
+
+        For changes that keep the row count and order; returns the number
+        of rows replaced.
+        """
+        if self.source is None:
+            return 0
+        by_key = {self.source.key(row): row for row in rows}
+        replaced = 0
+        for page in self._pages.values():
+            for i, row in enumerate(page):
+                new = by_key.get(self.source.key(row))
+                if new is not None:
+                    page[i] = new
+                    replaced += 1
+        if any(self.source.key(row) in by_key for row in self._item_rows.values()):
+            self._render()
+        return replaced
+
+    def sort_by(self, column_index):
+        if self.source is None:
+            return
+        descending = self.sort_column == column_index and not self.sort_descending
+        if self.source.sort(column_index, descending):
+            self.sort_column = column_index
+            self.sort_descending = descending
+            self._clear_pages()
+            self.offset = 0
+            self._render()
+
+    def _clear_pages(self):
+        self._pages.clear()
+        if self.executor is not None:
+            # Pages still being read are for the old source or order
+            self.executor.cancel(self._channel)
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+        previous = self._pages.get(number - 1)
+        if previous:
+            page = self.source.fetch(number * self.page_size, self.page_size, after=previous[-1])
+        else:
+            page = self.source.fetch(number * self.page_size, self.page_size)
+        self._store(number, page)
+        return page
+
+    def _store(self, number, page):
+        self._pages[number] = page
+        self._pages.move_to_end(number)
+        while len(self._pages) > self.cached_pages:
+            self._pages.popitem(last=False)
+
+    def _visible_pages(self):
+        # Until the count arrives, assume a full screen of rows
+        end = self.offset + self.visible_rows
+        if self._counted:
+            end = min(self.total, end)
+        return range(self.offset // self.page_size, (end - 1) // self.page_size + 1)
+
+    def _fetch(self, numbers):
+        """Read pages `numbers` (and the count, if stale) on a worker, then render."""
+        source = self.source
+        # Each page's predecessor row, for keyset pagination
+        after = {number: self._pages[number - 1][-1] for number in numbers if self._pages.get(number - 1)}
+        self.executor.submit(self._channel, self._read, source, numbers, after, not self._counted,
+                             on_done=lambda loaded: self._loaded(source, loaded),
+                             on_error=self.on_error)
+
+    def _read(self, source, numbers, after, count):
+        # Worker thread: never touch Tk here
+        total = source.count() if count else None
+        pages = {}
+        for number in numbers:
+            previous = pages.get(number - 1)
+            pages[number] = source.fetch(number * self.page_size, self.page_size,
+                                         after=previous[-1] if previous else after.get(number))
+        return total, pages
+
+    def _loaded(self, source, loaded):
+        # The view may have been closed, or given another source, meanwhile
+        if not self.winfo_exists() or source is not self.source:
+            return
+        total, pages = loaded
+        if total is not None:
+            self.total = total
+            self._counted = True
+        for number, page in pages.items():
+            self._store(number, page)
+        self._render()
+
+    def _window(self):
+        rows = []
+        position = self.offset
+        end = min(self.total, self.offset + self.visible_rows)
+        while position < end:
+            number, start = divmod(position, self.page_size)
+            page = self._page(number)
+            if start >= len(page):
+                break
+            chunk = page[start:start + end - position]
+            rows.extend(chunk)
+            position += len(chunk)
+        return rows
+
+    # Rendering ---------------------------------------------------------
+
+    def _render(self):
+        if self._counted:
+            self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+        if self.executor is not None and self.source is not None:
+            missing = [number for number in self._visible_pages() if number not in self._pages]
+            if missing or not self._counted:
+                # The rows on screen stay until the fetch is drawn
+                self._fetch(missing)
+                return
+        self._draw()
+
+    def _draw(self):
+        rows = self._window() if self.source is not None else []
+
+        self._populating = True
+        try:
+            # A key repeated on screen (identical CSV lines) is told apart by its occurrence
+            seen = {}
+            keyed = []
+            for row in rows:
+                key = self.source.key(row)
+                seen[key] = seen.get(key, -1) + 1
+                keyed.append(((key, seen[key]), row))
+            self._binder.apply(keyed)
+            self._item_rows = dict(zip(self.tree.get_children(), rows))
+            selected = [item for item, row in self._item_rows.items()
+                        if self.source.key(row) in self._selected_keys]
+            self.tree.selection_set(selected)
+        finally:
+            self._populating = False
+        self.tree.yview_moveto(0)
+
+        if self.total:
+            self.y_scrollbar.set(self.offset / self.total,
+                                 min(1.0, (self.offset + self.visible_rows) / self.total))
+        else:
+            self.y_scrollbar.set(0.0, 1.0)
+
+    def _row_height(self):
+        height = ttk.Style().lookup("Treeview", "rowheight")
+        try:
+            return max(1, int(height))
+        except (TypeError, ValueError):
+            return 20
+
+    def _on_resize(self, event):
+        row_height = self._row_height()
+        # Leave room for the heading row
+        rows = max(1, (event.height - row_height - 4) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self._render()
+
+    # Scrolling and selection ------------------------------------------
+
+    def _scroll_by(self, lines):
+        offset = max(0, min(self.offset + lines, self.total - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.total)
+            self._render()
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible_rows if args[2] == "pages" else 1)
+            self._scroll_by(step)
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_up(self, event):
+        items = self.tree.get_children()
+        if items and self.tree.focus() == items[0]:
+            return self._scroll_by(-1)
+
+    def _on_down(self, event):
+        items = self.tree.get_children()
+        if items and self.tree.focus() == items[-1]:
+            return self._scroll_by(1)
+
+    def _on_select(self, event):
+        if self._populating or self.source is None:
+            return
+        visible = {self.source.key(row) for row in self._item_rows.values()}
+        self._selected_keys -= visible
+        for item in self.tree.selection():
+            row = self._item_rows.get(item)
+            if row is not None:
+                self._selected_keys.add(self.source.key(row))
+
+    def selected_rows(self):
+        """Source rows for the selected items currently on screen."""
+        return [self._item_rows[item] for item in self.tree.selection() if item in self._item_rows]
+
+    def selected_keys(self):
+        """Keys of every selected row, including rows scrolled out of view."""
+        return set(self._selected_keys)
+
+    def destroy(self):
+        if self.executor is not None:
+            self.executor.cancel(self._channel)
+        super().destroy()
+
+
+class EditableGrid(ttk.Frame):
+    """Spreadsheet-style Treeview whose editable cells are changed in place.
+
+    Each row has a key (its item id), some read-only leading columns and
+    the editable columns set with set_columns(). Double-click, Return or F2
+    opens an entry over a cell: Return commits and moves down, Tab/Shift-Tab
+    move across, Escape cancels and an empty entry reverts the cell.
+    validate(text) returns the value to store or raises ValueError, which
+    keeps the entry open and turns it red. Changed cells stay dirty (and
+    their rows highlighted) until mark_saved(); on_change() is called
+    whenever the set of dirty cells changes.
+    """
+
+    def __init__(self, master, fixed_columns, validate, widths=None, on_change=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.fixed_columns = tuple(fixed_columns)
+        self.edit_columns = ()
+        self.validate = validate
+        self.widths = widths or {}
+        self.on_change = on_change
+        self._fixed = {}
+        self._original = {}
+        self._dirty = {}
+        self._editor = None
+
+        self.tree = ttk.Treeview(self, show="headings", selectmode="browse")
+        y_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand=y_scrollbar.set)
+        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.tag_configure('dirty', background='#fff3cd')
+
+        self.tree.bind("<Double-1>", self._on_double_click)
+        self.tree.bind("<Return>", self._edit_focused)
+        self.tree.bind("<F2>", self._edit_focused)
+        # The editor is placed over a cell, so it must not outlive a scroll
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<Configure>"):
+            self.tree.bind(sequence, lambda e: self._commit(), add="+")
+
+    @property
+    def columns(self):
+        return self.fixed_columns + self.edit_columns
+
+    def set_columns(self, edit_columns):
+        """Clear the grid and use edit_columns as the editable columns."""
+        self.clear()
+        self.edit_columns = tuple(edit_columns)
+        self.tree.configure(columns=self.columns)
+        for col in self.columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=self.widths.get(col, 90), anchor="center")
+
+    def clear(self):
+        self._close_editor()
+        self.tree.delete(*self.tree.get_children())
+        self._fixed.clear()
+        self._original.clear()
+        had_changes = bool(self._dirty)
+        self._dirty.clear()
+        if had_changes and self.on_change:
+            self.on_change()
+
+    def add_row(self, key, fixed_values, values=None):
+        """Append a row; values maps editable columns to their saved values."""
+        values = values or {}
+        self._fixed[key] = dict(zip(self.fixed_columns, fixed_values))
+        for column, value in values.items():
+            self._original[(key, column)] = value
+        self.tree.insert("", tk.END, iid=key,
+                         values=list(fixed_values) + [values.get(col, "") for col in self.edit_columns])
+
+    def has_row(self, key):
+        return self.tree.exists(key)
+
+    def set_saved(self, key, column, value):
+        """Show a value saved elsewhere, unless the cell has unsaved edits."""
+        cell = (key, column)
+        self._original[cell] = value
+        if cell not in self._dirty:
+            self.tree.set(key, column, value)
+        elif self._dirty[cell] == value:
+            # The edit matches what was saved
+            del self._dirty[cell]
+            self._update_row_tag(key)
+            if self.on_change:
+                self.on_change()
+
+    def row(self, key):
+        """The row's read-only values by column, as they were added.
+
+        Kept here rather than read back from the tree, which turns values
+        that look like numbers (a roll number "007") into ints.
+        """
+        return dict(self._fixed[key])
+
+    def dirty_cells(self):
+        """{(key, column): value} for every cell changed since it was loaded or saved."""
+        return dict(self._dirty)
+
+    def mark_saved(self, cells):
+        """Take the given {(key, column): value} cells as saved.
+
+        Cells edited again since (so holding another value) stay dirty.
+        """
+        for cell, value in cells.items():
+            self._original[cell] = value
+            if self._dirty.get(cell) == value:
+                del self._dirty[cell]
+        for key in {key for key, _ in cells}:
+            self._update_row_tag(key)
+        if self.on_change:
+            self.on_change()
+
+    def _set_cell(self, key, column, value):
+        self.tree.set(key, column, value)
+        if value == self._original.get((key, column), ""):
+            self._dirty.pop((key, column), None)
+        else:
+            self._dirty[(key, column)] = value
+        self._update_row_tag(key)
+        if self.on_change:
+            self.on_change()
+
+    def _update_row_tag(self, key):
+        if self.tree.exists(key):
+            dirty = any((key, col) in self._dirty for col in self.edit_columns)
+            self.tree.item(key, tags=('dirty',) if dirty else ())
+
+    # Cell editor --------------------------------------------------------
+
+    def edit(self, key, column):
+        """Open the editor over a cell."""
+        self._commit()
+        if self._editor is not None:
+            return  # The open cell holds an invalid value
+        self.tree.see(key)
+        self.tree.selection_set(key)
+        self.tree.focus(key)
+        bbox = self.tree.bbox(key, column)
+        if not bbox:
+            return
+        x, y, width, height = bbox
+        entry = tk.Entry(self.tree, justify="center", relief="solid", borderwidth=1)
+        entry.insert(0, self.tree.set(key, column))
+        entry.select_range(0, tk.END)
+        entry.place(x=x, y=y, width=width, height=height)
+        entry.focus_set()
+        entry.bind("<Return>", lambda e: self._commit(move=(1, 0)))
+        entry.bind("<Tab>", lambda e: self._commit(move=(0, 1)))
+        entry.bind("<Shift-Tab>", lambda e: self._commit(move=(0, -1)))
+        entry.bind("<ISO_Left_Tab>", lambda e: self._commit(move=(0, -1)))
+        entry.bind("<Escape>", lambda e: self._cancel())
+        entry.bind("<FocusOut>", lambda e: self._commit())
+        self._editor = (entry, key, column)
+
+    def _commit(self, move=None):
+        if self._editor is None:
+            return "break"
+        entry, key, column = self._editor
+        text = entry.get().strip()
+        if not text:
+            value = self._original.get((key, column), "")
+        else:
+            try:
+                value = self.validate(text)
+            except ValueError:
+                entry.configure(background="#f8d7da")
+                return "break"
+        self._close_editor()
+        self._set_cell(key, column, value)
+        if move:
+            self._move(key, column, *move)
+        return "break"
+
+    def _cancel(self):
+        self._close_editor()
+        self.tree.focus_set()
+        return "break"
+
+    def _close_editor(self):
+        if self._editor is not None:
+            entry = self._editor[0]
+            self._editor = None
+            entry.destroy()
+
+    def _move(self, key, column, rows, columns):
+        index = self.edit_columns.index(column) + columns
+        if index >= len(self.edit_columns):
+            index, rows = 0, 1
+        elif index < 0:
+            index, rows = len(self.edit_columns) - 1, -1
+        if rows > 0:
+            key = self.tree.next(key)
+        elif rows < 0:
+            key = self.tree.prev(key)
+        if key:
+            self.edit(key, self.edit_columns[index])
+        else:
+            self.tree.focus_set()
+
+    def _on_double_click(self, event):
+        key = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if not key or not column:
+            return
+        name = self.columns[int(column[1:]) - 1]
+        if name in self.edit_columns:
+            self.edit(key, name)
+
+    def _edit_focused(self, event=None):
+        key = self.tree.focus()
+        if key and self.edit_columns:
+            self.edit(key, self.edit_columns[0])
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        self._commit()
+        self.tree.yview(*args)